@@ -1,19 +1,57 @@
 #app.py
 from flask import Flask
 from config import Config
+from json_provider import FastJSONProvider
 from models import db
-from flasgger import Swagger
+from replicas import replica_set
+from ingest import download_buffer
+from cache import response_cache
+from idempotency import idempotency
 from routes import api
+from pool import check_database
+from commands import register_commands
+from bulk import bulk_api
+from charts import charts_api
+from search import search_api, search_index
+from export import export_api
+from similar import similar_api
+from stats import stats_api
+from metrics import metrics
+from openapi import init_docs
+from ratelimit import rate_limiter
 
-app = Flask(__name__)
-app.config.from_object(Config)
-db.init_app(app)
 
-swagger = Swagger(app)
-app.register_blueprint(api, url_prefix="/api")
+def create_app(config=Config):
+    app = Flask(__name__)
+    app.config.from_object(config)
+    app.json = FastJSONProvider(app)
+    db.init_app(app)
+    replica_set.init_app(app)
+    download_buffer.init_app(app)
+    response_cache.init_app(app)
+    idempotency.init_app(app)
+    search_index.init_app(app)
+    metrics.init_app(app)
+    # Після metrics: відхилені запити теж потрапляють у метрики
+    rate_limiter.init_app(app)
+
+    init_docs(app)
+    app.register_blueprint(api, url_prefix="/api")
+    app.register_blueprint(bulk_api, url_prefix="/api")
+    app.register_blueprint(charts_api, url_prefix="/api")
+    app.register_blueprint(search_api, url_prefix="/api")
+    app.register_blueprint(export_api, url_prefix="/api")
+    app.register_blueprint(similar_api, url_prefix="/api")
+    app.register_blueprint(stats_api, url_prefix="/api")
+    register_commands(app)
+
+    if app.config["DB_STARTUP_CHECK"]:
+        check_database(app, db)
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
-    with app.app_context():
-        db.create_all()
+    # Лише для розробки; у продакшені — gunicorn -c gunicorn.conf.py, схема — flask init-db
     app.run(host='0.0.0.0', port=5000, debug=True)
-
@@ -0,0 +1,219 @@
+#asgi.py
+"""
+Асинхронна точка входу: uvicorn asgi:app --workers N
+
+Гарячі маршрути /api (списки пісень, користувачів і завантажень з limit/after,
+пісня за id, POST /api/downloads) обслуговуються нативно через SQLAlchemy
+asyncio (aiomysql / aiosqlite), тож один процес тримає сотні запитів до БД
+у польоті. Решта URL, а також
+ті самі маршрути з параметрами, які тут не реалізовано (фільтри, expand,
+stream...), передаються у Flask-застосунок, тому набір URL і форма JSON
+збігаються з blueprint `api`.
+"""
+import math
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.exceptions import BadRequest, HTTPException, NotFound
+
+from app import app as flask_app
+from charts import hourly_rows, hourly_upsert, upsert_hourly_rows
+from ingest import download_buffer
+from models import Song, User, UserDownload
+from pagination import after_keyset, decode_cursor, encode_cursor, next_page_headers
+from ratelimit import ASGI_CHECKED, rate_limiter
+from routes import SONG_FIELDS, song_to_dict, user_to_dict, download_to_dict
+
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+mysqlconnector": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_uri(app):
+    uri = app.config.get("ASYNC_DATABASE_URI")
+    if uri:
+        return uri
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+    if url.drivername not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver for {url.drivername}, set ASYNC_DATABASE_URL")
+    url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    # Як і Flask-SQLAlchemy: відносний шлях SQLite — від instance-теки
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:" \
+            and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(app.instance_path, url.database))
+    return url
+
+
+def async_engine_options(app):
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    # Клас пулу та connect_args синхронного драйвера async-рушію не підходять
+    options.pop("poolclass", None)
+    options.pop("connect_args", None)
+    return options
+
+
+engine = create_async_engine(async_database_uri(flask_app), **async_engine_options(flask_app))
+Session = async_sessionmaker(engine, expire_on_commit=False)
+flask_wsgi = WSGIMiddleware(flask_app)
+
+
+# ----------------- ВІДПОВІДІ -----------------
+def json_response(data, status=200, headers=None):
+    return Response(flask_app.json.dumps(data) + "\n", status, headers, media_type="application/json")
+
+
+def error_response(e):
+    return json_response({"message": e.description}, e.code)
+
+
+class Hybrid:
+    """
+    ASGI-обробник маршруту: async-функція повертає Response, а None
+    означає «передати запит Flask-застосунку як є».
+    """
+
+    def __init__(self, handler, endpoint):
+        self.handler = handler
+        # Ім'я Flask endpoint-а того самого маршруту: спільні з ним ліміти частоти
+        self.endpoint = endpoint
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        if rate_limiter.enabled:
+            wait = rate_limiter.retry_after(self.endpoint, request.client and request.client.host, request.headers)
+            if wait:
+                response = json_response({"message": "Too many requests"}, 429, {"Retry-After": str(math.ceil(wait))})
+                await response(scope, receive, send)
+                return
+            scope[ASGI_CHECKED] = True
+        try:
+            response = await self.handler(request)
+        except HTTPException as e:
+            response = error_response(e)
+        if response is None:
+            await flask_wsgi(scope, receive, send)
+        else:
+            await response(scope, receive, send)
+
+
+# ----------------- СПИСКИ -----------------
+SONG_COLUMNS = [getattr(Song, attr) for attr in SONG_FIELDS.values()]
+USER_COLUMNS = [User.user_id, User.username, User.email]
+DOWNLOAD_COLUMNS = [UserDownload.download_id, UserDownload.user_id, UserDownload.song_id, UserDownload.download_date]
+
+
+def parse_limit(request):
+    default = flask_app.config.get("API_PAGE_SIZE", 100)
+    maximum = flask_app.config.get("API_MAX_PAGE_SIZE", 1000)
+    try:
+        limit = int(request.query_params.get("limit") or default)
+    except ValueError:
+        raise BadRequest("Invalid value for 'limit'")
+    if limit < 1:
+        raise BadRequest("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def list_handler(columns, key, serialize, endpoint):
+    # Як і sync-шлях: кортежі колонок замість ORM-об'єктів, серіалізатор читає їх за іменами
+    async def handler(request):
+        if set(request.query_params) - {"limit", "after"}:
+            return None
+        limit = parse_limit(request)
+        stmt = select(*columns)
+        after = request.query_params.get("after")
+        if after:
+            stmt = after_keyset(stmt, [key], decode_cursor(after, 1))
+        async with Session() as session:
+            items = (await session.execute(stmt.order_by(key).limit(limit + 1))).all()
+        headers = None
+        if len(items) > limit:
+            cursor = encode_cursor([getattr(items[limit - 1], key.key)])
+            base_url = str(request.url.replace(query=""))
+            headers = next_page_headers(base_url, dict(request.query_params), cursor, limit)
+        return json_response([serialize(item) for item in items[:limit]], headers=headers)
+    return Hybrid(handler, endpoint)
+
+
+async def get_song(request):
+    if request.query_params.get("expand"):
+        return None
+    async with Session() as session:
+        s = await session.get(Song, request.path_params["song_id"])
+    if s is None:
+        raise NotFound()
+    return json_response({"id": s.song_id, "title": s.title, "price": float(s.price)})
+
+
+# ----------------- ЗАВАНТАЖЕННЯ -----------------
+async def add_download(request):
+    if "idempotency-key" in request.headers:
+        # Збережені відповіді живуть у Flask-застосунку цього ж процесу
+        return None
+    data = await request.json()
+    async with Session() as session:
+        known = (await session.execute(
+            select(
+                select(Song.song_id).where(Song.song_id == data["song_id"]).exists(),
+                select(User.user_id).where(User.user_id == data["user_id"]).exists(),
+            )
+        )).one()
+    if not all(known):
+        raise NotFound()
+    if download_buffer.enabled:
+        if not await run_in_threadpool(download_buffer.submit, data["user_id"], data["song_id"], datetime.now()):
+            return json_response({"message": "Download queue is full"}, 503, {"Retry-After": "1"})
+        return json_response({"message": "Download accepted"}, 202)
+
+    async with Session.begin() as session:
+        bumped = await session.execute(
+            update(Song)
+            .where(Song.song_id == data["song_id"])
+            .values(downloads_count=func.coalesce(Song.downloads_count, 0) + 1)
+        )
+        if bumped.rowcount == 0:
+            raise NotFound()
+        download = UserDownload(user_id=data["user_id"], song_id=data["song_id"], download_date=datetime.now())
+        session.add(download)
+        await session.flush()
+        rows = hourly_rows([(download.song_id, download.download_date)])
+        upsert = hourly_upsert(engine.dialect.name)
+        if upsert is not None:
+            await session.execute(upsert, rows)
+        else:
+            await session.run_sync(upsert_hourly_rows, rows)
+    return json_response({"message": "Download saved", "id": download.download_id})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route("/api/songs", list_handler(SONG_COLUMNS, Song.song_id, song_to_dict, "api.get_songs"), methods=["GET"]),
+        Route("/api/songs/{song_id:int}", Hybrid(get_song, "api.get_song"), methods=["GET"]),
+        # Довідники (genres, labels, albums, authors) лишаються на Flask: їх віддає кеш з ETag
+        Route("/api/users", list_handler(USER_COLUMNS, User.user_id, user_to_dict, "api.get_users"), methods=["GET"]),
+        Route("/api/downloads", list_handler(DOWNLOAD_COLUMNS, UserDownload.download_id, download_to_dict,
+                                             "api.get_downloads"), methods=["GET"]),
+        Route("/api/downloads", Hybrid(add_download, "api.add_download"), methods=["POST"]),
+        Mount("/", app=flask_wsgi),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,644 @@
+#bench.py
+"""
+Відтворюваний бенчмарк API.
+
+    python bench.py --songs 100000 --downloads 1000000 --out bench.json
+    python bench.py --no-seed --http http://127.0.0.1:8000 --concurrency 32 --out asgi.json
+    python bench.py --no-seed --servers gunicorn,uvicorn --workers 4 --concurrency 64 --out servers.json
+    python bench.py --no-seed --compare bench.json
+    LAZY_STARTUP=1 python bench.py --no-seed --startup 10 --out startup.json
+
+Що /api/stats не залежить від обсягу подій, видно з двох прогонів:
+
+    CACHE_ENABLED=0 python bench.py --downloads 100000 --scenarios stats_revenue_genre --out small.json
+    CACHE_ENABLED=0 python bench.py --downloads 1000000 --scenarios stats_revenue_genre --compare small.json
+
+Засіває локальну БД (SQLite за замовчуванням або будь-який DATABASE_URL)
+синтетичним каталогом із фіксованим seed, проганяє сценарії для кожного
+ендпоінта через Flask test client або по HTTP (gunicorn / uvicorn asgi:app)
+і пише p50/p90/p99, пропускну здатність і пікову пам'ять у JSON для
+порівняння між комітами. --startup вимірює холодний старт в окремих
+процесах: імпорт app, перший запит і найдовші імпорти. --servers
+піднімає gunicorn (gthread, app:app) і uvicorn (asgi:app) з однаковою
+кількістю воркерів і проганяє ті самі сценарії по HTTP проти кожного —
+порівняння sync і async точок входу під навантаженням.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+
+SIZES = {
+    "genres": 20,
+    "labels": 50,
+    "authors": 2000,
+    "albums": 1000,
+    "songs": 10000,
+    "users": 5000,
+    "downloads": 100000,
+}
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "te", "vo", "su", "ne", "di", "ja", "zo", "pe", "chu", "bra", "sto"]
+COUNTRIES = ["UA", "PL", "DE", "US"]
+
+
+def make_words(seed, n=400):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < n:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_title(rng, words):
+    return " ".join(rng.choice(words) for _ in range(rng.randint(1, 4))).capitalize()
+
+
+# ----------------- ЗАСІВ -----------------
+def seed_database(app, sizes, seed, days=30, chunk=10000):
+    """Детермінований каталог: ті самі sizes і seed дають ту саму БД (крім дат відносно now)."""
+    from sqlalchemy import bindparam, insert, update
+
+    from charts import hour_bucket
+    from models import db, Album, Author, Genre, Label, Song, SongAuthor, SongDownloadHourly, User, UserDownload
+
+    rng = random.Random(seed)
+    words = make_words(seed)
+    now = datetime.now().replace(microsecond=0)
+
+    def bulk(table, rows):
+        rows = list(rows)
+        for i in range(0, len(rows), chunk):
+            db.session.execute(insert(table), rows[i:i + chunk])
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        bulk(Genre.__table__, ({"genre_id": i, "name": f"Genre {i}"} for i in range(1, sizes["genres"] + 1)))
+        bulk(Label.__table__, (
+            {"label_id": i, "name": f"Label {i}", "country": rng.choice(COUNTRIES)}
+            for i in range(1, sizes["labels"] + 1)
+        ))
+        bulk(Author.__table__, (
+            {"author_id": i, "name": make_title(rng, words), "country": rng.choice(COUNTRIES),
+             "birth_date": date(1950, 1, 1) + timedelta(days=rng.randrange(18000))}
+            for i in range(1, sizes["authors"] + 1)
+        ))
+        bulk(Album.__table__, (
+            {"album_id": i, "title": make_title(rng, words), "release_year": rng.randint(1970, 2025),
+             "label_id": rng.randint(1, sizes["labels"])}
+            for i in range(1, sizes["albums"] + 1)
+        ))
+        bulk(Song.__table__, (
+            {"song_id": i, "title": make_title(rng, words), "price": round(rng.uniform(0.49, 2.99), 2),
+             "downloads_count": 0, "genre_id": rng.randint(1, sizes["genres"]),
+             "album_id": rng.randint(1, sizes["albums"])}
+            for i in range(1, sizes["songs"] + 1)
+        ))
+        bulk(SongAuthor, (
+            {"song_id": i, "author_id": author_id}
+            for i in range(1, sizes["songs"] + 1)
+            for author_id in rng.sample(range(1, sizes["authors"] + 1), rng.randint(1, 2))
+        ))
+        bulk(User.__table__, (
+            {"user_id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+             "registration_date": date(2015, 1, 1) + timedelta(days=rng.randrange(3650))}
+            for i in range(1, sizes["users"] + 1)
+        ))
+
+        # Популярність пісень має довгий хвіст, як у реальному каталозі
+        song_counts = Counter()
+        hourly = Counter()
+        span = days * 24 * 3600
+        for start in range(0, sizes["downloads"], chunk):
+            rows = []
+            for _ in range(min(chunk, sizes["downloads"] - start)):
+                rank = min(int(rng.paretovariate(1.2)), sizes["songs"])
+                song_id = (rank * 7919) % sizes["songs"] + 1
+                when = now - timedelta(seconds=rng.randrange(span))
+                rows.append({"user_id": rng.randint(1, sizes["users"]), "song_id": song_id, "download_date": when})
+                song_counts[song_id] += 1
+                hourly[song_id, hour_bucket(when)] += 1
+            db.session.execute(insert(UserDownload.__table__), rows)
+
+        song = Song.__table__
+        counts = [{"b_song_id": song_id, "b_count": n} for song_id, n in song_counts.items()]
+        for i in range(0, len(counts), chunk):
+            db.session.execute(
+                update(song).where(song.c.song_id == bindparam("b_song_id")).values(downloads_count=bindparam("b_count")),
+                counts[i:i + chunk],
+            )
+        bulk(SongDownloadHourly.__table__, (
+            {"song_id": song_id, "bucket": bucket, "downloads": n} for (song_id, bucket), n in hourly.items()
+        ))
+        db.session.commit()
+
+    from similar import SimilarityModel
+    from stats import refresh_daily_stats
+
+    with app.app_context():
+        refresh_daily_stats(full=True)
+    try:
+        SimilarityModel(app).refresh(full=True)
+    except RuntimeError:
+        pass  # без numpy / scipy сценарій song_similar повертає порожні списки
+
+
+# ----------------- СЦЕНАРІЇ -----------------
+class Scenario:
+    """`path(rng, ctx)` повертає URL запиту, `body(rng, ctx)` — JSON для запису."""
+
+    def __init__(self, name, path, method="GET", body=None):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.body = body
+
+
+def random_id(rng, ctx, entity):
+    return rng.randint(1, ctx["sizes"][entity])
+
+
+def song_cursor(rng, ctx):
+    from pagination import encode_cursor
+    return encode_cursor([random_id(rng, ctx, "songs")])
+
+
+def search_query(rng, ctx):
+    word = rng.choice(ctx["words"])
+    # Половина запитів — незавершене слово, як під час набору
+    return word if rng.random() < 0.5 else word[:rng.randint(2, len(word))]
+
+
+def export_day(rng, ctx):
+    day = date.today() - timedelta(days=rng.randrange(1, ctx["days"]))
+    return f"from={day}&to={day + timedelta(days=1)}"
+
+
+def stats_window(rng, ctx):
+    """Випадкове вікно 1-7 днів: різні URL, щоб кеш відповідей не приховував запит."""
+    end = date.today() - timedelta(days=rng.randrange(0, ctx["days"]))
+    return f"from={end - timedelta(days=rng.randint(1, 7))}&to={end}"
+
+
+SCENARIOS = [
+    Scenario("songs_list", lambda rng, ctx: "/api/songs"),
+    Scenario("songs_list_1000", lambda rng, ctx: "/api/songs?limit=1000"),
+    Scenario("songs_list_after", lambda rng, ctx: f"/api/songs?after={song_cursor(rng, ctx)}"),
+    Scenario("songs_filter_genre_sort", lambda rng, ctx:
+             f"/api/songs?genre_id={random_id(rng, ctx, 'genres')}&sort=-downloads"),
+    Scenario("songs_price_range", lambda rng, ctx: "/api/songs?min_price=1&max_price=1.5&sort=price"),
+    Scenario("songs_fields", lambda rng, ctx: "/api/songs?fields=id,title"),
+    Scenario("songs_expand", lambda rng, ctx: "/api/songs?expand=genre,album,authors"),
+    Scenario("songs_stream_ndjson", lambda rng, ctx: "/api/songs?stream=ndjson"),
+    Scenario("song_get", lambda rng, ctx: f"/api/songs/{random_id(rng, ctx, 'songs')}"),
+    Scenario("song_get_expand", lambda rng, ctx:
+             f"/api/songs/{random_id(rng, ctx, 'songs')}?expand=genre,album,authors"),
+    Scenario("song_similar", lambda rng, ctx: f"/api/songs/{random_id(rng, ctx, 'songs')}/similar"),
+    Scenario("authors_list", lambda rng, ctx: "/api/authors"),
+    Scenario("albums_list", lambda rng, ctx: "/api/albums"),
+    Scenario("genres_list", lambda rng, ctx: "/api/genres"),
+    Scenario("labels_list", lambda rng, ctx: "/api/labels"),
+    Scenario("users_list", lambda rng, ctx: "/api/users"),
+    Scenario("user_downloads", lambda rng, ctx: f"/api/users/{random_id(rng, ctx, 'users')}/downloads"),
+    Scenario("user_downloads_include_song", lambda rng, ctx:
+             f"/api/users/{random_id(rng, ctx, 'users')}/downloads?include=song"),
+    Scenario("downloads_list", lambda rng, ctx: "/api/downloads"),
+    Scenario("downloads_list_1000", lambda rng, ctx: "/api/downloads?limit=1000"),
+    Scenario("downloads_export_csv_day", lambda rng, ctx: f"/api/downloads/export?{export_day(rng, ctx)}"),
+    Scenario("downloads_export_parquet_day", lambda rng, ctx:
+             f"/api/downloads/export?format=parquet&include=song,genre&{export_day(rng, ctx)}"),
+    Scenario("charts_top", lambda rng, ctx: "/api/charts/top?limit=50"),
+    Scenario("charts_top_genre", lambda rng, ctx: f"/api/charts/top?genre_id={random_id(rng, ctx, 'genres')}"),
+    Scenario("charts_trending", lambda rng, ctx: f"/api/charts/trending?hours={rng.choice([1, 24, 168])}"),
+    Scenario("stats_revenue_genre", lambda rng, ctx: f"/api/stats/revenue?group_by=genre&{stats_window(rng, ctx)}"),
+    Scenario("stats_revenue_song_daily", lambda rng, ctx:
+             f"/api/stats/revenue?group_by=song&interval=day&{stats_window(rng, ctx)}"),
+    Scenario("stats_downloads_label", lambda rng, ctx: f"/api/stats/downloads?group_by=label&{stats_window(rng, ctx)}"),
+    Scenario("search", lambda rng, ctx: f"/api/search?q={search_query(rng, ctx)}"),
+    Scenario("search_songs", lambda rng, ctx: f"/api/search?type=song&q={search_query(rng, ctx)}"),
+    Scenario("download_post", lambda rng, ctx: "/api/downloads", "POST", lambda rng, ctx: {
+        "user_id": random_id(rng, ctx, "users"), "song_id": random_id(rng, ctx, "songs"),
+    }),
+    Scenario("author_post", lambda rng, ctx: "/api/authors", "POST", lambda rng, ctx: {
+        "name": make_title(rng, ctx["words"]), "country": rng.choice(COUNTRIES),
+    }),
+    Scenario("authors_bulk_post", lambda rng, ctx: "/api/authors/bulk", "POST", lambda rng, ctx: [
+        {"name": make_title(rng, ctx["words"]), "country": rng.choice(COUNTRIES)} for _ in range(100)
+    ]),
+]
+
+
+# ----------------- КЛІЄНТИ -----------------
+class TestClientTarget:
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+
+        def send(method, path, body):
+            response = client.open(path, method=method, json=body)
+            # Потокові відповіді треба дочитати, інакше вимірюється лише перший байт
+            response.get_data()
+            response.close()
+            return response.status_code
+        return send
+
+
+class HttpTarget:
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+
+    def session(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+        def send(method, path, body):
+            payload = json.dumps(body) if body is not None else None
+            headers = {"Content-Type": "application/json"} if payload else {}
+            conn.request(method, self.prefix + path, payload, headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        return send
+
+
+# ----------------- СЕРВЕРИ -----------------
+# Гарячі маршрути, які asgi.py обслуговує нативно: на них і видно різницю sync / async
+SERVER_SCENARIOS = [
+    "songs_list", "songs_list_1000", "songs_list_after", "song_get",
+    "users_list", "downloads_list", "downloads_list_1000", "download_post",
+]
+
+
+def server_command(name, port, workers):
+    if name == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"], {
+            "BIND": f"127.0.0.1:{port}", "WEB_WORKERS": str(workers), "WEB_ACCESS_LOG": os.devnull,
+        }
+    if name == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(workers), "--no-access-log", "--log-level", "warning"], {}
+    raise ValueError(f"Unknown server {name!r}, expected gunicorn or uvicorn")
+
+
+def start_server(name, port, workers, timeout=60):
+    """Запустити сервер у дочірньому процесі й дочекатися першої успішної відповіді."""
+    command, env = server_command(name, port, workers)
+    proc = subprocess.Popen(command, env={**os.environ, **env}, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"{name} exited with {proc.returncode}:\n{proc.stderr.read()}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/genres")
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(proc)
+    sys.exit(f"{name} did not answer on port {port} within {timeout}s")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def compare_servers(servers):
+    """Друкує p50 / p99 / rps кожного сервера відносно першого."""
+    names = list(servers)
+    base = servers[names[0]]
+    print(f"{'scenario':24} " + " ".join(f"{n + ' p50':>14} {n + ' rps':>14}" for n in names), file=sys.stderr)
+    for scenario in base:
+        cells = []
+        for name in names:
+            result = servers[name].get(scenario, {})
+            cells.append(f"{result.get('p50_ms', 0):>14} {result.get('throughput_rps', 0):>14}")
+        print(f"{scenario:24} " + " ".join(cells), file=sys.stderr)
+
+
+# ----------------- ВИМІРЮВАННЯ -----------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_scenario(target, scenario, ctx, requests, concurrency, seed, warmup):
+    def requests_for(worker, n):
+        rng = random.Random(f"{seed}:{scenario.name}:{worker}")
+        for _ in range(n):
+            body = scenario.body(rng, ctx) if scenario.body else None
+            yield scenario.path(rng, ctx), body
+
+    send = target.session()
+    for path, body in requests_for("warmup", warmup):
+        send(scenario.method, path, body)
+
+    latencies = []
+    errors = Counter()
+    lock = threading.Lock()
+
+    def worker(index, n):
+        send = target.session()
+        local = []
+        for path, body in requests_for(index, n):
+            started = time.perf_counter()
+            try:
+                status = send(scenario.method, path, body)
+            except Exception as e:
+                status = type(e).__name__
+            local.append(time.perf_counter() - started)
+            if not (isinstance(status, int) and status < 400):
+                with lock:
+                    errors[str(status)] += 1
+        with lock:
+            latencies.extend(local)
+
+    per_worker = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(i, n)) for i, n in enumerate(per_worker) if n]
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(ms),
+        "errors": dict(errors),
+        "p50_ms": round(percentile(ms, 0.50), 3),
+        "p90_ms": round(percentile(ms, 0.90), 3),
+        "p99_ms": round(percentile(ms, 0.99), 3),
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+        "throughput_rps": round(len(ms) / wall, 1) if wall else 0.0,
+        # CPU цього процесу: in-process — сам застосунок, по HTTP — лише генератор навантаження
+        "cpu_ms_per_request": round(cpu * 1000 / len(ms), 3) if ms else 0.0,
+    }
+
+
+def peak_allocation(target, scenario, ctx, seed, samples=5):
+    """Пік Python-алокацій за один запит (лише in-process: tracemalloc бачить тільки цей процес)."""
+    send = target.session()
+    rng = random.Random(f"{seed}:{scenario.name}:memory")
+    peak = 0
+    for _ in range(samples):
+        body = scenario.body(rng, ctx) if scenario.body else None
+        path = scenario.path(rng, ctx)
+        tracemalloc.start()
+        try:
+            send(scenario.method, path, body)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+# ----------------- СТАРТ -----------------
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+response = app.test_client().get(sys.argv[1])
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (time.perf_counter() - imported) * 1000,
+    "status": response.status_code,
+}))
+"""
+
+
+def run_probe(path, env, importtime=False):
+    flags = ["-X", "importtime"] if importtime else []
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *flags, "-c", STARTUP_PROBE, path], env=env, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode:
+        sys.exit(f"Startup probe failed:\n{proc.stderr}")
+    sample = json.loads(proc.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = (time.perf_counter() - started) * 1000
+    return sample, proc.stderr
+
+
+def slowest_imports(importtime_log, top=10):
+    """Прямі імпорти app з `-X importtime` за сумарним часом (мкс -> мс)."""
+    imports, children = [], []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Дочірні модулі друкуються перед батьківським: відступ 3 — діти, 1 — модуль верхнього рівня
+        depth = len(name) - len(name.lstrip())
+        if depth == 3:
+            children.append((name.strip(), round(int(cumulative) / 1000, 1)))
+        elif depth == 1:
+            if name.strip() == "app":
+                imports = children
+            children = []
+    return dict(sorted(imports, key=lambda item: -item[1])[:top])
+
+
+def measure_startup(runs, path, env):
+    """Медіани холодного старту по runs свіжих процесах (файловий кеш ОС уже теплий)."""
+    samples = [run_probe(path, env)[0] for _ in range(runs)]
+    result = {"runs": runs, "path": path, "status": samples[-1]["status"]}
+    for key in ("import_ms", "first_request_ms", "process_ms"):
+        result[key] = round(percentile(sorted(sample[key] for sample in samples), 0.5), 1)
+    result["slowest_imports_ms"] = slowest_imports(run_probe(path, env, importtime=True)[1])
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline_report = json.load(f)
+    baseline = baseline_report["scenarios"]
+    if report["scenarios"]:
+        print(f"{'scenario':32} {'p50 Δ%':>9} {'p99 Δ%':>9} {'rps Δ%':>9} {'cpu Δ%':>9}", file=sys.stderr)
+    for name, result in report["scenarios"].items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p99_ms", "throughput_rps", "cpu_ms_per_request"):
+            before, after = old.get(key), result[key]
+            deltas.append((after - before) / before * 100 if before else 0.0)
+        print(f"{name:32} " + " ".join(f"{d:+9.1f}" for d in deltas), file=sys.stderr)
+    startup, old = report.get("startup"), baseline_report.get("startup")
+    if startup and old:
+        for key in ("import_ms", "first_request_ms", "process_ms"):
+            before, after = old[key], startup[key]
+            delta = (after - before) / before * 100 if before else 0.0
+            print(f"startup {key:24} {before:>9} -> {after:>9} ms ({delta:+.1f}%)", file=sys.stderr)
+
+
+# ----------------- CLI -----------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:////tmp/music-bench.db"))
+    for entity, default in SIZES.items():
+        parser.add_argument(f"--{entity}", type=int, default=default, help=f"(за замовчуванням {default})")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=30, help="Глибина історії завантажень")
+    parser.add_argument("--no-seed", action="store_true", help="Використати вже засіяну БД (ті самі розміри)")
+    parser.add_argument("--http", metavar="URL", help="Ганяти по HTTP замість Flask test client")
+    parser.add_argument("--servers", help="Порівняти сервери (gunicorn,uvicorn): кожен запускається локально")
+    parser.add_argument("--workers", type=int, default=2, help="Воркерів на сервер для --servers")
+    parser.add_argument("--port", type=int, default=8765, help="Порт для --servers")
+    parser.add_argument("--requests", type=int, default=200, help="Запитів на сценарій")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--scenarios", help="Імена сценаріїв через кому (за замовчуванням усі)")
+    parser.add_argument("--skip-writes", action="store_true", help="Без POST-сценаріїв (БД не змінюється)")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="Увімкнути rate limiter з недосяжним лімітом, щоб виміряти лише його накладні витрати")
+    parser.add_argument("--startup", type=int, default=0, metavar="RUNS",
+                        help="Виміряти холодний старт у RUNS процесах (без --scenarios сценарії не запускаються)")
+    parser.add_argument("--startup-path", default="/api/genres", help="URL першого запиту для --startup")
+    parser.add_argument("--out", help="Файл JSON-звіту (за замовчуванням stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Показати зміни відносно попереднього звіту")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = {entity: getattr(args, entity) for entity in SIZES}
+
+    # Конфіг застосунку читається з env під час імпорту app
+    os.environ["DATABASE_URL"] = args.database_url
+    # Старт вимірюється з тим env, з яким запущено бенчмарк, без його власних налаштувань нижче
+    startup_env = dict(os.environ)
+    os.environ.setdefault("DB_STARTUP_CHECK", "0")
+    if args.rate_limit:
+        os.environ["RATE_LIMIT_ENABLED"] = "1"
+        os.environ["RATE_LIMIT_DEFAULT"] = "1000000/second"
+        os.environ["RATE_LIMITS"] = os.environ["RATE_LIMIT_EXEMPT"] = ""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app
+
+    seed_seconds = None
+    if not args.no_seed:
+        started = time.perf_counter()
+        seed_database(app, sizes, args.seed, args.days)
+        seed_seconds = round(time.perf_counter() - started, 2)
+        print(f"Seeded {sizes} in {seed_seconds}s", file=sys.stderr)
+
+    scenarios = SCENARIOS
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        unknown = wanted - {s.name for s in SCENARIOS}
+        if unknown:
+            sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in SCENARIOS if s.name in wanted]
+    if args.skip_writes:
+        scenarios = [s for s in scenarios if s.method == "GET"]
+    if args.startup and not args.scenarios:
+        scenarios = []
+
+    ctx = {"sizes": sizes, "words": make_words(args.seed), "days": args.days}
+
+    def run_all(target, label=""):
+        results = {}
+        for scenario in scenarios:
+            result = run_scenario(target, scenario, ctx, args.requests, args.concurrency, args.seed, args.warmup)
+            if isinstance(target, TestClientTarget):
+                result["peak_alloc_kb"] = peak_allocation(target, scenario, ctx, args.seed)
+            results[scenario.name] = result
+            print(f"{label}{scenario.name:32} p50={result['p50_ms']:>8}ms p99={result['p99_ms']:>8}ms "
+                  f"{result['throughput_rps']:>8} rps", file=sys.stderr)
+        return results
+
+    servers = None
+    if args.servers:
+        if not args.scenarios:
+            scenarios = [s for s in scenarios if s.name in SERVER_SCENARIOS]
+        servers = {}
+        for name in args.servers.split(","):
+            proc = start_server(name, args.port, args.workers)
+            try:
+                servers[name] = run_all(HttpTarget(f"http://127.0.0.1:{args.port}"), f"{name:9} ")
+            finally:
+                stop_server(proc)
+        results = {}
+        compare_servers(servers)
+    else:
+        results = run_all(HttpTarget(args.http) if args.http else TestClientTarget(app))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split("@")[-1],
+            "target": args.servers or args.http or "test-client",
+            "workers": args.workers if args.servers else None,
+            "sizes": sizes,
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "rate_limit": args.rate_limit,
+            "seed_seconds": seed_seconds,
+        },
+        "scenarios": results,
+        # --servers: {сервер: {сценарій: результат}}
+        "servers": servers,
+        "startup": measure_startup(args.startup, args.startup_path, startup_env) if args.startup else None,
+        # ru_maxrss — КіБ на Linux, байти на macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
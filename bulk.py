@@ -0,0 +1,427 @@
+import json
+from datetime import date, datetime
+from itertools import islice
+
+from flask import Blueprint, abort, current_app, jsonify, request
+from sqlalchemy import Date, DateTime, delete, insert, select, text, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Song, Author, Album, Genre, Label, User, UserDownload, SongAuthor
+from cache import response_cache
+from deletes import DOWNLOAD_AGGREGATES, DeletePlan, delete_mode, find_blocking, invalidate_tables, plan_tables, run_plan
+from ingest import count_downloads
+from search import search_index
+
+bulk_api = Blueprint("bulk_api", __name__)
+
+
+class Entity:
+    """
+    Опис сутності для bulk-операцій: модель/таблиця, поля та значення за замовчуванням.
+
+    `unique` — унікальна колонка, за якою після INSERT знаходяться
+    згенеровані id там, де БД не вміє RETURNING для executemany (MySQL).
+    `events` — рядки є подіями завантажень: разом з ними змінюються
+    Song.downloads_count і погодинні кошики, а оновлювати їх не можна.
+    """
+
+    def __init__(self, target, fields, required, defaults=None, unique=None, events=False):
+        self.target = target
+        self.table = target if target is SongAuthor else target.__table__
+        self.is_model = target is not SongAuthor
+        self.fields = fields
+        self.required = required
+        self.defaults = defaults or {}
+        self.unique = unique
+        self.events = events
+        self.pk = list(self.table.primary_key.columns)
+
+    def key_of(self, values):
+        return tuple(values[c.key] for c in self.pk)
+
+
+ENTITIES = {
+    "songs": Entity(Song, ["title", "price", "genre_id", "album_id"], ["title"]),
+    "authors": Entity(Author, ["name", "country", "birth_date"], ["name"]),
+    "albums": Entity(Album, ["title", "release_year", "label_id"], ["title"]),
+    "genres": Entity(Genre, ["name"], ["name"], unique="name"),
+    "labels": Entity(Label, ["name", "country"], ["name"], unique="name"),
+    "users": Entity(User, ["username", "email", "registration_date"], ["username", "email"],
+                    {"registration_date": datetime.now}, unique="username"),
+    "downloads": Entity(UserDownload, ["user_id", "song_id", "download_date"], ["user_id", "song_id"],
+                        {"download_date": datetime.now}, events=True),
+    "song-authors": Entity(SongAuthor, ["song_id", "author_id"], ["song_id", "author_id"]),
+}
+
+
+class RowError(Exception):
+    pass
+
+
+# ----------------- ВХІДНІ ДАНІ -----------------
+def read_rows():
+    """Масив JSON або NDJSON-потік (application/x-ndjson), що читається по рядку."""
+    if request.mimetype == "application/x-ndjson":
+        return (parse_line(line) for line in request.stream if line.strip())
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        abort(400, description="Body must be a JSON array or NDJSON stream")
+    return iter(data)
+
+
+def parse_line(line):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return RowError(f"Invalid JSON: {e}")
+
+
+def coerce(column, value):
+    if isinstance(value, str) and isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(value, str) and isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    return value
+
+
+def row_values(entity, row, fields, with_key=False):
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError("Row must be an object")
+    row = dict(row)
+    values = {}
+    if with_key:
+        if len(entity.pk) == 1 and "id" in row:
+            row[entity.pk[0].key] = row.pop("id")
+        for column in entity.pk:
+            if column.key not in row:
+                raise RowError(f"Missing key field '{column.key}'")
+            values[column.key] = row.pop(column.key)
+    unknown = set(row) - set(fields)
+    if unknown:
+        raise RowError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    for name in fields:
+        if name in row:
+            try:
+                values[name] = coerce(entity.table.c[name], row[name])
+            except ValueError as e:
+                raise RowError(f"Invalid value for '{name}': {e}")
+    return values
+
+
+def chunks(rows, size):
+    rows = enumerate(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def chunk_size():
+    size = request.args.get("chunk_size", current_app.config.get("BULK_CHUNK_SIZE", 1000), type=int)
+    if size is None or size < 1:
+        abort(400, description="chunk_size must be a positive integer")
+    return size
+
+
+# ----------------- ОПЕРАЦІЇ -----------------
+def bulk_create(entity, chunk):
+    # Один executemany на кожен набір полів: рядки без необов'язкових полів
+    # отримують значення за замовчуванням колонок
+    groups = {}
+    for i, values in enumerate(chunk):
+        groups.setdefault(tuple(sorted(values)), []).append(i)
+    ids = [None] * len(chunk)
+    for indexes in groups.values():
+        for i, id_ in zip(indexes, insert_rows(entity, [chunk[i] for i in indexes])):
+            ids[i] = id_
+    if entity.events:
+        count_downloads((values["song_id"], values["download_date"]) for values in chunk)
+    return ids
+
+
+def insert_rows(entity, rows):
+    """
+    Core INSERT, id повертаються в порядку рядків:
+
+    - RETURNING для executemany (SQLite, PostgreSQL);
+    - MySQL з innodb_autoinc_lock_mode 0/1 — один багаторядковий INSERT,
+      LAST_INSERT_ID() дає id першого рядка, решта йдуть підряд;
+    - інакше executemany і SELECT за `unique`, а без унікальної колонки —
+      INSERT на рядок.
+    """
+    table = entity.table
+    if not entity.is_model:
+        db.session.execute(insert(table), rows)
+        return [key_output(entity, entity.key_of(values)) for values in rows]
+    pk = entity.pk[0]
+    bind = db.session.get_bind()
+    if bind.dialect.insert_executemany_returning_sort_by_parameter_order:
+        return list(db.session.execute(insert(table).returning(pk, sort_by_parameter_order=True), rows).scalars())
+    if consecutive_autoinc(bind):
+        first = db.session.execute(insert(table).values(rows)).lastrowid
+        return list(range(first, first + len(rows)))
+    if entity.unique is None:
+        return [db.session.execute(insert(table), values).inserted_primary_key[0] for values in rows]
+    db.session.execute(insert(table), rows)
+    unique = table.c[entity.unique]
+    found = dict(db.session.execute(select(unique, pk).where(unique.in_([values[unique.key] for values in rows]))).all())
+    return [found.get(values[unique.key]) for values in rows]
+
+
+AUTOINC_LOCK_MODES = {}
+
+
+def consecutive_autoinc(engine):
+    """Чи видає InnoDB одному багаторядковому INSERT суцільний діапазон id (lock mode 0 або 1)."""
+    if engine.dialect.name != "mysql":
+        return False
+    if engine not in AUTOINC_LOCK_MODES:
+        AUTOINC_LOCK_MODES[engine] = db.session.scalar(text("SELECT @@innodb_autoinc_lock_mode"))
+    return AUTOINC_LOCK_MODES[engine] in (0, 1)
+
+
+def bulk_update(entity, chunk):
+    if not entity.is_model:
+        raise RowError("Association rows cannot be updated, delete and re-create them")
+    if entity.events:
+        raise RowError("Download events are append-only, delete and re-create them")
+    found = existing_keys(entity, [entity.key_of(values) for values in chunk])
+    missing = [i for i, values in enumerate(chunk) if entity.key_of(values) not in found]
+    if missing:
+        raise RowError("Not found", missing)
+    db.session.execute(update(entity.target), chunk)
+    return [key_output(entity, entity.key_of(values)) for values in chunk]
+
+
+def bulk_delete(entity, chunk):
+    keys = [entity.key_of(values) for values in chunk]
+    found = existing_keys(entity, keys)
+    missing = [i for i, key in enumerate(keys) if key not in found]
+    if missing:
+        raise RowError("Not found", missing)
+    condition = key_clause(entity).in_(key_values(entity, keys))
+    if not entity.is_model:
+        db.session.execute(delete(entity.table).where(condition))
+        return [key_output(entity, key) for key in keys]
+
+    # Ті самі restrict / nullify / cascade, що й DELETE /api/<entity>/<id>: похідні
+    # рядки (SongSimilar, погодинні й денні агрегати) та лічильники не лишаються осиротілими
+    plan = DeletePlan(delete_mode())
+    plan.add(entity.table, condition)
+    blocking, hint = find_blocking(plan)
+    if blocking:
+        referenced = ", ".join(f"{name} ({n})" for name, n in sorted(blocking.items()))
+        raise RowError(f"Referenced by {referenced}, use on_delete={hint}")
+    run_plan(plan, current_app.config.get("DELETE_BATCH_SIZE", 1000), {"deleted": {}, "nullified": {}})
+    return [key_output(entity, key) for key in keys]
+
+
+def key_clause(entity):
+    if len(entity.pk) == 1:
+        return entity.pk[0]
+    return tuple_(*entity.pk)
+
+
+def key_values(entity, keys):
+    """Значення для key_clause(entity).in_(): скаляри для простого ключа, кортежі для складеного."""
+    if len(entity.pk) == 1:
+        return [key[0] for key in keys]
+    return keys
+
+
+def existing_keys(entity, keys):
+    rows = db.session.execute(select(*entity.pk).where(key_clause(entity).in_(key_values(entity, keys))))
+    return {tuple(row) for row in rows}
+
+
+def key_output(entity, key):
+    return key[0] if len(key) == 1 else list(key)
+
+
+def run_bulk(name, operation):
+    """
+    Обробляє рядки пачками по chunk_size в одній транзакції.
+
+    Кожна пачка виконується одним executemany у savepoint; якщо вона
+    падає, рядки пачки повторюються поодинці, щоб повернути помилку
+    саме для винного рядка.
+    """
+    entity = ENTITIES.get(name)
+    if entity is None:
+        abort(404)
+    atomic = request.args.get("atomic", "false").lower() in ("1", "true", "yes")
+    with_key = operation is not bulk_create
+    fields = [] if operation is bulk_delete else entity.fields
+
+    results = []
+    errors = 0
+    for chunk in chunks(read_rows(), chunk_size()):
+        valid = []
+        for index, row in chunk:
+            try:
+                values = row_values(entity, row, fields, with_key)
+                if operation is bulk_create:
+                    missing = [f for f in entity.required if values.get(f) is None]
+                    if missing:
+                        raise RowError(f"Missing required fields: {', '.join(missing)}")
+                    for field, default in entity.defaults.items():
+                        values.setdefault(field, default())
+                valid.append((index, values))
+            except RowError as e:
+                results.append({"index": index, "error": str(e.args[0])})
+                errors += 1
+
+        for index, outcome in apply_chunk(entity, operation, valid):
+            if isinstance(outcome, Exception):
+                results.append({"index": index, "error": str(outcome)})
+                errors += 1
+            else:
+                results.append({"index": index, "id": outcome})
+
+    results.sort(key=lambda r: r["index"])
+    if atomic and errors:
+        db.session.rollback()
+        return jsonify({"ok": 0, "errors": errors, "results": results}), 409
+    db.session.commit()
+    response_cache.invalidate(name)
+    # Залежні кеші (charts, stats), як після DELETE /api/<entity>/<id>
+    touched = {entity.table.name}
+    if operation is bulk_delete and entity.is_model:
+        touched |= plan_tables(entity.table, delete_mode())
+    elif entity.events:
+        touched |= DOWNLOAD_AGGREGATES
+    invalidate_tables(touched)
+    if name in ("songs", "authors", "albums") or touched & {"Song", "Album"}:
+        search_index.reset()
+    return jsonify({"ok": len(results) - errors, "errors": errors, "results": results})
+
+
+def apply_chunk(entity, operation, valid):
+    if not valid:
+        return []
+    try:
+        with db.session.begin_nested():
+            ids = operation(entity, [values for _, values in valid])
+        return [(index, id_) for (index, _), id_ in zip(valid, ids)]
+    except (SQLAlchemyError, RowError):
+        pass
+
+    outcome = []
+    for index, values in valid:
+        try:
+            with db.session.begin_nested():
+                outcome.append((index, operation(entity, [values])[0]))
+        except RowError as e:
+            outcome.append((index, RowError(e.args[0])))
+        except SQLAlchemyError as e:
+            outcome.append((index, RowError(str(e.orig) if getattr(e, "orig", None) else str(e))))
+    return outcome
+
+
+# ----------------- ROUTES -----------------
+@bulk_api.route("/<entity>/bulk", methods=["POST"])
+def bulk_create_view(entity):
+    """
+    Масове створення записів
+    ---
+    tags:
+      - Bulk
+    parameters:
+      - name: entity
+        in: path
+        required: true
+        type: string
+        enum: [songs, authors, albums, genres, labels, users, downloads, song-authors]
+      - name: chunk_size
+        in: query
+        type: integer
+        description: Розмір пачки executemany (за замовчуванням BULK_CHUNK_SIZE)
+      - name: atomic
+        in: query
+        type: boolean
+        description: Відкотити все, якщо хоча б один рядок з помилкою
+      - in: body
+        name: body
+        description: Масив JSON-об'єктів або NDJSON (application/x-ndjson)
+        schema:
+          type: array
+          items: { type: object }
+    responses:
+      200:
+        description: Результат по кожному рядку (id або error)
+      409:
+        description: atomic=true і є помилки, нічого не збережено
+    """
+    return run_bulk(entity, bulk_create)
+
+
+@bulk_api.route("/<entity>/bulk", methods=["PUT"])
+def bulk_update_view(entity):
+    """
+    Масове оновлення записів за id
+    ---
+    tags:
+      - Bulk
+    parameters:
+      - name: entity
+        in: path
+        required: true
+        type: string
+        enum: [songs, authors, albums, genres, labels, users]
+      - name: chunk_size
+        in: query
+        type: integer
+      - name: atomic
+        in: query
+        type: boolean
+      - in: body
+        name: body
+        description: Об'єкти з полем id (або ключовими полями для складеного ключа)
+        schema:
+          type: array
+          items: { type: object }
+    responses:
+      200:
+        description: Результат по кожному рядку
+    """
+    return run_bulk(entity, bulk_update)
+
+
+@bulk_api.route("/<entity>/bulk", methods=["DELETE"])
+def bulk_delete_view(entity):
+    """
+    Масове видалення записів за id
+    ---
+    tags:
+      - Bulk
+    parameters:
+      - name: entity
+        in: path
+        required: true
+        type: string
+        enum: [songs, authors, albums, genres, labels, users, downloads, song-authors]
+      - name: chunk_size
+        in: query
+        type: integer
+      - name: atomic
+        in: query
+        type: boolean
+      - name: on_delete
+        in: query
+        type: string
+        enum: [restrict, nullify, cascade]
+        description: Що робити із залежними записами (за замовчуванням DELETE_DEFAULT_MODE)
+      - in: body
+        name: body
+        description: Об'єкти з полем id (або ключовими полями для складеного ключа)
+        schema:
+          type: array
+          items: { type: object }
+    responses:
+      200:
+        description: Результат по кожному рядку
+    """
+    return run_bulk(entity, bulk_delete)
@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+from werkzeug.utils import import_string
+
+
+class LRUCache:
+    """
+    In-process LRU з TTL та обмеженням кількості записів.
+
+    Той самий інтерфейс (get / set / add / delete / incr / clear) може
+    реалізувати бекенд поверх Redis-сумісного сервера, щоб кеш був
+    спільним для всіх воркерів.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """Записати, лише якщо живого ключа немає (як SET NX); True — якщо записано."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (item[1] is None or item[1] >= time.monotonic()):
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def _store(self, key, value, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value = self._data.get(key, (0, None))[0] + 1
+            self._data[key] = (value, None)
+            self._data.move_to_end(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResponseCache:
+    """
+    Read-through кеш GET-відповідей з інвалідацією на рівні сутності.
+
+    Ключ містить номер покоління сутності, тож `invalidate("genres")`
+    одним інкрементом робить недійсними всі закешовані сторінки жанрів.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.backend = None
+        self.config = {}
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("CACHE_ENABLED", True)
+        self.ttl = app.config.get("CACHE_TTL", 60)
+        backend = app.config.get("CACHE_BACKEND")
+        if backend:
+            self.backend = import_string(backend)(app.config)
+        else:
+            self.backend = LRUCache(app.config.get("CACHE_MAX_ENTRIES", 1024), self.ttl)
+        self.config = app.config
+        app.extensions["response_cache"] = self
+
+    def generation(self, entity):
+        return self.backend.get(f"gen:{entity}") or 0
+
+    def invalidate(self, *entities):
+        if self.backend is None:
+            return
+        for entity in entities:
+            self.backend.incr(f"gen:{entity}")
+            self.stats["invalidations"] += 1
+
+    def cached(self, entity, ttl_key=None):
+        """`ttl_key` — ключ конфігу з окремим TTL для цієї сутності."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Потокові відповіді не кешуються.
+                if not self.enabled or request.args.get("stream"):
+                    return view(*args, **kwargs)
+
+                key = f"{entity}:{self.generation(entity)}:{request.full_path}"
+                entry = self.backend.get(key)
+                if entry is None:
+                    self.stats["misses"] += 1
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    body = response.get_data()
+                    headers = {k: v for k, v in response.headers.items() if k in ("X-Next-Cursor", "Link")}
+                    entry = (body, response.mimetype, headers, hashlib.sha1(body).hexdigest())
+                    ttl = self.config.get(ttl_key, self.ttl) if ttl_key else self.ttl
+                    self.backend.set(key, entry, ttl)
+                else:
+                    self.stats["hits"] += 1
+
+                body, mimetype, headers, etag = entry
+                response = Response(body, mimetype=mimetype, headers=headers)
+                response.set_etag(etag)
+                response.make_conditional(request)
+                if response.status_code == 304:
+                    self.stats["not_modified"] += 1
+                return response
+            return wrapper
+        return decorator
+
+    def metrics(self):
+        stats = dict(self.stats)
+        stats["enabled"] = self.enabled
+        stats["entries"] = len(self.backend) if self.backend is not None else 0
+        return stats
+
+
+response_cache = ResponseCache()
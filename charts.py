@@ -0,0 +1,182 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import Blueprint, abort, current_app, jsonify
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Song, SongDownloadHourly
+from cache import response_cache
+from pagination import query_arg
+
+charts_api = Blueprint("charts_api", __name__)
+
+
+# ----------------- АГРЕГАТИ -----------------
+def hour_bucket(when):
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def hourly_upsert(dialect):
+    """
+    INSERT ... ON DUPLICATE KEY / ON CONFLICT, що додає downloads до
+    існуючого кошика; None — нативного upsert немає (див. upsert_hourly_rows).
+    """
+    table = SongDownloadHourly.__table__
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(downloads=table.c.downloads + stmt.inserted.downloads)
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.song_id, table.c.bucket],
+            set_={"downloads": table.c.downloads + stmt.excluded.downloads},
+        )
+    return None
+
+
+def hourly_increment():
+    table = SongDownloadHourly.__table__
+    return (
+        update(table)
+        .where(table.c.song_id == bindparam("b_song_id"), table.c.bucket == bindparam("b_bucket"))
+        .values(downloads=table.c.downloads + bindparam("b_downloads"))
+    )
+
+
+def increment_params(rows, sign=1):
+    return [{"b_song_id": row["song_id"], "b_bucket": row["bucket"], "b_downloads": sign * row["downloads"]}
+            for row in rows]
+
+
+def upsert_hourly_rows(session, rows):
+    """
+    Переносимий upsert для БД без нативного: UPDATE кошика, а якщо його
+    ще немає — INSERT у savepoint; паралельний INSERT того ж кошика
+    дає IntegrityError, після якого UPDATE повторюється.
+    """
+    increment = hourly_increment()
+    for row, params in zip(rows, increment_params(rows)):
+        if session.execute(increment, params).rowcount:
+            continue
+        try:
+            with session.begin_nested():
+                session.execute(insert(SongDownloadHourly.__table__), row)
+        except IntegrityError:
+            session.execute(increment, params)
+
+
+def hourly_rows(events):
+    deltas = Counter((song_id, hour_bucket(when)) for song_id, when in events)
+    return [{"song_id": song_id, "bucket": bucket, "downloads": n} for (song_id, bucket), n in deltas.items()]
+
+
+def record_downloads(events):
+    """
+    Додає події `(song_id, download_date)` до погодинних кошиків одним
+    upsert-ом (executemany) у поточній транзакції.
+    """
+    apply_hourly(hourly_rows(events))
+
+
+def apply_hourly(rows, sign=1):
+    """Додати (sign=1) або відняти (sign=-1) рядки hourly_rows у кошиках."""
+    if not rows:
+        return
+    if sign < 0:
+        db.session.execute(hourly_increment(), increment_params(rows, sign))
+        return
+    upsert = hourly_upsert(db.session.get_bind().dialect.name)
+    if upsert is not None:
+        db.session.execute(upsert, rows)
+    else:
+        upsert_hourly_rows(db.session, rows)
+
+
+# ----------------- ROUTES -----------------
+def chart_limit():
+    limit = query_arg("limit", int, 10)
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    return min(limit, current_app.config.get("CHARTS_MAX_LIMIT", 100))
+
+
+@charts_api.route("/charts/top", methods=["GET"])
+@response_cache.cached("charts", ttl_key="CHARTS_CACHE_TTL")
+def get_top_chart():
+    """
+    Топ пісень за кількістю завантажень за весь час
+    ---
+    tags:
+      - Charts
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        default: 10
+      - name: genre_id
+        in: query
+        type: integer
+    responses:
+      200:
+        description: Пісні за спаданням downloads_count
+    """
+    stmt = select(Song.song_id, Song.title, Song.downloads_count)
+    genre_id = query_arg("genre_id", int)
+    if genre_id is not None:
+        stmt = stmt.where(Song.genre_id == genre_id)
+    stmt = stmt.order_by(Song.downloads_count.desc(), Song.song_id.desc()).limit(chart_limit())
+    return jsonify([
+        {"id": song_id, "title": title, "downloads": downloads}
+        for song_id, title, downloads in db.session.execute(stmt)
+    ])
+
+
+@charts_api.route("/charts/trending", methods=["GET"])
+@response_cache.cached("charts", ttl_key="CHARTS_CACHE_TTL")
+def get_trending_chart():
+    """
+    Пісні, які найчастіше завантажували за останні N годин
+    ---
+    tags:
+      - Charts
+    parameters:
+      - name: hours
+        in: query
+        type: integer
+        default: 24
+        description: Ширина ковзного вікна в годинах
+      - name: limit
+        in: query
+        type: integer
+        default: 10
+      - name: genre_id
+        in: query
+        type: integer
+    responses:
+      200:
+        description: Пісні за кількістю завантажень у вікні
+    """
+    hours = query_arg("hours", int, 24)
+    if not 1 <= hours <= current_app.config.get("CHARTS_MAX_HOURS", 24 * 30):
+        abort(400, description="hours is out of range")
+    since = hour_bucket(datetime.now()) - timedelta(hours=hours - 1)
+
+    # Рахується по погодинних кошиках, а не по сирих подіях UserDownload
+    total = func.sum(SongDownloadHourly.downloads).label("window_downloads")
+    stmt = (
+        select(SongDownloadHourly.song_id, Song.title, total)
+        .join(Song, Song.song_id == SongDownloadHourly.song_id)
+        .where(SongDownloadHourly.bucket >= since)
+        .group_by(SongDownloadHourly.song_id, Song.title)
+        .order_by(total.desc(), SongDownloadHourly.song_id.desc())
+        .limit(chart_limit())
+    )
+    genre_id = query_arg("genre_id", int)
+    if genre_id is not None:
+        stmt = stmt.where(Song.genre_id == genre_id)
+    return jsonify([
+        {"id": song_id, "title": title, "downloads": int(downloads)}
+        for song_id, title, downloads in db.session.execute(stmt)
+    ])
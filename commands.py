@@ -0,0 +1,115 @@
+import json
+import time
+from datetime import datetime
+
+import click
+
+from models import db
+from maintenance import migrate_downloads, reconcile_download_counts
+from export import FORMATS, INCLUDE_COLUMNS, export_batches, export_chunks, export_columns
+from similar import SimilarityModel, run_worker
+from openapi import export_spec, spec_path
+from stats import refresh_daily_stats
+
+
+def register_commands(app):
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Створити відсутні таблиці та індекси (раніше робилось при кожному старті)."""
+        db.create_all()
+        click.echo("Database schema is up to date")
+
+    @app.cli.group("downloads")
+    def downloads_cli():
+        """Обслуговування журналу завантажень."""
+
+    @downloads_cli.command("migrate")
+    def migrate_command():
+        """Перевести UserDownload зі складеного ключа на download_id."""
+        copied = migrate_downloads()
+        click.echo(f"Migrated {copied} download rows")
+
+    @downloads_cli.command("reconcile")
+    @click.option("--batch-size", default=1000, show_default=True, help="Пісень на одну пачку.")
+    @click.option("--fix", is_flag=True, help="Перерахувати розбіжні Song.downloads_count.")
+    def reconcile_command(batch_size, fix):
+        """Звірити Song.downloads_count з подіями UserDownload."""
+        report = reconcile_download_counts(batch_size=batch_size, fix=fix)
+        click.echo(json.dumps(report, indent=2))
+
+    @downloads_cli.command("export")
+    @click.option("--format", "fmt", type=click.Choice(list(FORMATS)), default="csv", show_default=True)
+    @click.option("--from", "start", type=click.DateTime(), help="Початок діапазону download_date, включно.")
+    @click.option("--to", "end", type=click.DateTime(), help="Кінець діапазону download_date, не включно.")
+    @click.option("--include", type=click.Choice(list(INCLUDE_COLUMNS)), multiple=True,
+                  help="Додаткові колонки (можна кілька разів).")
+    @click.option("--chunk-size", default=10000, show_default=True, help="Рядків на одну пачку.")
+    @click.argument("output", type=click.File("wb"))
+    def export_command(fmt, start, end, include, chunk_size, output):
+        """Вивантажити завантаження у файл OUTPUT ("-" — stdout)."""
+        columns = export_columns(set(include))
+        started = datetime.now()
+        written = 0
+        for chunk in export_chunks(fmt, columns, export_batches(columns, start, end, chunk_size)):
+            output.write(chunk)
+            written += len(chunk)
+        elapsed = (datetime.now() - started).total_seconds()
+        click.echo(f"Exported {written} bytes in {elapsed:.1f}s", err=True)
+
+    @app.cli.group("similar")
+    def similar_cli():
+        """Модель схожих пісень за спільними завантаженнями (потрібні numpy і scipy)."""
+
+    @similar_cli.command("refresh")
+    def similar_refresh_command():
+        """Повністю перерахувати сусідів усіх пісень."""
+        started = datetime.now()
+        try:
+            updated = SimilarityModel(app).refresh(full=True)
+        except RuntimeError as exc:
+            raise click.ClickException(str(exc))
+        elapsed = (datetime.now() - started).total_seconds()
+        click.echo(f"Similar songs computed for {updated} songs in {elapsed:.1f}s")
+
+    @similar_cli.command("worker")
+    @click.option("--interval", default=app.config.get("SIMILAR_REFRESH_SECONDS", 300), show_default=True,
+                  help="Секунд між інкрементальними перерахунками.")
+    def similar_worker_command(interval):
+        """Фоновий процес: тримає матрицю в пам'яті й дораховує нові завантаження."""
+        try:
+            run_worker(app, interval, full=True)
+        except RuntimeError as exc:
+            raise click.ClickException(str(exc))
+
+    @app.cli.group("openapi")
+    def openapi_cli():
+        """Специфікація OpenAPI для SWAGGER_MODE=static."""
+
+    @openapi_cli.command("export")
+    @click.argument("output", required=False)
+    def openapi_export_command(output):
+        """Зібрати специфікацію з docstring-ів у OUTPUT (за замовчуванням OPENAPI_SPEC_FILE)."""
+        output = output or spec_path(app)
+        with open(output, "w", encoding="utf-8") as f:
+            export_spec(app, f)
+        click.echo(f"OpenAPI spec written to {output}")
+
+    @app.cli.group("stats")
+    def stats_cli():
+        """Матеріалізовані денні підсумки для /api/stats."""
+
+    @stats_cli.command("refresh")
+    @click.option("--full", is_flag=True, help="Перерахувати всі дні з нуля.")
+    @click.option("--interval", type=int, help="Повторювати кожні INTERVAL секунд (фоновий процес замість cron).")
+    def stats_refresh_command(full, interval):
+        """Дорахувати дні з новими завантаженнями."""
+        while True:
+            started = datetime.now()
+            days = refresh_daily_stats(full=full)
+            db.session.remove()
+            elapsed = (datetime.now() - started).total_seconds()
+            click.echo(f"Refreshed {len(days)} days in {elapsed:.1f}s")
+            if not interval:
+                return
+            full = False
+            time.sleep(interval)
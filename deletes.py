@@ -0,0 +1,220 @@
+from flask import abort, current_app, jsonify, make_response, request
+from sqlalchemy import delete, func, select, true, tuple_, update
+
+from models import db, Album, Song, SongAuthor, SongDownloadDaily, SongDownloadHourly, SongSimilar, UserDownload
+from cache import response_cache
+from search import search_index
+from ingest import count_downloads
+from stats import uncount_daily
+
+MODES = ("restrict", "nullify", "cascade")
+
+
+class Relation:
+    """
+    Дочірня таблиця, що посилається на батьківську через `column`.
+
+    `link` — рядки зв'язку або похідні агрегати (SongAuthor,
+    SongDownloadHourly): без батька вони не мають сенсу і видаляються
+    разом з ним за будь-якого режиму. Решта — самостійні записи, до яких
+    застосовується restrict / nullify / cascade.
+    """
+
+    def __init__(self, table, column, link=False):
+        self.table = table
+        self.column = column
+        self.link = link
+
+
+RELATIONS = {
+    "Label": [Relation(Album.__table__, Album.label_id)],
+    "Album": [Relation(Song.__table__, Song.album_id)],
+    "Genre": [Relation(Song.__table__, Song.genre_id)],
+    "Song": [
+        Relation(SongAuthor, SongAuthor.c.song_id, link=True),
+        Relation(SongDownloadHourly.__table__, SongDownloadHourly.song_id, link=True),
+        Relation(SongDownloadDaily.__table__, SongDownloadDaily.song_id, link=True),
+        Relation(SongSimilar.__table__, SongSimilar.song_id, link=True),
+        Relation(SongSimilar.__table__, SongSimilar.similar_song_id, link=True),
+        Relation(UserDownload.__table__, UserDownload.song_id),
+    ],
+    "Author": [Relation(SongAuthor, SongAuthor.c.author_id, link=True)],
+    "User": [Relation(UserDownload.__table__, UserDownload.user_id)],
+}
+
+# Які закешовані відповіді застаріють після видалення рядків таблиці
+CACHE_ENTITIES = {
+    "Label": "labels",
+    "Album": "albums",
+    "Genre": "genres",
+    "Author": "authors",
+    "Song": "charts",
+    "UserDownload": "charts",
+    "SongDownloadHourly": "charts",
+    "SongDownloadDaily": "stats",
+}
+
+# Що ще змінюється разом із записом або видаленням подій UserDownload
+DOWNLOAD_AGGREGATES = {"Song", "SongDownloadHourly", "SongDownloadDaily"}
+
+
+class DeletePlan:
+    """
+    Кроки видалення у порядку виконання (спершу нащадки) та конфлікти.
+
+    Кожен крок — умова WHERE над однією таблицею, виражена вкладеними
+    підзапитами до предків, тож ні план, ні dry-run не завантажують
+    дочірніх рядків.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.steps = []
+        self.conflicts = []
+
+    def add(self, table, condition):
+        parent_key = list(table.primary_key.columns)[0]
+        for rel in RELATIONS.get(table.name, ()):
+            child = rel.column.in_(select(parent_key).where(condition))
+            if rel.link:
+                self.steps.append(("delete", rel.table, child, None))
+            elif self.mode == "cascade":
+                self.add(rel.table, child)
+            elif self.mode == "nullify" and rel.column.nullable:
+                self.steps.append(("nullify", rel.table, child, rel.column))
+            else:
+                self.conflicts.append((rel, child))
+        if table is UserDownload.__table__:
+            # Лічильники пісень і денні підсумки мають збігатися з журналом подій (див. flask downloads reconcile)
+            self.steps.append(("uncount", table, condition, None))
+        self.steps.append(("delete", table, condition, None))
+
+
+def count_rows(table, condition):
+    return db.session.scalar(select(func.count()).select_from(table).where(condition))
+
+
+def run_step(op, table, condition, column, batch):
+    """Пачками по batch ключів: SELECT ключів ... LIMIT, потім DELETE / UPDATE ... WHERE ключ IN."""
+    if op == "uncount":
+        return uncount_downloads(condition, batch)
+    pk = list(table.primary_key.columns)
+    key = pk[0] if len(pk) == 1 else tuple_(*pk)
+    total = 0
+    while True:
+        rows = db.session.execute(select(*pk).where(condition).limit(batch)).all()
+        if not rows:
+            break
+        keys = [row[0] for row in rows] if len(pk) == 1 else [tuple(row) for row in rows]
+        if op == "delete":
+            stmt = delete(table).where(key.in_(keys))
+        else:
+            stmt = update(table).where(key.in_(keys)).values({column.key: None})
+        total += db.session.execute(stmt).rowcount
+        if len(rows) < batch:
+            break
+    return total
+
+
+def uncount_downloads(condition, batch):
+    events = db.session.execute(
+        select(UserDownload.song_id, UserDownload.download_date).where(condition).execution_options(yield_per=batch)
+    )
+    count_downloads(events, sign=-1)
+    uncount_daily(condition)
+
+
+def delete_mode():
+    mode = request.args.get("on_delete", current_app.config.get("DELETE_DEFAULT_MODE", "restrict"))
+    if mode not in MODES:
+        abort(400, description="on_delete must be restrict, nullify or cascade")
+    return mode
+
+
+def find_blocking(plan):
+    """
+    Скільки самостійних записів блокує видалення ({таблиця: n}) і
+    підказка: nullify має сенс, лише якщо всі блокуючі посилання nullable.
+    """
+    blocking = {}
+    nullable = True
+    for rel, condition in plan.conflicts:
+        n = count_rows(rel.table, condition)
+        if n:
+            blocking[rel.table.name] = blocking.get(rel.table.name, 0) + n
+            nullable = nullable and rel.column.nullable
+    hint = "nullify or cascade" if plan.mode == "restrict" and nullable else "cascade"
+    return blocking, hint
+
+
+def run_plan(plan, batch, report):
+    """Виконати кроки плану, додаючи кількості рядків до report["deleted"] / ["nullified"]."""
+    for op, table, condition, column in plan.steps:
+        n = run_step(op, table, condition, column, batch)
+        if op == "uncount" or not n:
+            continue
+        target = report["deleted" if op == "delete" else "nullified"]
+        target[table.name] = target.get(table.name, 0) + n
+    return report
+
+
+def plan_tables(table, mode):
+    """Усі таблиці, яких може торкнутись видалення рядків `table` у режимі mode."""
+    plan = DeletePlan(mode)
+    plan.add(table, true())
+    tables = {step_table.name for _, step_table, _, _ in plan.steps}
+    if any(op == "uncount" for op, _, _, _ in plan.steps):
+        tables |= DOWNLOAD_AGGREGATES
+    return tables
+
+
+def invalidate_tables(tables):
+    response_cache.invalidate(*{CACHE_ENTITIES[name] for name in tables if name in CACHE_ENTITIES})
+
+
+def delete_with_dependents(model, id_):
+    """
+    Видалити рядок `model` з первинним ключем id_ за режимом з ?on_delete=:
+
+    - restrict — 409, якщо на рядок посилаються самостійні записи;
+    - nullify — обнулити nullable-посилання (Album.label_id, Song.album_id,
+      Song.genre_id); обов'язкові посилання (UserDownload) дають 409;
+    - cascade — видалити всі залежні записи.
+
+    ?dry_run=true лише рахує рядки, яких торкнеться видалення. Усе
+    виконується set-based запитами пачками по DELETE_BATCH_SIZE в одній
+    транзакції.
+    """
+    mode = delete_mode()
+    dry_run = request.args.get("dry_run", "false").lower() in ("1", "true", "yes")
+    batch = current_app.config.get("DELETE_BATCH_SIZE", 1000)
+
+    table = model.__table__
+    plan = DeletePlan(mode)
+    plan.add(table, list(table.primary_key.columns)[0] == id_)
+
+    blocking, hint = find_blocking(plan)
+    if blocking and not dry_run:
+        abort(make_response(jsonify({
+            "message": f"{table.name} {id_} is referenced, use on_delete={hint}",
+            "dependents": blocking,
+        }), 409))
+
+    report = {"mode": mode, "dry_run": dry_run, "deleted": {}, "nullified": {}}
+    if dry_run:
+        report["dependents"] = blocking
+        for op, step_table, condition, column in plan.steps:
+            n = count_rows(step_table, condition) if op != "uncount" else 0
+            if n:
+                target = report["deleted" if op == "delete" else "nullified"]
+                target[step_table.name] = target.get(step_table.name, 0) + n
+        return report
+    run_plan(plan, batch, report)
+    db.session.commit()
+
+    invalidate_tables(set(report["deleted"]) | set(report["nullified"]))
+    # Сам рядок прибирає з пошуку обробник; каскадом видалені пісні / альбоми — повна перебудова
+    cascaded = sum(n for name, n in report["deleted"].items() if name in ("Song", "Album"))
+    if cascaded > (1 if table.name in ("Song", "Album") else 0):
+        search_index.reset()
+    return report
@@ -0,0 +1,229 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+from sqlalchemy import select
+
+from models import db, Genre, Song, UserDownload
+from pagination import after_keyset, query_arg
+
+export_api = Blueprint("export_api", __name__)
+
+FORMATS = {
+    "csv": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Колонка експорту -> (вираз, тип Arrow)
+BASE_COLUMNS = {
+    "download_id": (UserDownload.download_id, "int64"),
+    "user_id": (UserDownload.user_id, "int64"),
+    "song_id": (UserDownload.song_id, "int64"),
+    "download_date": (UserDownload.download_date, "timestamp"),
+}
+INCLUDE_COLUMNS = {
+    "song": {
+        "song_title": (Song.title, "string"),
+        "price": (Song.price, "decimal"),
+        "album_id": (Song.album_id, "int64"),
+    },
+    "genre": {
+        "genre_id": (Song.genre_id, "int64"),
+        "genre": (Genre.name, "string"),
+    },
+}
+
+
+def export_columns(include):
+    columns = dict(BASE_COLUMNS)
+    for name in ("song", "genre"):
+        if name in include:
+            columns.update(INCLUDE_COLUMNS[name])
+    return columns
+
+
+def export_batches(columns, start=None, end=None, chunk_size=10000):
+    """
+    Рядки завантажень пачками по chunk_size у порядку (download_date, download_id).
+
+    Кожна пачка — окремий keyset-запит по ix_userdownload_date, тож пам'ять
+    обмежена однією пачкою незалежно від драйвера і транзакція не тримається
+    відкритою на весь експорт.
+    """
+    keys = [UserDownload.download_date, UserDownload.download_id]
+    stmt = select(*(expr for expr, _ in columns.values()), *keys)
+    if "song_title" in columns or "genre_id" in columns:
+        stmt = stmt.join(Song, Song.song_id == UserDownload.song_id)
+    if "genre" in columns:
+        stmt = stmt.outerjoin(Genre, Genre.genre_id == Song.genre_id)
+    if start is not None:
+        stmt = stmt.where(UserDownload.download_date >= start)
+    if end is not None:
+        stmt = stmt.where(UserDownload.download_date < end)
+    stmt = stmt.order_by(*keys).limit(chunk_size)
+
+    width = len(columns)
+    last = None
+    while True:
+        page = stmt if last is None else after_keyset(stmt, keys, last)
+        rows = db.session.execute(page).all()
+        if not rows:
+            return
+        yield [row[:width] for row in rows]
+        if len(rows) < chunk_size:
+            return
+        last = list(rows[-1][width:])
+
+
+# ----------------- ФОРМАТИ -----------------
+def csv_gzip_chunks(columns, batches):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip-обгортка
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        data = compressor.compress(buffer.getvalue().encode())
+        buffer.seek(0)
+        buffer.truncate()
+        if data:
+            yield data
+    yield compressor.compress(buffer.getvalue().encode()) + compressor.flush()
+
+
+class ChunkSink:
+    """Файлоподібний приймач для ParquetWriter: записане забирається після кожної групи рядків."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def load_pyarrow():
+    """(pyarrow, pyarrow.parquet) або (None, None); імпорт (~0.1 с) — при першому Parquet, а не на старті."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # необов'язкова залежність: без неї доступний лише CSV
+        return None, None
+    return pa, pq
+
+
+def arrow_schema(columns):
+    pa, _ = load_pyarrow()
+    types = {
+        "int64": pa.int64(),
+        "timestamp": pa.timestamp("us"),
+        "string": pa.string(),
+        "decimal": pa.decimal128(6, 2),
+    }
+    return pa.schema([(name, types[kind]) for name, (_, kind) in columns.items()])
+
+
+def parquet_chunks(columns, batches):
+    """Кожна пачка — окрема група рядків Parquet (zstd)."""
+    pa, pq = load_pyarrow()
+    schema = arrow_schema(columns)
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    try:
+        for batch in batches:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_chunks(fmt, columns, batches):
+    if fmt == "parquet":
+        if load_pyarrow()[1] is None:
+            raise RuntimeError("Parquet export requires pyarrow")
+        return parquet_chunks(columns, batches)
+    return csv_gzip_chunks(columns, batches)
+
+
+# ----------------- ROUTES -----------------
+def parse_include(raw):
+    include = {i for i in (raw or "").split(",") if i}
+    unknown = include - set(INCLUDE_COLUMNS)
+    if unknown:
+        abort(400, description=f"Unknown include: {', '.join(sorted(unknown))}")
+    return include
+
+
+@export_api.route("/downloads/export", methods=["GET"])
+def export_downloads():
+    """
+    Вивантаження завантажень для аналітики (gzip CSV або Parquet)
+    ---
+    tags:
+      - Downloads
+    parameters:
+      - name: format
+        in: query
+        type: string
+        enum: [csv, parquet]
+        default: csv
+        description: csv — CSV у gzip; parquet потребує pyarrow
+      - name: from
+        in: query
+        type: string
+        description: Початок діапазону download_date (ISO 8601), включно
+      - name: to
+        in: query
+        type: string
+        description: Кінець діапазону download_date (ISO 8601), не включно
+      - name: include
+        in: query
+        type: string
+        description: Додаткові колонки через кому (song, genre)
+    responses:
+      200:
+        description: Файл, що віддається потоком пачками по EXPORT_CHUNK_SIZE рядків
+      400:
+        description: Некоректні параметри або формат недоступний
+    """
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        abort(400, description="format must be 'csv' or 'parquet'")
+    if fmt == "parquet" and load_pyarrow()[1] is None:
+        abort(400, description="Parquet export is not available, install pyarrow")
+    start = query_arg("from", datetime.fromisoformat)
+    end = query_arg("to", datetime.fromisoformat)
+    columns = export_columns(parse_include(request.args.get("include")))
+    chunk_size = current_app.config.get("EXPORT_CHUNK_SIZE", 10000)
+
+    mimetype, extension = FORMATS[fmt]
+    suffix = "".join(f"_{d:%Y%m%d}" for d in (start, end) if d)
+    batches = export_batches(columns, start, end, chunk_size)
+    return Response(
+        stream_with_context(export_chunks(fmt, columns, batches)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=downloads{suffix}.{extension}"},
+    )
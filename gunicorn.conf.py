@@ -0,0 +1,53 @@
+#gunicorn.conf.py
+"""
+Продакшн-запуск: gunicorn -c gunicorn.conf.py
+
+Застосунок імпортується один раз у майстрі (preload_app) і успадковується
+воркерами через fork, тож старт воркера — це лише fork. Успадковані
+з'єднання пулу скидаються в post_fork, щоб воркери не ділили сокети.
+
+Перезавантаження без простою:
+  kill -HUP <master>              — нові воркери з новою конфігурацією, старі
+                                    дообслуговують запити (graceful_timeout);
+  kill -USR2 <master>, потім -WINCH/-QUIT старому майстру
+                                  — оновлення коду: з preload_app код
+                                    перечитується лише новим майстром.
+Схема БД не створюється при старті: flask --app app init-db.
+Для швидкого холодного старту контейнера: під час збірки образу
+flask --app app openapi export, у рантаймі LAZY_STARTUP=1.
+"""
+import multiprocessing
+import os
+
+wsgi_app = "app:app"
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+preload_app = True
+
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("WEB_KEEPALIVE", 5))
+# Періодичний перезапуск воркерів проти накопичення пам'яті
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 1000))
+
+accesslog = os.environ.get("WEB_ACCESS_LOG", "-")
+
+
+def post_fork(server, worker):
+    from app import app
+    from models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    from ingest import download_buffer
+
+    # Дописати write-behind чергу завантажень до виходу воркера
+    if download_buffer.enabled:
+        download_buffer.shutdown()
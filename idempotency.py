@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from functools import wraps
+
+from flask import Response, abort, make_response, request
+from werkzeug.utils import import_string
+
+from cache import LRUCache
+
+IN_PROGRESS = "in-progress"
+DONE = "done"
+
+
+class IdempotencyStore:
+    """
+    Підтримка заголовка Idempotency-Key для POST-обробників.
+
+    Відповідь на перший запит з ключем зберігається (IDEMPOTENCY_TTL,
+    не більше IDEMPOTENCY_MAX_ENTRIES записів), і повтор з тим самим
+    ключем отримує її без звернення до БД. Одночасні дублікати в одному
+    процесі чекають на результат першого; між воркерами ключ займається
+    маркером через `add` бекенда, і дублікат, що прийшов під час
+    виконання, отримує 409 з Retry-After.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get("IDEMPOTENCY_TTL", 24 * 3600)
+        self.lock_seconds = app.config.get("IDEMPOTENCY_LOCK_SECONDS", 30)
+        backend = app.config.get("IDEMPOTENCY_BACKEND")
+        if backend:
+            self.backend = import_string(backend)(app.config)
+        else:
+            self.backend = LRUCache(app.config.get("IDEMPOTENCY_MAX_ENTRIES", 10000), self.ttl)
+        app.extensions["idempotency"] = self
+
+    def idempotent(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get("Idempotency-Key")
+            if not key or self.backend is None:
+                return view(*args, **kwargs)
+            if len(key) > 255:
+                abort(400, description="Idempotency-Key is too long")
+            key = f"idem:{request.endpoint}:{key}"
+            fingerprint = hashlib.sha1(request.get_data()).hexdigest()
+
+            entry = self.backend.get(key)
+            if entry is not None and entry[0] == DONE:
+                return self._replay(entry, fingerprint)
+
+            with self._lock:
+                event = self._inflight.get(key)
+                owner = event is None
+                if owner:
+                    event = self._inflight[key] = threading.Event()
+            if not owner:
+                # Дублікат у цьому ж процесі — чекаємо на результат першого запиту
+                event.wait(self.lock_seconds)
+                return self._replay(self.backend.get(key), fingerprint)
+
+            try:
+                if not self.backend.add(key, (IN_PROGRESS, fingerprint), self.lock_seconds):
+                    return self._replay(self.backend.get(key), fingerprint)
+                return self._execute(key, fingerprint, view, args, kwargs)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+        return wrapper
+
+    def _execute(self, key, fingerprint, view, args, kwargs):
+        stored = False
+        try:
+            response = make_response(view(*args, **kwargs))
+            # 5xx (напр. 503 від переповненої черги) — тимчасові, їх клієнт має повторити
+            if response.status_code < 500 and not response.is_streamed:
+                headers = {k: v for k, v in response.headers.items() if k not in ("Content-Length", "Set-Cookie")}
+                entry = (DONE, fingerprint, response.status_code, response.get_data(), response.mimetype, headers)
+                self.backend.set(key, entry, self.ttl)
+                stored = True
+            return response
+        finally:
+            if not stored:
+                self.backend.delete(key)
+
+    def _replay(self, entry, fingerprint):
+        if entry is None or entry[0] != DONE:
+            if entry is not None and entry[1] != fingerprint:
+                abort(422, description="Idempotency-Key was used with a different request body")
+            response = make_response({"message": "A request with this Idempotency-Key is in progress"}, 409)
+            response.headers["Retry-After"] = "1"
+            return response
+        _, stored_fingerprint, status, body, mimetype, headers = entry
+        if stored_fingerprint != fingerprint:
+            abort(422, description="Idempotency-Key was used with a different request body")
+        response = Response(body, status, headers, mimetype=mimetype)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+
+idempotency = IdempotencyStore()
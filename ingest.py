@@ -0,0 +1,250 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from models import db, Song, UserDownload
+from charts import apply_hourly, hourly_rows
+
+log = logging.getLogger(__name__)
+
+
+class DownloadBuffer:
+    """
+    Write-behind буфер подій завантаження.
+
+    POST /api/downloads кладе подію в обмежену чергу, а фоновий потік
+    пачками пише багаторядкові INSERT у UserDownload та агреговані
+    прирости Song.downloads_count — кожні DOWNLOADS_FLUSH_INTERVAL_MS
+    або DOWNLOADS_BATCH_SIZE подій, що настане раніше.
+
+    Пачка, що впала на помилці БД (розрив з'єднання, failover RDS),
+    повторюється з експоненційною затримкою, а після
+    DOWNLOADS_RETRY_ATTEMPTS спроб повертається в чергу. Відкидаються
+    лише рядки, що не проходять перевірку цілісності.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "flushed": 0,
+            "dropped": 0,
+            "retries": 0,
+            "requeued": 0,
+            "batches": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("DOWNLOADS_WRITE_BEHIND", False)
+        self.batch_size = app.config.get("DOWNLOADS_BATCH_SIZE", 500)
+        self.interval = app.config.get("DOWNLOADS_FLUSH_INTERVAL_MS", 200) / 1000
+        self.put_timeout = app.config.get("DOWNLOADS_ENQUEUE_TIMEOUT_MS", 50) / 1000
+        self.retry_attempts = app.config.get("DOWNLOADS_RETRY_ATTEMPTS", 5)
+        self.retry_backoff = app.config.get("DOWNLOADS_RETRY_BACKOFF_MS", 100) / 1000
+        self.queue = queue.Queue(maxsize=app.config.get("DOWNLOADS_QUEUE_SIZE", 10000))
+        app.extensions["download_buffer"] = self
+        if self.enabled:
+            atexit.register(self.shutdown)
+
+    # ----------------- ПРИЙОМ -----------------
+    def submit(self, user_id, song_id, download_date):
+        """Повертає False, якщо черга переповнена (backpressure)."""
+        self._ensure_worker()
+        try:
+            self.queue.put((user_id, song_id, download_date), timeout=self.put_timeout)
+        except queue.Full:
+            self.stats["rejected"] += 1
+            return False
+        self.stats["accepted"] += 1
+        return True
+
+    def _ensure_worker(self):
+        # Потік стартує ліниво і перезапускається після fork у воркері.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="download-flusher", daemon=True)
+                self._thread.start()
+
+    # ----------------- ЗАПИС -----------------
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain()
+            if batch:
+                self._write(batch)
+
+    def _drain(self):
+        batch = []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        """Синхронно записати все, що лишилось у черзі."""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch, requeue=False)
+                batch = []
+        if batch:
+            self._write(batch, requeue=False)
+
+    def shutdown(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    def _write(self, batch, requeue=True):
+        started = time.perf_counter()
+        written = self._write_with_retry(batch)
+        if written is None and requeue:
+            # Втрачене при поверненні в чергу рахує _requeue
+            self._requeue(batch)
+            batch = written = []
+        elif written is None:
+            written = []
+
+        elapsed = (time.perf_counter() - started) * 1000
+        stats = self.stats
+        stats["batches"] += 1
+        stats["flushed"] += len(written)
+        stats["dropped"] += len(batch) - len(written)
+        stats["last_flush_ms"] = elapsed
+        stats["max_flush_ms"] = max(stats["max_flush_ms"], elapsed)
+        stats["total_flush_ms"] += elapsed
+
+    def _write_with_retry(self, batch):
+        """Записані рядки або None, якщо БД недоступна після всіх спроб."""
+        delay = self.retry_backoff
+        for attempt in range(1, self.retry_attempts + 1):
+            with self.app.app_context():
+                try:
+                    return self._write_rows(batch)
+                except Exception as e:
+                    db.session.rollback()
+                    if not isinstance(e, DBAPIError) or isinstance(e, IntegrityError):
+                        log.exception("Download batch of %d events failed", len(batch))
+                        return []
+                    # Транзакція відкочена цілком, тож повтор не задвоює події
+                    log.warning("Download batch of %d events failed (attempt %d/%d)",
+                                len(batch), attempt, self.retry_attempts, exc_info=True)
+                finally:
+                    db.session.remove()
+            if attempt < self.retry_attempts:
+                self.stats["retries"] += 1
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+        return None
+
+    def _requeue(self, batch):
+        """Повернути пачку в чергу для наступного циклу; що не влізло — відкидається."""
+        for i, event in enumerate(batch):
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                log.error("Download queue is full, dropping %d events", len(batch) - i)
+                self.stats["dropped"] += len(batch) - i
+                return
+            self.stats["requeued"] += 1
+
+    def _write_rows(self, batch):
+        song_ids = {song_id for _, song_id, _ in batch}
+        known = set(db.session.execute(select(Song.song_id).where(Song.song_id.in_(song_ids))).scalars())
+        rows = [
+            {"user_id": user_id, "song_id": song_id, "download_date": date}
+            for user_id, song_id, date in batch if song_id in known
+        ]
+        if not rows:
+            return rows
+
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(UserDownload.__table__), rows)
+        except IntegrityError:
+            # Напр. користувача вже видалено: пишемо поштучно і відкидаємо лише невдалі
+            rows = self._insert_one_by_one(rows)
+
+        count_downloads((row["song_id"], row["download_date"]) for row in rows)
+        db.session.commit()
+        return rows
+
+    def _insert_one_by_one(self, rows):
+        written = []
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(UserDownload.__table__), row)
+                written.append(row)
+            except IntegrityError:
+                pass
+        return written
+
+    # ----------------- МЕТРИКИ -----------------
+    def metrics(self):
+        stats = dict(self.stats)
+        stats["enabled"] = self.enabled
+        stats["queue_depth"] = self.queue.qsize()
+        stats["queue_capacity"] = self.queue.maxsize
+        stats["avg_flush_ms"] = stats["total_flush_ms"] / stats["batches"] if stats["batches"] else 0.0
+        del stats["total_flush_ms"]
+        return stats
+
+
+download_buffer = DownloadBuffer()
+
+
+def count_downloads(events, sign=1):
+    """
+    Привести Song.downloads_count і погодинні кошики у відповідність до
+    подій `(song_id, download_date)`: sign=1 — події щойно записані в
+    UserDownload, sign=-1 — будуть видалені. По одному executemany на
+    таблицю; події агрегуються за один прохід, тож їх можна стрімити.
+    """
+    rows = hourly_rows(events)
+    deltas = Counter()
+    for row in rows:
+        deltas[row["song_id"]] += row["downloads"]
+    if not deltas:
+        return
+    song = Song.__table__
+    db.session.execute(
+        update(song)
+        .where(song.c.song_id == bindparam("b_song_id"))
+        .values(downloads_count=func.coalesce(song.c.downloads_count, 0) + bindparam("b_delta")),
+        [{"b_song_id": song_id, "b_delta": sign * delta} for song_id, delta in deltas.items()],
+    )
+    apply_hourly(rows, sign)
@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # необов'язкова залежність: без неї працює стандартний json
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON-провайдер Flask поверх orjson, якщо той встановлений.
+
+    Decimal серіалізується як число (раніше обробники робили float()
+    вручну), дати — у тому ж HTTP-форматі, що й у стандартного
+    провайдера, або в ISO 8601 при JSON_DATETIME_ISO. Без orjson
+    поведінка та сама, лише повільніше. Ключі не сортуються.
+    """
+
+    sort_keys = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.iso_dates = app.config.get("JSON_DATETIME_ISO", False)
+        self.options = 0
+        if orjson is not None:
+            self.options = orjson.OPT_NON_STR_KEYS
+            if not self.iso_dates:
+                # datetime повертається у default() і форматується як http_date
+                self.options |= orjson.OPT_PASSTHROUGH_DATETIME
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        if isinstance(o, date):
+            return o.isoformat() if self.iso_dates else http_date(o)
+        return super().default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault("default", self.default)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        # Тіло одразу в bytes, без проміжного str
+        options = self.options
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=options) + b"\n",
+                                        mimetype=self.mimetype)
@@ -0,0 +1,124 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import func, inspect, select, text, update
+
+from models import db, Song, UserDownload, Watermark
+
+log = logging.getLogger(__name__)
+
+
+# ----------------- МІГРАЦІЯ UserDownload -----------------
+def downloads_need_migration():
+    columns = {c["name"] for c in inspect(db.engine).get_columns("UserDownload")}
+    return "download_id" not in columns
+
+
+def migrate_downloads():
+    """
+    Переводить стару UserDownload з ключем (user_id, song_id) на журнал
+    подій з сурогатним download_id: стара таблиця перейменовується,
+    створюється нова за моделлю, рядки копіюються одним INSERT ... SELECT
+    у хронологічному порядку, після чого стара таблиця видаляється.
+    FK та індекси старої таблиці знімаються до перейменування, щоб їхні
+    імена не зіткнулися з іменами нової.
+    Порожні download_date стають 1970-01-01, тобто найстарішими.
+    """
+    if not downloads_need_migration():
+        return 0
+    table = UserDownload.__table__
+    with db.engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        if conn.dialect.name != "sqlite":
+            # Перейменована таблиця зберегла б імена FK (і індекси під ними на MySQL),
+            # з якими зіткнеться нова; у SQLite FK безіменні і зняти їх не можна
+            for fk in inspect(conn).get_foreign_keys("UserDownload"):
+                if fk["name"]:
+                    drop = "FOREIGN KEY" if conn.dialect.name == "mysql" else "CONSTRAINT"
+                    conn.execute(text(f"ALTER TABLE UserDownload DROP {drop} {quote(fk['name'])}"))
+        for index in inspect(conn).get_indexes("UserDownload"):
+            if index["name"] in {i.name for i in table.indexes}:
+                conn.execute(text(f"DROP INDEX {quote(index['name'])}"
+                                  + (" ON UserDownload" if conn.dialect.name == "mysql" else "")))
+        conn.execute(text("ALTER TABLE UserDownload RENAME TO UserDownload_old"))
+        table.create(conn)
+        copied = conn.execute(text(
+            "INSERT INTO UserDownload (user_id, song_id, download_date) "
+            "SELECT user_id, song_id, COALESCE(download_date, '1970-01-01 00:00:00') "
+            "FROM UserDownload_old ORDER BY download_date, user_id, song_id"
+        )).rowcount
+        conn.execute(text("DROP TABLE UserDownload_old"))
+    return copied
+
+
+# ----------------- ЗВІРКА ЛІЧИЛЬНИКІВ -----------------
+def reconcile_download_counts(batch_size=1000, fix=False, examples=20):
+    """
+    Порівнює Song.downloads_count з кількістю подій у UserDownload
+    пачками по batch_size пісень (keyset по song_id). З fix=True
+    розбіжні лічильники перераховуються одним UPDATE на пачку з
+    корельованим підзапитом, тож подія, записана між перевіркою і
+    виправленням, не губиться.
+    """
+    report = {"songs_checked": 0, "drifted": 0, "total_drift": 0, "fixed": 0, "examples": []}
+    last_id = 0
+    while True:
+        songs = db.session.execute(
+            select(Song.song_id, Song.downloads_count)
+            .where(Song.song_id > last_id)
+            .order_by(Song.song_id)
+            .limit(batch_size)
+        ).all()
+        if not songs:
+            break
+        last_id = songs[-1].song_id
+        ids = [s.song_id for s in songs]
+        actual = dict(db.session.execute(
+            select(UserDownload.song_id, func.count())
+            .where(UserDownload.song_id.in_(ids))
+            .group_by(UserDownload.song_id)
+        ).all())
+
+        drifted = []
+        for song_id, stored in songs:
+            real = actual.get(song_id, 0)
+            if (stored or 0) != real:
+                drifted.append(song_id)
+                report["total_drift"] += (stored or 0) - real
+                if len(report["examples"]) < examples:
+                    report["examples"].append({"song_id": song_id, "stored": stored, "actual": real})
+        report["songs_checked"] += len(songs)
+        report["drifted"] += len(drifted)
+
+        if fix and drifted:
+            counted = (
+                select(func.count())
+                .where(UserDownload.song_id == Song.song_id)
+                .scalar_subquery()
+            )
+            db.session.execute(
+                update(Song).where(Song.song_id.in_(drifted)).values(downloads_count=counted),
+                execution_options={"synchronize_session": False},
+            )
+            report["fixed"] += len(drifted)
+        db.session.commit()
+
+    if report["drifted"]:
+        log.warning("Download counters drifted for %d songs (total %+d)", report["drifted"], report["total_drift"])
+    return report
+
+
+# ----------------- ВОДЯНІ ЗНАКИ -----------------
+def get_watermark(name):
+    """Останнє оброблене значення (напр. download_id) інкрементального перерахунку `name`."""
+    mark = db.session.get(Watermark, name)
+    return mark.value if mark else 0
+
+
+def set_watermark(name, value):
+    mark = db.session.get(Watermark, name)
+    if mark is None:
+        mark = Watermark(name=name)
+        db.session.add(mark)
+    mark.value = value
+    mark.updated_at = datetime.now()
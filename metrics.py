@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, has_app_context, request
+from sqlalchemy import event
+
+from models import db
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class StreamedBody:
+    """Обгортка тіла потокової відповіді: викликає on_close один раз, коли WSGI-сервер закриває ітератор."""
+
+    def __init__(self, body, on_close):
+        self.body = body
+        self.on_close = on_close
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            if self.on_close is not None:
+                on_close, self.on_close = self.on_close, None
+                on_close()
+
+
+class Metrics:
+    """
+    Латентність маршрутів і статистика SQL на запит, у форматі Prometheus на /metrics.
+
+    Якщо METRICS_ENABLED вимкнено, жодних хуків не реєструється — тож
+    накладних витрат немає зовсім. Метрики рахуються на процес: при
+    кількох воркерах gunicorn кожен віддає свої.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.queries = {}
+        self.sql = {}
+        self.slow_queries = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("METRICS_ENABLED", False)
+        app.extensions["metrics"] = self
+        if not self.enabled:
+            return
+        self.slow_query_s = app.config.get("METRICS_SLOW_QUERY_MS", 200) / 1000
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule("/metrics", "metrics", self.view)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_cursor)
+                event.listen(engine, "after_cursor_execute", self._after_cursor)
+
+    # ----------------- SQL -----------------
+    def _before_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if has_app_context() and "sql_count" in g:
+            g.sql_count += 1
+            g.sql_time += elapsed
+        if elapsed >= self.slow_query_s:
+            self.slow_queries += 1
+            log.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+    # ----------------- ЗАПИТИ -----------------
+    def _before_request(self):
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+
+    def _after_request(self, response):
+        if "request_start" not in g:
+            return response
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        key = (request.method, route)
+        state = g._get_current_object()
+        if response.is_streamed:
+            # Тіло (stream_response, експорт) генерується вже після цього хука, і SQL
+            # теж виконується під час ітерації: записуємо запит, коли сервер закриє потік.
+            response.response = StreamedBody(response.response, lambda: self._record(key, response.status_code, state))
+            return response
+        elapsed = self._record(key, response.status_code, state)
+        response.headers["Server-Timing"] = (
+            f'db;dur={state.sql_time * 1000:.1f};desc="{state.sql_count} queries", app;dur={elapsed * 1000:.1f}'
+        )
+        return response
+
+    def _record(self, key, status, state):
+        elapsed = time.perf_counter() - state.request_start
+        with self._lock:
+            status_key = key + (status,)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            self.queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(state.sql_count)
+            self.sql[key] = self.sql.get(key, 0.0) + state.sql_time
+        return elapsed
+
+    # ----------------- ЕКСПОРТ -----------------
+    def render(self):
+        out = []
+        with self._lock:
+            out.append("# TYPE http_requests_total counter")
+            for (method, route, status), n in sorted(self.requests.items()):
+                out.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {n}')
+            out.append("# TYPE http_request_duration_seconds histogram")
+            for (method, route), hist in sorted(self.latency.items()):
+                out.extend(hist.lines("http_request_duration_seconds", f'method="{method}",route="{route}"'))
+            out.append("# TYPE http_request_sql_queries histogram")
+            for (method, route), hist in sorted(self.queries.items()):
+                out.extend(hist.lines("http_request_sql_queries", f'method="{method}",route="{route}"'))
+            out.append("# TYPE http_request_sql_seconds_total counter")
+            for (method, route), total in sorted(self.sql.items()):
+                out.append(f'http_request_sql_seconds_total{{method="{method}",route="{route}"}} {total}')
+            out.append("# TYPE sql_slow_queries_total counter")
+            out.append(f"sql_slow_queries_total {self.slow_queries}")
+        return "\n".join(out) + "\n"
+
+    def view(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+
+metrics = Metrics()
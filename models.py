@@ -1,6 +1,10 @@
+from datetime import datetime
+
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from replicas import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # Жанри
 class Genre(db.Model):
@@ -8,6 +12,8 @@ class Genre(db.Model):
     genre_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
 
+    songs = db.relationship("Song", back_populates="genre", passive_deletes=True)
+
 # Лейбли
 class Label(db.Model):
     __tablename__ = "Label"
@@ -15,6 +21,8 @@ class Label(db.Model):
     name = db.Column(db.String(150), unique=True, nullable=False)
     country = db.Column(db.String(100))
 
+    albums = db.relationship("Album", back_populates="label", passive_deletes=True)
+
 # Автори
 class Author(db.Model):
     __tablename__ = "Author"
@@ -23,6 +31,8 @@ class Author(db.Model):
     country = db.Column(db.String(100))
     birth_date = db.Column(db.Date)
 
+    songs = db.relationship("Song", secondary="SongAuthor", back_populates="authors")
+
 # Альбоми
 class Album(db.Model):
     __tablename__ = "Album"
@@ -31,16 +41,33 @@ class Album(db.Model):
     release_year = db.Column(db.Integer)
     label_id = db.Column(db.Integer, db.ForeignKey("Label.label_id"))
 
+    label = db.relationship("Label", back_populates="albums")
+    songs = db.relationship("Song", back_populates="album", passive_deletes=True)
+
 # Пісні
 class Song(db.Model):
     __tablename__ = "Song"
     song_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     title = db.Column(db.String(200), nullable=False)
     price = db.Column(db.Numeric(6,2), nullable=False, default=0.00)
-    downloads_count = db.Column(db.Integer, default=0)
+    downloads_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     genre_id = db.Column(db.Integer, db.ForeignKey("Genre.genre_id"))
     album_id = db.Column(db.Integer, db.ForeignKey("Album.album_id"))
 
+    # Індекси під фільтри та сортування GET /api/songs (колонка сортування + song_id для keyset)
+    __table_args__ = (
+        db.Index("ix_song_genre_price", "genre_id", "price", "song_id"),
+        db.Index("ix_song_album_price", "album_id", "price", "song_id"),
+        db.Index("ix_song_price", "price", "song_id"),
+        db.Index("ix_song_downloads", "downloads_count", "song_id"),
+        db.Index("ix_song_genre_downloads", "genre_id", "downloads_count", "song_id"),
+        db.Index("ix_song_title", "title", "song_id"),
+    )
+
+    genre = db.relationship("Genre", back_populates="songs")
+    album = db.relationship("Album", back_populates="songs")
+    authors = db.relationship("Author", secondary="SongAuthor", back_populates="songs")
+
 # Багато-до-багатьох: Пісні ↔ Автори
 SongAuthor = db.Table("SongAuthor",
     db.Column("song_id", db.Integer, db.ForeignKey("Song.song_id"), primary_key=True),
@@ -55,9 +82,65 @@ class User(db.Model):
     email = db.Column(db.String(150), unique=True, nullable=False)
     registration_date = db.Column(db.Date)
 
-# Завантаження користувачами
+# Завантаження користувачами: append-only журнал подій, повторні завантаження дозволені
 class UserDownload(db.Model):
     __tablename__ = "UserDownload"
-    user_id = db.Column(db.Integer, db.ForeignKey("User.user_id"), primary_key=True)
+    download_id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True, autoincrement=True)
+    # Явні імена FK: flask downloads migrate не залежить від згенерованих БД
+    user_id = db.Column(db.Integer, db.ForeignKey("User.user_id", name="fk_userdownload_user"), nullable=False)
+    song_id = db.Column(db.Integer, db.ForeignKey("Song.song_id", name="fk_userdownload_song"), nullable=False)
+    download_date = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # Історія користувача: WHERE user_id = ? ORDER BY download_date DESC
+        db.Index("ix_userdownload_user_date", "user_id", "download_date", "download_id"),
+        # Звірка лічильників: COUNT(*) ... GROUP BY song_id
+        db.Index("ix_userdownload_song", "song_id"),
+        # Вибірки за діапазоном дат
+        db.Index("ix_userdownload_date", "download_date"),
+    )
+
+# Погодинні агрегати завантажень для чартів
+class SongDownloadHourly(db.Model):
+    __tablename__ = "SongDownloadHourly"
     song_id = db.Column(db.Integer, db.ForeignKey("Song.song_id"), primary_key=True)
-    download_date = db.Column(db.DateTime)
+    bucket = db.Column(db.DateTime, primary_key=True)  # початок години
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_hourly_bucket_song", "bucket", "song_id", "downloads"),
+    )
+
+# Денні підсумки завантажень і виручки по пісні (матеріалізуються з UserDownload: flask stats refresh)
+class SongDownloadDaily(db.Model):
+    __tablename__ = "SongDownloadDaily"
+    song_id = db.Column(db.Integer, db.ForeignKey("Song.song_id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+    # Сума Song.price на момент перерахунку дня
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        # /api/stats/*: WHERE day BETWEEN ... з групуванням за піснею / альбомом / лейблом / жанром
+        db.Index("ix_songdownloaddaily_day", "day", "song_id"),
+    )
+
+# Схожі пісні: попередньо пораховані top-K сусідів за спільними завантаженнями
+class SongSimilar(db.Model):
+    __tablename__ = "SongSimilar"
+    song_id = db.Column(db.Integer, db.ForeignKey("Song.song_id"), primary_key=True)
+    rank = db.Column(db.SmallInteger, primary_key=True)
+    similar_song_id = db.Column(db.Integer, db.ForeignKey("Song.song_id"), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        # Видалення пісні прибирає і рядки, де вона є сусідом
+        db.Index("ix_songsimilar_similar", "similar_song_id"),
+    )
+
+# Водяні знаки інкрементальних фонових перерахунків (останній оброблений id тощо)
+class Watermark(db.Model):
+    __tablename__ = "Watermark"
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
@@ -0,0 +1,86 @@
+import importlib.util
+import json
+import os
+
+from flask import Blueprint, abort, current_app, send_file, send_from_directory
+
+# Режим static: специфікація з файлу, Swagger UI — статика з пакета flasgger без його імпорту
+static_docs = Blueprint("apidocs", __name__)
+
+SWAGGER_UI_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <title>API docs</title>
+  <link rel="stylesheet" href="/flasgger_static/swagger-ui.css">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="/flasgger_static/swagger-ui-bundle.js"></script>
+  <script>SwaggerUIBundle({url: "/apispec_1.json", dom_id: "#swagger-ui"});</script>
+</body>
+</html>
+"""
+
+
+def spec_path(app):
+    return os.path.join(app.root_path, app.config.get("OPENAPI_SPEC_FILE", "openapi.json"))
+
+
+def swagger_ui_dir():
+    spec = importlib.util.find_spec("flasgger")
+    if spec is None or spec.origin is None:
+        return None
+    return os.path.join(os.path.dirname(spec.origin), "ui3", "static")
+
+
+def build_spec(app):
+    """Розібрати YAML docstring-и всіх маршрутів через flasgger (повільно — тому під час збірки)."""
+    from flasgger import Swagger
+
+    swagger = getattr(app, "swag", None) or Swagger(app)
+    with app.test_request_context():
+        return swagger.get_apispecs("apispec_1")
+
+
+def export_spec(app, output):
+    json.dump(build_spec(app), output, ensure_ascii=False, indent=2, sort_keys=True)
+    output.write("\n")
+
+
+def init_docs(app):
+    """
+    SWAGGER_MODE: dynamic — flasgger будує специфікацію з docstring-ів
+    (розробка); static — готовий OPENAPI_SPEC_FILE з `flask openapi export`,
+    flasgger на старті не імпортується; off — без документації.
+    """
+    mode = app.config.get("SWAGGER_MODE", "dynamic")
+    if mode == "dynamic":
+        from flasgger import Swagger
+        Swagger(app)
+    elif mode == "static":
+        app.register_blueprint(static_docs)
+    elif mode != "off":
+        raise ValueError(f"Invalid SWAGGER_MODE {mode!r}, expected dynamic, static or off")
+
+
+@static_docs.route("/apispec_1.json", methods=["GET"])
+def get_spec():
+    path = spec_path(current_app)
+    if not os.path.exists(path):
+        abort(404, description="OpenAPI spec is not built, run 'flask openapi export'")
+    return send_file(path, mimetype="application/json", max_age=3600)
+
+
+@static_docs.route("/apidocs/", methods=["GET"])
+def get_swagger_ui():
+    if swagger_ui_dir() is None:
+        abort(404, description="Swagger UI is not installed")
+    return SWAGGER_UI_PAGE
+
+
+@static_docs.route("/flasgger_static/<path:filename>", methods=["GET"])
+def get_swagger_ui_asset(filename):
+    directory = swagger_ui_dir()
+    if directory is None:
+        abort(404)
+    return send_from_directory(directory, filename, max_age=86400)
@@ -0,0 +1,141 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlencode
+
+from flask import Response, abort, current_app, jsonify, request, stream_with_context
+from sqlalchemy import Date, DateTime, Numeric, tuple_
+
+from models import db
+
+
+# ----------------- CURSOR -----------------
+# Курсор непрозорий для клієнта: base64url від JSON-списку значень ключа
+# останнього рядка сторінки.
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token, size):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        abort(400, description="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        abort(400, description="Invalid cursor")
+    return values
+
+
+def cursor_value(column, value):
+    # Значення в курсорі зберігаються як JSON, тож типи відновлюються за колонкою.
+    if value is None or not isinstance(value, str):
+        return value
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    if isinstance(column.type, Numeric):
+        return Decimal(value)
+    return value
+
+
+def query_arg(name, type=str, default=None):
+    """Параметр запиту з перевіркою типу: некоректне значення — 400, а не тихе ігнорування."""
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        return type(raw)
+    except (ValueError, InvalidOperation):
+        abort(400, description=f"Invalid value for '{name}'")
+
+
+def parse_limit():
+    default = current_app.config.get("API_PAGE_SIZE", 100)
+    maximum = current_app.config.get("API_MAX_PAGE_SIZE", 1000)
+    limit = query_arg("limit", int, default)
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def after_keyset(stmt, keys, values, descending=False):
+    try:
+        values = [cursor_value(k, v) for k, v in zip(keys, values)]
+    except (ValueError, InvalidOperation):
+        abort(400, description="Invalid cursor")
+    if len(keys) == 1:
+        left, right = keys[0], values[0]
+    else:
+        left, right = tuple_(*keys), tuple_(*values)
+    return stmt.where(left < right if descending else left > right)
+
+
+# ----------------- RESPONSE -----------------
+def paginate(stmt, keys, serialize, descending=False, scalars=True):
+    """
+    Keyset-пагінація по `keys` (первинний ключ або колонка сортування + ключ).
+
+    Параметри запиту: `limit`, `after` (курсор з заголовка X-Next-Cursor)
+    та `stream=ndjson|json` для потокової віддачі всієї таблиці пачками
+    `yield_per`, без матеріалізації у пам'яті воркера.
+
+    `scalars=False` — для select з окремих колонок: у serialize
+    потрапляє Row, а ключі keyset читаються з нього за іменем колонки.
+    """
+    after = request.args.get("after")
+    if after:
+        stmt = after_keyset(stmt, keys, decode_cursor(after, len(keys)), descending)
+    stmt = stmt.order_by(*(k.desc() for k in keys) if descending else keys)
+
+    mode = request.args.get("stream")
+    if mode:
+        if mode not in ("ndjson", "json"):
+            abort(400, description="stream must be 'ndjson' or 'json'")
+        if "limit" in request.args:
+            stmt = stmt.limit(parse_limit())
+        return stream_response(stmt, serialize, mode, scalars)
+
+    limit = parse_limit()
+    result = db.session.execute(stmt.limit(limit + 1))
+    items = (result.scalars() if scalars else result).all()
+    response = jsonify([serialize(item) for item in items[:limit]])
+    if len(items) > limit:
+        cursor = encode_cursor(getattr(items[limit - 1], k.key) for k in keys)
+        response.headers.update(next_page_headers(request.base_url, request.args.to_dict(), cursor, limit))
+    return response
+
+
+def next_page_headers(base_url, args, cursor, limit):
+    args = dict(args, after=cursor, limit=limit)
+    return {"X-Next-Cursor": cursor, "Link": f'<{base_url}?{urlencode(args)}>; rel="next"'}
+
+
+def stream_response(stmt, serialize, mode, scalars=True):
+    batch = current_app.config.get("API_STREAM_BATCH_SIZE", 500)
+    dumps = current_app.json.dumps
+    stmt = stmt.execution_options(yield_per=batch)
+
+    # Запит виконується всередині генератора: сесія живе, доки йде відповідь.
+    def rows():
+        result = db.session.execute(stmt)
+        return result.scalars() if scalars else result
+
+    def ndjson():
+        for item in rows():
+            yield dumps(serialize(item)) + "\n"
+
+    def json_array():
+        yield "["
+        first = True
+        for item in rows():
+            yield ("" if first else ",") + dumps(serialize(item))
+            first = False
+        yield "]"
+
+    if mode == "ndjson":
+        return Response(stream_with_context(ndjson()), mimetype="application/x-ndjson")
+    return Response(stream_with_context(json_array()), mimetype="application/json")
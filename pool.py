@@ -0,0 +1,66 @@
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, що рахує час очікування вільного з'єднання."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            # Лише вичерпаний пул; помилки підключення (refused, auth) сюди не потрапляють
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.waits += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout_s=pool.timeout(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            checkouts=pool.waits,
+            checkout_timeouts=pool.timeouts,
+            wait_avg_ms=pool.wait_total / pool.waits * 1000 if pool.waits else 0.0,
+            wait_max_ms=pool.wait_max * 1000,
+        )
+    return stats
+
+
+def check_database(app, db):
+    """Fail-fast перевірка з'єднання під час старту."""
+    with app.app_context():
+        try:
+            db.session.execute(text("SELECT 1"))
+        except Exception as e:
+            raise RuntimeError(f"Database is not reachable: {e}") from e
+        finally:
+            db.session.remove()
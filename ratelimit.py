@@ -0,0 +1,163 @@
+import math
+import threading
+import time
+
+from flask import make_response, request
+from werkzeug.utils import import_string
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+# Прапорець у ASGI scope: запит уже перевірено в asgi.Hybrid, Flask не рахує його вдруге
+ASGI_CHECKED = "ratelimit.checked"
+
+
+def parse_rate(spec):
+    """
+    "20/second" або "20/second:40" (40 — розмір сплеску, за замовчуванням
+    дорівнює кількості) → (інтервал між запитами, допуск) для GCRA.
+    "none" — без обмеження.
+    """
+    spec = spec.strip().lower()
+    if spec in ("", "none", "0"):
+        return None
+    try:
+        rate, _, burst = spec.partition(":")
+        count, period = rate.split("/")
+        count, seconds = int(count), PERIODS[period.strip()]
+        burst = int(burst) if burst else count
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit {spec!r}, expected e.g. 20/second or 20/second:40")
+    if count < 1 or burst < 1:
+        raise ValueError(f"Invalid rate limit {spec!r}")
+    interval = seconds / count
+    return interval, interval * (burst - 1)
+
+
+def parse_rules(value):
+    """"export_api=10/minute:3,api.get_songs=50/second" → {endpoint або blueprint: ліміт}."""
+    rules = {}
+    for item in value.split(","):
+        if item.strip():
+            name, _, spec = item.partition("=")
+            rules[name.strip()] = parse_rate(spec)
+    return rules
+
+
+class MemoryRateStore:
+    """
+    In-process сховище GCRA (generic cell rate algorithm — token bucket,
+    де стан ключа — один float: теоретичний час наступного запиту).
+
+    Без блокувань: читання і запис словника атомарні під GIL, а гонка
+    двох одночасних запитів того самого клієнта щонайбільше пропустить
+    один зайвий запит. Спільний для воркерів бекенд (напр. скрипт поверх
+    Redis) реалізує той самий метод `hit`.
+    """
+
+    def __init__(self, config=None):
+        self.max_keys = (config or {}).get("RATE_LIMIT_MAX_KEYS", 100000)
+        self._tat = {}
+        self._prune_lock = threading.Lock()
+
+    def hit(self, key, interval, tolerance):
+        """0 — запит дозволено, інакше — скільки секунд чекати."""
+        now = time.monotonic()
+        tat = max(self._tat.get(key, now), now)
+        wait = tat - now - tolerance
+        if wait > 0:
+            return wait
+        self._tat[key] = tat + interval
+        if len(self._tat) > self.max_keys:
+            self._prune(now)
+        return 0
+
+    def _prune(self, now):
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            # Ключ з минулим tat має повний «кошик» — він нічим не відрізняється від відсутнього
+            for key, tat in list(self._tat.items()):
+                if tat <= now:
+                    self._tat.pop(key, None)
+            if len(self._tat) > self.max_keys:
+                for key, _ in sorted(self._tat.items(), key=lambda item: item[1])[:len(self._tat) // 2]:
+                    self._tat.pop(key, None)
+        finally:
+            self._prune_lock.release()
+
+
+class RateLimiter:
+    """
+    Обмеження частоти запитів на клієнта й маршрут (endpoint) з 429 і Retry-After.
+
+    Клієнт — значення RATE_LIMIT_USER_HEADER (користувач, якого підставив
+    довірений шлюз), інакше IP. Ліміт маршруту береться з RATE_LIMITS за
+    іменем endpoint-а, потім blueprint-а, інакше RATE_LIMIT_DEFAULT.
+    Якщо RATE_LIMIT_ENABLED вимкнено, хук не реєструється.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.store = None
+        self._resolved = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RATE_LIMIT_ENABLED", False)
+        app.extensions["ratelimit"] = self
+        if not self.enabled:
+            return
+        self.default = parse_rate(app.config.get("RATE_LIMIT_DEFAULT", "20/second:40"))
+        self.rules = parse_rules(app.config.get("RATE_LIMITS", ""))
+        self.exempt = {name.strip() for name in app.config.get("RATE_LIMIT_EXEMPT", "").split(",") if name.strip()}
+        self.user_header = app.config.get("RATE_LIMIT_USER_HEADER")
+        self.proxy_hops = app.config.get("RATE_LIMIT_PROXY_HOPS", 0)
+        backend = app.config.get("RATE_LIMIT_BACKEND")
+        self.store = import_string(backend)(app.config) if backend else MemoryRateStore(app.config)
+        self._resolved = {}
+        app.before_request(self._before_request)
+
+    def limit_for(self, endpoint):
+        if endpoint not in self._resolved:
+            blueprint = endpoint.rpartition(".")[0]
+            if endpoint in self.exempt or blueprint in self.exempt:
+                limit = None
+            elif endpoint in self.rules:
+                limit = self.rules[endpoint]
+            else:
+                limit = self.rules.get(blueprint, self.default)
+            self._resolved[endpoint] = limit
+        return self._resolved[endpoint]
+
+    def client(self, remote_addr, headers):
+        if self.user_header:
+            user = headers.get(self.user_header)
+            if user:
+                return f"u:{user}"
+        if self.proxy_hops:
+            # За балансувальником remote_addr — його адреса; клієнт — N-й з кінця X-Forwarded-For
+            forwarded = [ip.strip() for ip in headers.get("X-Forwarded-For", "").split(",") if ip.strip()]
+            if len(forwarded) >= self.proxy_hops:
+                return f"ip:{forwarded[-self.proxy_hops]}"
+        return f"ip:{remote_addr}"
+
+    def retry_after(self, endpoint, remote_addr, headers):
+        limit = self.limit_for(endpoint)
+        if limit is None:
+            return 0
+        return self.store.hit(f"rl:{endpoint}:{self.client(remote_addr, headers)}", *limit)
+
+    def _before_request(self):
+        req = request._get_current_object()  # хук на кожен запит: один прохід через LocalProxy
+        # Невідомий URL (404 / 405) до БД не доходить
+        if req.endpoint is None or req.environ.get("asgi.scope", {}).get(ASGI_CHECKED):
+            return None
+        wait = self.retry_after(req.endpoint, req.remote_addr, req.headers)
+        if wait:
+            response = make_response({"message": "Too many requests"}, 429)
+            response.headers["Retry-After"] = str(math.ceil(wait))
+            return response
+        return None
+
+
+rate_limiter = RateLimiter()
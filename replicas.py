@@ -0,0 +1,112 @@
+import itertools
+import logging
+import threading
+import time
+
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+log = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = "replica"
+# Лише GET-обробники цих blueprint-ів читають з реплік
+READ_BLUEPRINTS = {"api"}
+READ_METHODS = {"GET", "HEAD"}
+
+
+class ReplicaSet:
+    """
+    Репліки для читання: round-robin з тимчасовим виключенням.
+
+    Репліка, на якій стався розрив з'єднання або помилка підключення,
+    виключається на REPLICA_EJECT_SECONDS, після чого знову отримує
+    запити. Якщо здорових реплік немає, читання йдуть на primary.
+    """
+
+    def __init__(self, app=None):
+        self.engines = []
+        self.ejected = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {"reads": 0, "fallbacks": 0, "ejections": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.eject_seconds = app.config.get("REPLICA_EJECT_SECONDS", 30)
+        app.extensions["replicas"] = self
+        db = app.extensions["sqlalchemy"]
+        with app.app_context():
+            self.engines = [
+                engine for key, engine in sorted(db.engines.items(), key=lambda kv: str(kv[0]))
+                if key is not None and key.startswith(REPLICA_BIND_PREFIX)
+            ]
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._handle_error)
+
+    def _handle_error(self, context):
+        # Розрив з'єднання або помилка підключення (connection ще немає)
+        if context.is_disconnect or context.connection is None:
+            self.eject(context.engine)
+
+    def eject(self, engine):
+        with self._lock:
+            if self.ejected.get(engine, 0) < time.monotonic():
+                self.stats["ejections"] += 1
+                log.warning("Replica %s ejected for %ss", engine.url.render_as_string(), self.eject_seconds)
+            self.ejected[engine] = time.monotonic() + self.eject_seconds
+
+    def choose(self):
+        if not self.engines:
+            return None
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._counter) % len(self.engines)]
+            if self.ejected.get(engine, 0) <= now:
+                self.stats["reads"] += 1
+                return engine
+        self.stats["fallbacks"] += 1
+        return None
+
+    def metrics(self):
+        now = time.monotonic()
+        stats = dict(self.stats)
+        stats["replicas"] = [
+            {"url": engine.url.render_as_string(), "healthy": self.ejected.get(engine, 0) <= now}
+            for engine in self.engines
+        ]
+        return stats
+
+
+replica_set = ReplicaSet()
+
+
+class RoutingSession(Session):
+    """
+    Сесія, що спрямовує читання GET-запитів blueprint-у `api` на репліки.
+
+    Репліка обирається один раз на сесію (тобто на запит), щоб усі
+    читання запиту бачили один і той самий стан. Запис (flush,
+    INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE) іде на primary і
+    закріплює за ним решту сесії, тож читання після запису в тому ж
+    запиті бачить власні зміни.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._replica_allowed(clause):
+            if "replica" not in self.info:
+                self.info["replica"] = replica_set.choose()
+            if self.info["replica"] is not None:
+                return self.info["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_allowed(self, clause):
+        if not replica_set.engines or self.info.get("primary"):
+            return False
+        if self._flushing or isinstance(clause, UpdateBase) or getattr(clause, "_for_update_arg", None) is not None:
+            self.info["primary"] = True
+            return False
+        return has_request_context() and request.method in READ_METHODS and request.blueprint in READ_BLUEPRINTS
+
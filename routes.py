@@ -1,10 +1,106 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from models import db, Song, Author, Album, Genre, Label, User, UserDownload, SongAuthor
+from pagination import paginate, query_arg
+from ingest import download_buffer
+from cache import response_cache
+from idempotency import idempotency
+from deletes import delete_with_dependents
+from pool import pool_stats
+from replicas import replica_set
+from charts import record_downloads
+from search import search_index
 from datetime import datetime
+from decimal import Decimal
 
 api = Blueprint("api", __name__)
 
 # ----------------- SONG -----------------
+SONG_EXPANSIONS = ("album", "genre", "authors", "label")
+
+def parse_expand():
+    expand = {e for e in request.args.get("expand", "").split(",") if e}
+    unknown = expand - set(SONG_EXPANSIONS)
+    if unknown:
+        abort(400, description=f"Unknown expand: {', '.join(sorted(unknown))}")
+    return expand
+
+def song_load_options(expand):
+    # Фіксована кількість запитів незалежно від розміру сторінки:
+    # many-to-one через JOIN, автори — одним SELECT ... IN.
+    options = []
+    if "label" in expand:
+        options.append(joinedload(Song.album).joinedload(Album.label))
+    elif "album" in expand:
+        options.append(joinedload(Song.album))
+    if "genre" in expand:
+        options.append(joinedload(Song.genre))
+    if "authors" in expand:
+        options.append(selectinload(Song.authors))
+    return options
+
+def expand_song(data, s, expand):
+    if "album" in expand:
+        data["album"] = album_to_dict(s.album) if s.album else None
+    if "genre" in expand:
+        data["genre"] = genre_to_dict(s.genre) if s.genre else None
+    if "label" in expand:
+        data["label"] = label_to_dict(s.album.label) if s.album and s.album.label else None
+    if "authors" in expand:
+        data["authors"] = [author_to_dict(a) for a in s.authors]
+    return data
+
+# Поле відповіді -> атрибут моделі
+SONG_FIELDS = {
+    "id": "song_id",
+    "title": "title",
+    "price": "price",
+    "downloads": "downloads_count",
+    "genre_id": "genre_id",
+    "album_id": "album_id"
+}
+SONG_SORTS = {
+    "id": Song.song_id,
+    "price": Song.price,
+    "downloads": Song.downloads_count,
+    "title": Song.title
+}
+
+def song_to_dict(s, expand=(), fields=SONG_FIELDS):
+    data = {}
+    for name in fields:
+        value = getattr(s, SONG_FIELDS[name])
+        data[name] = float(value) if name == "price" else value
+    return expand_song(data, s, expand)
+
+def parse_fields():
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
+    if not fields:
+        return list(SONG_FIELDS)
+    unknown = set(fields) - set(SONG_FIELDS)
+    if unknown:
+        abort(400, description=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+def song_filters(stmt):
+    genre_id = query_arg("genre_id", int)
+    album_id = query_arg("album_id", int)
+    min_price = query_arg("min_price", Decimal)
+    max_price = query_arg("max_price", Decimal)
+    title_prefix = query_arg("title_prefix")
+    if genre_id is not None:
+        stmt = stmt.where(Song.genre_id == genre_id)
+    if album_id is not None:
+        stmt = stmt.where(Song.album_id == album_id)
+    if min_price is not None:
+        stmt = stmt.where(Song.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(Song.price <= max_price)
+    if title_prefix:
+        stmt = stmt.where(Song.title.startswith(title_prefix, autoescape=True))
+    return stmt
+
 @api.route("/songs", methods=["GET"])
 def get_songs():
     """
@@ -12,6 +108,49 @@ def get_songs():
     ---
     tags:
       - Songs
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Розмір сторінки (за замовчуванням API_PAGE_SIZE)
+      - name: after
+        in: query
+        type: string
+        description: Курсор наступної сторінки з заголовка X-Next-Cursor
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        description: Потокова віддача всієї колекції
+      - name: expand
+        in: query
+        type: string
+        description: Вкладені сутності через кому (album, genre, authors, label)
+      - name: genre_id
+        in: query
+        type: integer
+      - name: album_id
+        in: query
+        type: integer
+      - name: min_price
+        in: query
+        type: number
+      - name: max_price
+        in: query
+        type: number
+      - name: title_prefix
+        in: query
+        type: string
+        description: Початок назви пісні
+      - name: sort
+        in: query
+        type: string
+        enum: [id, -id, price, -price, downloads, -downloads, title, -title]
+        description: Поле сортування, "-" — за спаданням
+      - name: fields
+        in: query
+        type: string
+        description: Поля відповіді через кому (id, title, price, downloads, genre_id, album_id)
     responses:
       200:
         description: Список пісень
@@ -27,15 +166,33 @@ def get_songs():
               genre_id: { type: integer }
               album_id: { type: integer }
     """
-    songs = Song.query.all()
-    return jsonify([{
-        "id": s.song_id,
-        "title": s.title,
-        "price": float(s.price),
-        "downloads": s.downloads_count,
-        "genre_id": s.genre_id,
-        "album_id": s.album_id
-    } for s in songs])
+    expand = parse_expand()
+    fields = parse_fields()
+    sort = request.args.get("sort", "id")
+    descending = sort.startswith("-")
+    sort_column = SONG_SORTS.get(sort.lstrip("-"))
+    if sort_column is None:
+        abort(400, description=f"Unknown sort: {sort}")
+    keys = [Song.song_id] if sort_column is Song.song_id else [sort_column, Song.song_id]
+
+    if not expand:
+        # Без expand — кортежі колонок замість ORM-об'єктів: ні identity map, ні інструментованих атрибутів
+        columns = [getattr(Song, SONG_FIELDS[f]) for f in fields]
+        columns += [k for k in keys if k.key not in {c.key for c in columns}]
+        stmt = song_filters(select(*columns))
+        return paginate(stmt, keys, lambda row: dict(zip(fields, row)), descending, scalars=False)
+
+    # Завантажуються лише потрібні колонки: поля відповіді, ключі keyset та FK для expand
+    columns = {SONG_FIELDS[f] for f in fields} | {k.key for k in keys}
+    if expand & {"album", "label"}:
+        columns.add("album_id")
+    if "genre" in expand:
+        columns.add("genre_id")
+    stmt = song_filters(select(Song)).options(
+        load_only(*(getattr(Song, c) for c in columns)),
+        *song_load_options(expand)
+    )
+    return paginate(stmt, keys, lambda s: song_to_dict(s, expand, fields), descending)
 
 @api.route("/songs/<int:song_id>", methods=["GET"])
 def get_song(song_id):
@@ -50,12 +207,21 @@ def get_song(song_id):
         required: true
         schema:
           type: integer
+      - name: expand
+        in: query
+        type: string
+        description: Вкладені сутності через кому (album, genre, authors, label)
     responses:
       200:
         description: Пісня знайдена
     """
-    s = Song.query.get_or_404(song_id)
-    return jsonify({"id": s.song_id, "title": s.title, "price": float(s.price)})
+    expand = parse_expand()
+    s = db.session.execute(
+        select(Song).options(*song_load_options(expand)).where(Song.song_id == song_id)
+    ).unique().scalar_one_or_none()
+    if s is None:
+        abort(404)
+    return jsonify(expand_song({"id": s.song_id, "title": s.title, "price": float(s.price)}, s, expand))
 
 # ----------------- SONG -----------------
 #@api.route("/songs", methods=["POST"])
@@ -116,11 +282,13 @@ def update_song(song_id):
     """
     song = Song.query.get_or_404(song_id)
     data = request.json
+    old_title = song.title
     song.title = data.get("title", song.title)
     song.price = data.get("price", song.price)
     song.genre_id = data.get("genre_id", song.genre_id)
     song.album_id = data.get("album_id", song.album_id)
     db.session.commit()
+    search_index.changed("song", song_id, old_title, song.title)
     return jsonify({"message": "Song updated"})
 
 @api.route("/songs/<int:song_id>", methods=["DELETE"])
@@ -135,32 +303,64 @@ def delete_song(song_id):
         in: path
         required: true
         schema: { type: integer }
+      - name: on_delete
+        in: query
+        type: string
+        enum: [restrict, nullify, cascade]
+        description: Що робити із залежними записами (за замовчуванням DELETE_DEFAULT_MODE)
+      - name: dry_run
+        in: query
+        type: boolean
+        description: Лише порахувати рядки, яких торкнеться видалення
     responses:
       200:
-        description: Видалено
+        description: Видалено; кількість видалених і обнулених рядків за таблицями
+      409:
+        description: На запис посилаються залежні записи (restrict)
     """
-    song = Song.query.get_or_404(song_id)
-    db.session.delete(song)
-    db.session.commit()
-    return jsonify({"message": "Song deleted"})
+    title = Song.query.get_or_404(song_id).title
+    report = delete_with_dependents(Song, song_id)
+    if report["dry_run"]:
+        return jsonify(report)
+    search_index.removed("song", song_id, title)
+    return jsonify({"message": "Song deleted", **report})
 
 
 # ----------------- AUTHOR -----------------
+def author_to_dict(a):
+    return {"id": a.author_id, "name": a.name, "country": a.country}
+
 @api.route("/authors", methods=["GET"])
+@response_cache.cached("authors")
 def get_authors():
     """
     Отримати список авторів
     ---
     tags:
       - Authors
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Розмір сторінки (за замовчуванням API_PAGE_SIZE)
+      - name: after
+        in: query
+        type: string
+        description: Курсор наступної сторінки з заголовка X-Next-Cursor
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        description: Потокова віддача всієї колекції
     responses:
       200:
         description: Список авторів
     """
-    authors = Author.query.all()
-    return jsonify([{"id": a.author_id, "name": a.name, "country": a.country} for a in authors])
+    stmt = select(Author.author_id, Author.name, Author.country)
+    return paginate(stmt, [Author.author_id], author_to_dict, scalars=False)
 
 @api.route("/authors", methods=["POST"])
+@idempotency.idempotent
 def add_author():
     """
     Додати автора
@@ -168,6 +368,10 @@ def add_author():
     tags:
       - Authors
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        description: Повтор з тим самим ключем повертає збережену відповідь без повторного запису
       - in: body
         name: body
         schema:
@@ -184,6 +388,8 @@ def add_author():
     author = Author(name=data["name"], country=data.get("country"))
     db.session.add(author)
     db.session.commit()
+    response_cache.invalidate("authors")
+    search_index.added("author", author.author_id, author.name)
     return jsonify({"message": "Author added", "id": author.author_id})
 
 @api.route("/authors/<int:author_id>", methods=["PUT"])
@@ -212,9 +418,12 @@ def update_author(author_id):
     """
     author = Author.query.get_or_404(author_id)
     data = request.json
+    old_name = author.name
     author.name = data.get("name", author.name)
     author.country = data.get("country", author.country)
     db.session.commit()
+    response_cache.invalidate("authors")
+    search_index.changed("author", author_id, old_name, author.name)
     return jsonify({"message": "Author updated"})
 
 @api.route("/authors/<int:author_id>", methods=["DELETE"])
@@ -229,32 +438,64 @@ def delete_author(author_id):
         in: path
         required: true
         schema: { type: integer }
+      - name: on_delete
+        in: query
+        type: string
+        enum: [restrict, nullify, cascade]
+        description: Що робити із залежними записами (за замовчуванням DELETE_DEFAULT_MODE)
+      - name: dry_run
+        in: query
+        type: boolean
+        description: Лише порахувати рядки, яких торкнеться видалення
     responses:
       200:
-        description: Видалено
+        description: Видалено; кількість видалених і обнулених рядків за таблицями
+      409:
+        description: На запис посилаються залежні записи (restrict)
     """
-    author = Author.query.get_or_404(author_id)
-    db.session.delete(author)
-    db.session.commit()
-    return jsonify({"message": "Author deleted"})
+    name = Author.query.get_or_404(author_id).name
+    report = delete_with_dependents(Author, author_id)
+    if report["dry_run"]:
+        return jsonify(report)
+    search_index.removed("author", author_id, name)
+    return jsonify({"message": "Author deleted", **report})
 
 
 # ----------------- ALBUM -----------------
+def album_to_dict(a):
+    return {"id": a.album_id, "title": a.title, "year": a.release_year}
+
 @api.route("/albums", methods=["GET"])
+@response_cache.cached("albums")
 def get_albums():
     """
     Отримати список альбомів
     ---
     tags:
       - Albums
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Розмір сторінки (за замовчуванням API_PAGE_SIZE)
+      - name: after
+        in: query
+        type: string
+        description: Курсор наступної сторінки з заголовка X-Next-Cursor
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        description: Потокова віддача всієї колекції
     responses:
       200:
         description: Список альбомів
     """
-    albums = Album.query.all()
-    return jsonify([{"id": a.album_id, "title": a.title, "year": a.release_year} for a in albums])
+    stmt = select(Album.album_id, Album.title, Album.release_year)
+    return paginate(stmt, [Album.album_id], album_to_dict, scalars=False)
 
 @api.route("/albums", methods=["POST"])
+@idempotency.idempotent
 def add_album():
     """
     Додати альбом
@@ -262,6 +503,10 @@ def add_album():
     tags:
       - Albums
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        description: Повтор з тим самим ключем повертає збережену відповідь без повторного запису
       - in: body
         name: body
         schema:
@@ -279,6 +524,8 @@ def add_album():
     album = Album(title=data["title"], release_year=data.get("release_year"), label_id=data.get("label_id"))
     db.session.add(album)
     db.session.commit()
+    response_cache.invalidate("albums")
+    search_index.added("album", album.album_id, album.title)
     return jsonify({"message": "Album added", "id": album.album_id})
 
 @api.route("/albums/<int:album_id>", methods=["PUT"])
@@ -308,10 +555,13 @@ def update_album(album_id):
     """
     album = Album.query.get_or_404(album_id)
     data = request.json
+    old_title = album.title
     album.title = data.get("title", album.title)
     album.release_year = data.get("release_year", album.release_year)
     album.label_id = data.get("label_id", album.label_id)
     db.session.commit()
+    response_cache.invalidate("albums")
+    search_index.changed("album", album_id, old_title, album.title)
     return jsonify({"message": "Album updated"})
 
 @api.route("/albums/<int:album_id>", methods=["DELETE"])
@@ -326,32 +576,64 @@ def delete_album(album_id):
         in: path
         required: true
         schema: { type: integer }
+      - name: on_delete
+        in: query
+        type: string
+        enum: [restrict, nullify, cascade]
+        description: Що робити із залежними записами (за замовчуванням DELETE_DEFAULT_MODE)
+      - name: dry_run
+        in: query
+        type: boolean
+        description: Лише порахувати рядки, яких торкнеться видалення
     responses:
       200:
-        description: Видалено
+        description: Видалено; кількість видалених і обнулених рядків за таблицями
+      409:
+        description: На запис посилаються залежні записи (restrict)
     """
-    album = Album.query.get_or_404(album_id)
-    db.session.delete(album)
-    db.session.commit()
-    return jsonify({"message": "Album deleted"})
+    title = Album.query.get_or_404(album_id).title
+    report = delete_with_dependents(Album, album_id)
+    if report["dry_run"]:
+        return jsonify(report)
+    search_index.removed("album", album_id, title)
+    return jsonify({"message": "Album deleted", **report})
 
 
 # ----------------- GENRE -----------------
+def genre_to_dict(g):
+    return {"id": g.genre_id, "name": g.name}
+
 @api.route("/genres", methods=["GET"])
+@response_cache.cached("genres")
 def get_genres():
     """
     Отримати список жанрів
     ---
     tags:
       - Genres
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Розмір сторінки (за замовчуванням API_PAGE_SIZE)
+      - name: after
+        in: query
+        type: string
+        description: Курсор наступної сторінки з заголовка X-Next-Cursor
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        description: Потокова віддача всієї колекції
     responses:
       200:
         description: Список жанрів
     """
-    genres = Genre.query.all()
-    return jsonify([{"id": g.genre_id, "name": g.name} for g in genres])
+    stmt = select(Genre.genre_id, Genre.name)
+    return paginate(stmt, [Genre.genre_id], genre_to_dict, scalars=False)
 
 @api.route("/genres", methods=["POST"])
+@idempotency.idempotent
 def add_genre():
     """
     Додати жанр
@@ -359,6 +641,10 @@ def add_genre():
     tags:
       - Genres
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        description: Повтор з тим самим ключем повертає збережену відповідь без повторного запису
       - in: body
         name: body
         schema:
@@ -374,6 +660,7 @@ def add_genre():
     genre = Genre(name=data["name"])
     db.session.add(genre)
     db.session.commit()
+    response_cache.invalidate("genres")
     return jsonify({"message": "Genre added", "id": genre.genre_id})
 
 @api.route("/genres/<int:genre_id>", methods=["PUT"])
@@ -403,6 +690,7 @@ def update_genre(genre_id):
     data = request.json
     genre.name = data.get("name", genre.name)
     db.session.commit()
+    response_cache.invalidate("genres")
     return jsonify({"message": "Genre updated"})
 
 @api.route("/genres/<int:genre_id>", methods=["DELETE"])
@@ -417,32 +705,63 @@ def delete_genre(genre_id):
         in: path
         required: true
         schema: { type: integer }
+      - name: on_delete
+        in: query
+        type: string
+        enum: [restrict, nullify, cascade]
+        description: Що робити із залежними записами (за замовчуванням DELETE_DEFAULT_MODE)
+      - name: dry_run
+        in: query
+        type: boolean
+        description: Лише порахувати рядки, яких торкнеться видалення
     responses:
       200:
-        description: Видалено
+        description: Видалено; кількість видалених і обнулених рядків за таблицями
+      409:
+        description: На запис посилаються залежні записи (restrict)
     """
-    genre = Genre.query.get_or_404(genre_id)
-    db.session.delete(genre)
-    db.session.commit()
-    return jsonify({"message": "Genre deleted"})
+    Genre.query.get_or_404(genre_id)
+    report = delete_with_dependents(Genre, genre_id)
+    if report["dry_run"]:
+        return jsonify(report)
+    return jsonify({"message": "Genre deleted", **report})
 
 
 # ----------------- LABEL -----------------
+def label_to_dict(l):
+    return {"id": l.label_id, "name": l.name, "country": l.country}
+
 @api.route("/labels", methods=["GET"])
+@response_cache.cached("labels")
 def get_labels():
     """
     Отримати список лейблів
     ---
     tags:
       - Labels
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Розмір сторінки (за замовчуванням API_PAGE_SIZE)
+      - name: after
+        in: query
+        type: string
+        description: Курсор наступної сторінки з заголовка X-Next-Cursor
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        description: Потокова віддача всієї колекції
     responses:
       200:
         description: Список лейблів
     """
-    labels = Label.query.all()
-    return jsonify([{"id": l.label_id, "name": l.name, "country": l.country} for l in labels])
+    stmt = select(Label.label_id, Label.name, Label.country)
+    return paginate(stmt, [Label.label_id], label_to_dict, scalars=False)
 
 @api.route("/labels", methods=["POST"])
+@idempotency.idempotent
 def add_label():
     """
     Додати лейбл
@@ -450,6 +769,10 @@ def add_label():
     tags:
       - Labels
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        description: Повтор з тим самим ключем повертає збережену відповідь без повторного запису
       - in: body
         name: body
         schema:
@@ -466,6 +789,7 @@ def add_label():
     label = Label(name=data["name"], country=data.get("country"))
     db.session.add(label)
     db.session.commit()
+    response_cache.invalidate("labels")
     return jsonify({"message": "Label added", "id": label.label_id})
 
 @api.route("/labels/<int:label_id>", methods=["PUT"])
@@ -497,6 +821,7 @@ def update_label(label_id):
     label.name = data.get("name", label.name)
     label.country = data.get("country", label.country)
     db.session.commit()
+    response_cache.invalidate("labels")
     return jsonify({"message": "Label updated"})
 
 @api.route("/labels/<int:label_id>", methods=["DELETE"])
@@ -511,17 +836,32 @@ def delete_label(label_id):
         in: path
         required: true
         schema: { type: integer }
+      - name: on_delete
+        in: query
+        type: string
+        enum: [restrict, nullify, cascade]
+        description: Що робити із залежними записами (за замовчуванням DELETE_DEFAULT_MODE)
+      - name: dry_run
+        in: query
+        type: boolean
+        description: Лише порахувати рядки, яких торкнеться видалення
     responses:
       200:
-        description: Видалено
+        description: Видалено; кількість видалених і обнулених рядків за таблицями
+      409:
+        description: На запис посилаються залежні записи (restrict)
     """
-    label = Label.query.get_or_404(label_id)
-    db.session.delete(label)
-    db.session.commit()
-    return jsonify({"message": "Label deleted"})
+    Label.query.get_or_404(label_id)
+    report = delete_with_dependents(Label, label_id)
+    if report["dry_run"]:
+        return jsonify(report)
+    return jsonify({"message": "Label deleted", **report})
 
 
 # ----------------- USER -----------------
+def user_to_dict(u):
+    return {"id": u.user_id, "username": u.username, "email": u.email}
+
 @api.route("/users", methods=["GET"])
 def get_users():
     """
@@ -529,14 +869,29 @@ def get_users():
     ---
     tags:
       - Users
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Розмір сторінки (за замовчуванням API_PAGE_SIZE)
+      - name: after
+        in: query
+        type: string
+        description: Курсор наступної сторінки з заголовка X-Next-Cursor
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        description: Потокова віддача всієї колекції
     responses:
       200:
         description: Список користувачів
     """
-    users = User.query.all()
-    return jsonify([{"id": u.user_id, "username": u.username, "email": u.email} for u in users])
+    stmt = select(User.user_id, User.username, User.email)
+    return paginate(stmt, [User.user_id], user_to_dict, scalars=False)
 
 @api.route("/users", methods=["POST"])
+@idempotency.idempotent
 def add_user():
     """
     Зареєструвати користувача
@@ -544,6 +899,10 @@ def add_user():
     tags:
       - Users
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        description: Повтор з тим самим ключем повертає збережену відповідь без повторного запису
       - in: body
         name: body
         schema:
@@ -605,17 +964,92 @@ def delete_user(user_id):
         in: path
         required: true
         schema: { type: integer }
+      - name: on_delete
+        in: query
+        type: string
+        enum: [restrict, nullify, cascade]
+        description: Що робити із залежними записами (за замовчуванням DELETE_DEFAULT_MODE)
+      - name: dry_run
+        in: query
+        type: boolean
+        description: Лише порахувати рядки, яких торкнеться видалення
     responses:
       200:
-        description: Видалено
+        description: Видалено; кількість видалених і обнулених рядків за таблицями
+      409:
+        description: На запис посилаються залежні записи (restrict)
     """
-    user = User.query.get_or_404(user_id)
-    db.session.delete(user)
-    db.session.commit()
-    return jsonify({"message": "User deleted"})
+    User.query.get_or_404(user_id)
+    report = delete_with_dependents(User, user_id)
+    if report["dry_run"]:
+        return jsonify(report)
+    return jsonify({"message": "User deleted", **report})
+
+@api.route("/users/<int:user_id>/downloads", methods=["GET"])
+def get_user_downloads(user_id):
+    """
+    Історія завантажень користувача, від найновіших
+    ---
+    tags:
+      - Users
+    parameters:
+      - name: user_id
+        in: path
+        required: true
+        schema: { type: integer }
+      - name: limit
+        in: query
+        type: integer
+        description: Розмір сторінки (за замовчуванням API_PAGE_SIZE)
+      - name: after
+        in: query
+        type: string
+        description: Курсор наступної сторінки з заголовка X-Next-Cursor
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        description: Потокова віддача всієї колекції
+      - name: include
+        in: query
+        type: string
+        enum: [song]
+        description: Додати назву пісні (тим самим запитом через JOIN)
+    responses:
+      200:
+        description: Завантаження користувача
+    """
+    User.query.get_or_404(user_id)
+    include = request.args.get("include")
+    if include not in (None, "", "song"):
+        abort(400, description="include must be 'song'")
+
+    columns = [UserDownload.download_id, UserDownload.song_id, UserDownload.download_date]
+    if include == "song":
+        columns.append(Song.title)
+    stmt = select(*columns).where(UserDownload.user_id == user_id)
+    if include == "song":
+        stmt = stmt.join(Song, Song.song_id == UserDownload.song_id)
+
+    def serialize(row):
+        item = {"id": row.download_id, "song_id": row.song_id, "date": row.download_date}
+        if include == "song":
+            item["title"] = row.title
+        return item
+
+    keys = [UserDownload.download_date, UserDownload.download_id]
+    return paginate(stmt, keys, serialize, descending=True, scalars=False)
 
 
 # ----------------- DOWNLOADS -----------------
+def download_to_dict(d):
+    return {
+        "id": d.download_id,
+        "user_id": d.user_id,
+        "song_id": d.song_id,
+        "date": d.download_date
+    }
+
 @api.route("/downloads", methods=["GET"])
 def get_downloads():
     """
@@ -623,18 +1057,29 @@ def get_downloads():
     ---
     tags:
       - Downloads
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Розмір сторінки (за замовчуванням API_PAGE_SIZE)
+      - name: after
+        in: query
+        type: string
+        description: Курсор наступної сторінки з заголовка X-Next-Cursor
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        description: Потокова віддача всієї колекції
     responses:
       200:
         description: Список завантажень
     """
-    downloads = UserDownload.query.all()
-    return jsonify([{
-        "user_id": d.user_id,
-        "song_id": d.song_id,
-        "date": d.download_date
-    } for d in downloads])
+    stmt = select(UserDownload.download_id, UserDownload.user_id, UserDownload.song_id, UserDownload.download_date)
+    return paginate(stmt, [UserDownload.download_id], download_to_dict, scalars=False)
 
 @api.route("/downloads", methods=["POST"])
+@idempotency.idempotent
 def add_download():
     """
     Додати завантаження пісні
@@ -642,6 +1087,10 @@ def add_download():
     tags:
       - Downloads
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        description: Повтор з тим самим ключем повертає збережену відповідь без повторного запису
       - in: body
         name: body
         schema:
@@ -653,13 +1102,86 @@ def add_download():
     responses:
       200:
         description: Завантаження збережено
+      202:
+        description: Завантаження прийнято у write-behind чергу
+      404:
+        description: Пісню або користувача не знайдено
+      503:
+        description: Черга завантажень переповнена
     """
     data = request.json
+    # Перевірка за первинними ключами до запису: 404 однаково в обох режимах
+    known = db.session.execute(
+        select(
+            select(Song.song_id).where(Song.song_id == data["song_id"]).exists(),
+            select(User.user_id).where(User.user_id == data["user_id"]).exists(),
+        )
+    ).one()
+    if not all(known):
+        abort(404)
+    if download_buffer.enabled:
+        if not download_buffer.submit(data["user_id"], data["song_id"], datetime.now()):
+            return jsonify({"message": "Download queue is full"}), 503, {"Retry-After": "1"}
+        return jsonify({"message": "Download accepted"}), 202
+
+    # Атомарний інкремент на боці БД замість read-modify-write у Python
+    bumped = db.session.execute(
+        update(Song)
+        .where(Song.song_id == data["song_id"])
+        .values(downloads_count=func.coalesce(Song.downloads_count, 0) + 1)
+    )
+    if bumped.rowcount == 0:
+        db.session.rollback()
+        abort(404)
+
     download = UserDownload(user_id=data["user_id"], song_id=data["song_id"], download_date=datetime.now())
     db.session.add(download)
+    record_downloads([(download.song_id, download.download_date)])
+    db.session.commit()
+    return jsonify({"message": "Download saved", "id": download.download_id})
+
+@api.route("/downloads/buffer", methods=["GET"])
+def get_download_buffer():
+    """
+    Стан write-behind буфера завантажень
+    ---
+    tags:
+      - Downloads
+    responses:
+      200:
+        description: Глибина черги, кількість записаних подій і затримка скидання
+    """
+    return jsonify(download_buffer.metrics())
 
-    song = Song.query.get(data["song_id"])
-    song.downloads_count += 1
 
-    db.session.commit()
-    return jsonify({"message": "Download saved"})
+# ----------------- CACHE -----------------
+@api.route("/cache", methods=["GET"])
+def get_cache_stats():
+    """
+    Статистика кешу відповідей
+    ---
+    tags:
+      - Cache
+    responses:
+      200:
+        description: Лічильники hit/miss/304 та кількість записів
+    """
+    return jsonify(response_cache.metrics())
+
+
+# ----------------- HEALTH -----------------
+@api.route("/health/pool", methods=["GET"])
+def get_pool_health():
+    """
+    Стан пулу з'єднань з БД
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: Розмір пулу, зайняті з'єднання, overflow, час очікування та стан реплік
+    """
+    stats = pool_stats(db.engine)
+    if replica_set.engines:
+        stats["replicas"] = replica_set.metrics()
+    return jsonify(stats)
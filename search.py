@@ -0,0 +1,288 @@
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+from flask import Blueprint, abort, current_app, jsonify
+from sqlalchemy import select
+
+from models import db, Song, Author, Album
+from pagination import query_arg
+
+search_api = Blueprint("search_api", __name__)
+
+KINDS = ("song", "author", "album")
+KIND_MODELS = {
+    "song": (Song.song_id, Song.title),
+    "author": (Author.author_id, Author.name),
+    "album": (Album.album_id, Album.title),
+}
+
+TOKEN_RE = re.compile(r"\w+")
+APOSTROPHES = str.maketrans("", "", "'’ʼ`")
+
+
+def tokenize(text):
+    """Unicode-токени: NFC + casefold, апостроф усередині слова не розриває його (п'ять -> пять)."""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFC", text).casefold().translate(APOSTROPHES)
+    return TOKEN_RE.findall(text)
+
+
+# ----------------- ІНДЕКС -----------------
+class InvertedIndex:
+    """
+    Токен -> array('Q') ключів документів.
+
+    Ключ документа пакує id, тип і кількість токенів у назві в одне
+    64-бітне число: (id << 7) | (min(n, 31) << 2) | kind. Це дає
+    компактні postings без окремої таблиці документів, а довжина
+    потрібна лише для ранжування.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self._sorted = None
+
+    @staticmethod
+    def doc_key(kind, id_, tokens):
+        return (id_ << 7) | (min(len(tokens), 31) << 2) | KINDS.index(kind)
+
+    @staticmethod
+    def unpack(key):
+        return KINDS[key & 3], key >> 7, (key >> 2) & 31
+
+    def add(self, kind, id_, text):
+        tokens = tokenize(text)
+        key = self.doc_key(kind, id_, tokens)
+        for token in set(tokens):
+            posting = self.postings.get(token)
+            if posting is None:
+                self.postings[token] = array("Q", (key,))
+                self._sorted = None
+            else:
+                posting.append(key)
+
+    def remove(self, kind, id_, text):
+        tokens = tokenize(text)
+        key = self.doc_key(kind, id_, tokens)
+        for token in set(tokens):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            try:
+                posting.remove(key)
+            except ValueError:
+                continue
+            if not posting:
+                del self.postings[token]
+                self._sorted = None
+
+    def prefixed(self, prefix, limit):
+        if self._sorted is None:
+            self._sorted = sorted(self.postings)
+        i = bisect_left(self._sorted, prefix)
+        found = []
+        while i < len(self._sorted) and self._sorted[i].startswith(prefix) and len(found) < limit:
+            found.append(self._sorted[i])
+            i += 1
+        return found
+
+    def search(self, query, limit, kinds=KINDS, max_expansion=100):
+        """
+        Точний збіг токена важить 1.0, збіг за префіксом останнього
+        токена запиту (пошук під час набору) — 0.5. Сума ділиться на
+        корінь довжини назви, тож коротші точні назви йдуть вище.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        allowed = {KINDS.index(k) for k in kinds}
+        scores = {}
+        for position, token in enumerate(tokens):
+            weights = {}
+            for key in self.postings.get(token, ()):
+                weights[key] = 1.0
+            if position == len(tokens) - 1:
+                for other in self.prefixed(token, max_expansion):
+                    if other == token:
+                        continue
+                    for key in self.postings.get(other, ()):
+                        weights.setdefault(key, 0.5)
+            for key, weight in weights.items():
+                if key & 3 in allowed:
+                    scores[key] = scores.get(key, 0.0) + weight
+
+        ranked = ((key, score / (((key >> 2) & 31) or 1) ** 0.5) for key, score in scores.items())
+        return heapq.nlargest(limit, ranked, key=lambda kv: (kv[1], -kv[0]))
+
+
+class SearchIndex:
+    """
+    Власник індексу воркера: ліниво будує його з БД, застосовує
+    інкрементальні зміни від обробників POST/PUT/DELETE і періодично
+    перебудовує у фоні (SEARCH_REFRESH_SECONDS), щоб підхопити зміни,
+    зроблені іншими воркерами. Зміни під час перебудови журналюються
+    і застосовуються до нового індексу перед підміною.
+    """
+
+    def __init__(self, app=None):
+        self.index = None
+        self.built_at = 0.0
+        self.stale = False
+        self._journal = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["search_index"] = self
+
+    # ----------------- ПОБУДОВА -----------------
+    def build(self):
+        index = InvertedIndex()
+        batch = self.app.config.get("API_STREAM_BATCH_SIZE", 500)
+        with self.app.app_context():
+            for kind, (id_col, text_col) in KIND_MODELS.items():
+                rows = db.session.execute(select(id_col, text_col).execution_options(yield_per=batch))
+                for id_, text in rows:
+                    index.add(kind, id_, text)
+            db.session.remove()
+        return index
+
+    def _rebuild_locked(self):
+        with self._lock:
+            self._journal = []
+            self.stale = False
+        try:
+            index = self.build()
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            for op, args in self._journal:
+                getattr(index, op)(*args)
+            self.index = index
+            self._journal = None
+            self.built_at = time.monotonic()
+
+    def rebuild(self):
+        if self._build_lock.acquire(blocking=False):
+            try:
+                self._rebuild_locked()
+            finally:
+                self._build_lock.release()
+
+    def ready_index(self):
+        if self.index is None:
+            # Перший пошук у воркері чекає на побудову
+            with self._build_lock:
+                if self.index is None:
+                    self._rebuild_locked()
+            return self.index
+        refresh = self.app.config.get("SEARCH_REFRESH_SECONDS", 300)
+        expired = refresh and time.monotonic() - self.built_at > refresh
+        if (self.stale or expired) and not self._build_lock.locked():
+            threading.Thread(target=self.rebuild, name="search-rebuild", daemon=True).start()
+        return self.index
+
+    def search(self, query, limit, kinds=KINDS, max_expansion=100):
+        """
+        Пошук під тим самим локом, що й інкрементальні зміни: обробники
+        POST/PUT/DELETE в інших потоках воркера (gthread) змінюють
+        postings на місці.
+        """
+        index = self.ready_index()
+        with self._lock:
+            return index.search(query, limit, kinds, max_expansion)
+
+    def reset(self):
+        """Масові зміни (bulk) — індекс перебудовується у фоні при наступному пошуку."""
+        self.stale = True
+
+    # ----------------- ІНКРЕМЕНТАЛЬНІ ЗМІНИ -----------------
+    def _apply(self, op, *args):
+        with self._lock:
+            if self.index is not None:
+                getattr(self.index, op)(*args)
+            if self._journal is not None:
+                self._journal.append((op, args))
+
+    def added(self, kind, id_, text):
+        self._apply("add", kind, id_, text)
+
+    def removed(self, kind, id_, text):
+        self._apply("remove", kind, id_, text)
+
+    def changed(self, kind, id_, old_text, new_text):
+        if old_text != new_text:
+            self._apply("remove", kind, id_, old_text)
+            self._apply("add", kind, id_, new_text)
+
+
+search_index = SearchIndex()
+
+
+# ----------------- ROUTES -----------------
+@search_api.route("/search", methods=["GET"])
+def search_catalog():
+    """
+    Повнотекстовий пошук пісень, авторів і альбомів
+    ---
+    tags:
+      - Search
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Запит; останнє слово шукається і як префікс
+      - name: type
+        in: query
+        type: string
+        description: Типи через кому (song, author, album)
+      - name: limit
+        in: query
+        type: integer
+        default: 20
+    responses:
+      200:
+        description: Результати за спаданням релевантності
+    """
+    q = query_arg("q", str, "")
+    if not q.strip():
+        abort(400, description="q is required")
+    kinds = [k for k in query_arg("type", str, ",".join(KINDS)).split(",") if k]
+    if set(kinds) - set(KINDS):
+        abort(400, description="type must be song, author or album")
+    limit = query_arg("limit", int, 20)
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    limit = min(limit, current_app.config.get("API_MAX_PAGE_SIZE", 1000))
+
+    hits = search_index.search(q, limit, kinds, current_app.config.get("SEARCH_MAX_PREFIX_EXPANSION", 100))
+
+    # Назви підтягуються одним запитом на тип лише для знайдених id
+    ids = {}
+    for key, _ in hits:
+        kind, id_, _ = InvertedIndex.unpack(key)
+        ids.setdefault(kind, []).append(id_)
+    titles = {}
+    for kind, kind_ids in ids.items():
+        id_col, text_col = KIND_MODELS[kind]
+        for id_, text in db.session.execute(select(id_col, text_col).where(id_col.in_(kind_ids))):
+            titles[kind, id_] = text
+
+    results = []
+    for key, score in hits:
+        kind, id_, _ = InvertedIndex.unpack(key)
+        if (kind, id_) in titles:
+            results.append({"type": kind, "id": id_, "title": titles[kind, id_], "score": round(score, 4)})
+    return jsonify(results)
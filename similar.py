@@ -0,0 +1,213 @@
+import logging
+import time
+
+from flask import Blueprint, abort, current_app, jsonify
+from sqlalchemy import delete, insert, select
+
+from models import db, Song, SongSimilar, UserDownload
+from maintenance import set_watermark
+from pagination import query_arg
+
+# numpy / scipy імпортуються лише для перерахунку моделі (load_numeric): веб-воркерам вони не потрібні
+np = sparse = None
+
+log = logging.getLogger(__name__)
+
+similar_api = Blueprint("similar_api", __name__)
+
+WATERMARK = "song_similar"
+
+
+def load_numeric():
+    global np, sparse
+    if np is None:
+        try:
+            import numpy as np
+            from scipy import sparse
+        except ImportError:  # необов'язкові залежності
+            return False
+    return True
+
+
+# ----------------- МОДЕЛЬ -----------------
+class SimilarityModel:
+    """
+    Item-item модель «хто завантажив цю пісню, завантажував і ці».
+
+    Тримає розріджену бінарну матрицю користувач × пісня (scipy CSR) і
+    водяний знак — останній врахований download_id. Перший refresh
+    читає весь журнал UserDownload і рахує сусідів для всіх пісень;
+    наступні дочитують лише нові події й перераховують тільки пісні
+    користувачів, у яких вони з'явились. Схожість — косинусна:
+    спільні слухачі / sqrt(слухачі a × слухачі b).
+
+    Результат — SIMILAR_TOP_K рядків на пісню в SongSimilar, тож
+    онлайн-запит — одне читання за первинним ключем.
+    """
+
+    def __init__(self, app):
+        if not load_numeric():
+            raise RuntimeError("Similarity model requires numpy and scipy")
+        self.app = app
+        self.top_k = app.config.get("SIMILAR_TOP_K", 20)
+        self.min_common = app.config.get("SIMILAR_MIN_COOCCURRENCE", 2)
+        self.block_size = app.config.get("SIMILAR_BLOCK_SIZE", 1000)
+        self.read_batch = app.config.get("EXPORT_CHUNK_SIZE", 10000)
+        self.matrix = None
+        self.watermark = 0
+
+    def load(self, after):
+        """Пари (user_id, song_id) подій з download_id > after пачками, без ORM-об'єктів."""
+        stmt = (
+            select(UserDownload.download_id, UserDownload.user_id, UserDownload.song_id)
+            .order_by(UserDownload.download_id)
+            .limit(self.read_batch)
+        )
+        users, songs = [], []
+        last = after
+        while True:
+            rows = db.session.execute(stmt.where(UserDownload.download_id > last)).all()
+            if not rows:
+                break
+            chunk = np.array(rows, dtype=np.int64)
+            users.append(chunk[:, 1])
+            songs.append(chunk[:, 2])
+            last = int(chunk[-1, 0])
+            if len(rows) < self.read_batch:
+                break
+        if not users:
+            return np.empty(0, np.int64), np.empty(0, np.int64), last
+        return np.concatenate(users), np.concatenate(songs), last
+
+    def refresh(self, full=False):
+        """Повертає кількість пісень, для яких перераховано сусідів."""
+        with self.app.app_context():
+            try:
+                return self._refresh(full)
+            finally:
+                db.session.remove()
+
+    def _refresh(self, full):
+        if full or self.matrix is None:
+            self.matrix = None
+            self.watermark = 0
+        users, songs, last = self.load(self.watermark)
+        if not len(users) and self.matrix is not None:
+            return 0
+
+        shape = (int(users.max(initial=0)) + 1, int(songs.max(initial=0)) + 1)
+        if self.matrix is not None:
+            shape = (max(shape[0], self.matrix.shape[0]), max(shape[1], self.matrix.shape[1]))
+        delta = sparse.csr_matrix((np.ones(len(users), np.float32), (users, songs)), shape=shape)
+        if self.matrix is None:
+            matrix = delta
+            affected = np.unique(songs)
+        else:
+            self.matrix.resize(shape)
+            matrix = self.matrix + delta
+            # Сусіди змінюються в усіх пісень користувачів, що мають нові завантаження
+            affected = np.unique(matrix[np.unique(users)].indices)
+        matrix.data[:] = 1.0  # повторні завантаження не посилюють зв'язок
+
+        # Видалені (каскадом) пісні прибираються з матриці: інакше вони знову
+        # з'являться в SongSimilar як сусіди і порушать FK
+        known = self.known_songs(shape[1])
+        matrix = (matrix @ sparse.diags(known.astype(np.float32))).tocsr()
+        matrix.eliminate_zeros()
+        affected = affected[known[affected]]
+
+        self.write_neighbours(matrix, affected)
+        set_watermark(WATERMARK, last)
+        db.session.commit()
+        # Модель у пам'яті змінюється лише після успішного запису
+        self.matrix = matrix
+        self.watermark = last
+        return len(affected)
+
+    def known_songs(self, size):
+        """Маска song_id < size, що досі є в Song."""
+        known = np.zeros(size, bool)
+        stmt = select(Song.song_id).execution_options(yield_per=self.read_batch)
+        for ids in db.session.execute(stmt).scalars().partitions():
+            ids = np.asarray(ids, np.int64)
+            known[ids[ids < size]] = True
+        return known
+
+    def write_neighbours(self, matrix, affected):
+        by_song = matrix.T.tocsr()
+        listeners = np.asarray(matrix.sum(axis=0)).ravel()
+        for start in range(0, len(affected), self.block_size):
+            block = affected[start:start + self.block_size]
+            common = (by_song[block] @ matrix).tocsr()  # спільні слухачі: блок × усі пісні
+            rows = []
+            for i, song_id in enumerate(block):
+                lo, hi = common.indptr[i], common.indptr[i + 1]
+                others, counts = common.indices[lo:hi], common.data[lo:hi]
+                keep = (others != song_id) & (counts >= self.min_common)
+                others, counts = others[keep], counts[keep]
+                if not len(others):
+                    continue
+                scores = counts / np.sqrt(listeners[song_id] * listeners[others])
+                top = np.argsort(-scores, kind="stable")[:self.top_k]
+                rows.extend(
+                    {"song_id": int(song_id), "rank": rank, "similar_song_id": int(others[j]),
+                     "score": round(float(scores[j]), 6)}
+                    for rank, j in enumerate(top)
+                )
+            db.session.execute(delete(SongSimilar).where(SongSimilar.song_id.in_(block.tolist())))
+            if rows:
+                db.session.execute(insert(SongSimilar.__table__), rows)
+            db.session.commit()
+
+
+def run_worker(app, interval, full=False):
+    """Довгоживучий фоновий процес: модель у пам'яті, інкрементальний refresh кожні interval с."""
+    model = SimilarityModel(app)
+    while True:
+        started = time.perf_counter()
+        try:
+            updated = model.refresh(full)
+            log.info("Similar songs refreshed for %d songs in %.1fs", updated, time.perf_counter() - started)
+        except Exception:
+            log.exception("Similar songs refresh failed")
+        full = False
+        time.sleep(interval)
+
+
+# ----------------- ROUTES -----------------
+@similar_api.route("/songs/<int:song_id>/similar", methods=["GET"])
+def get_similar_songs(song_id):
+    """
+    Схожі пісні: ті, що завантажували разом з цією
+    ---
+    tags:
+      - Songs
+    parameters:
+      - name: song_id
+        in: path
+        required: true
+        schema: { type: integer }
+      - name: limit
+        in: query
+        type: integer
+        default: 10
+    responses:
+      200:
+        description: Пісні за спаданням схожості (порожньо, доки модель не пораховано)
+      404:
+        description: Пісню не знайдено
+    """
+    limit = query_arg("limit", int, 10)
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    limit = min(limit, current_app.config.get("SIMILAR_TOP_K", 20))
+    Song.query.get_or_404(song_id)
+
+    rows = db.session.execute(
+        select(Song.song_id, Song.title, SongSimilar.score)
+        .join(Song, Song.song_id == SongSimilar.similar_song_id)
+        .where(SongSimilar.song_id == song_id)
+        .order_by(SongSimilar.rank)
+        .limit(limit)
+    )
+    return jsonify([{"id": id_, "title": title, "score": score} for id_, title, score in rows])
@@ -0,0 +1,266 @@
+import logging
+from datetime import date, datetime, time, timedelta
+
+from flask import Blueprint, abort, current_app, jsonify, request
+from sqlalchemy import bindparam, delete, func, insert, literal, select, update
+
+from models import db, Album, Genre, Label, Song, SongDownloadDaily, UserDownload
+from cache import response_cache
+from maintenance import get_watermark, set_watermark
+from pagination import query_arg
+
+log = logging.getLogger(__name__)
+
+stats_api = Blueprint("stats_api", __name__)
+
+WATERMARK = "stats_daily"
+
+# group_by -> (id, назва); джойни від SongDownloadDaily через Song -> Album -> Label
+GROUPS = {
+    "song": (SongDownloadDaily.song_id, Song.title),
+    "album": (Song.album_id, Album.title),
+    "label": (Album.label_id, Label.name),
+    "genre": (Song.genre_id, Genre.name),
+}
+
+
+# ----------------- МАТЕРІАЛІЗАЦІЯ -----------------
+def as_date(value):
+    # func.date повертає date у MySQL і рядок 'YYYY-MM-DD' у SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def refresh_day(day):
+    """Перерахувати підсумки одного дня з сирих подій (діапазон по ix_userdownload_date)."""
+    start = datetime.combine(day, time.min)
+    totals = (
+        select(
+            UserDownload.song_id,
+            literal(day, SongDownloadDaily.day.type),
+            func.count(),
+            func.coalesce(func.sum(Song.price), 0),
+        )
+        .join(Song, Song.song_id == UserDownload.song_id)
+        .where(UserDownload.download_date >= start, UserDownload.download_date < start + timedelta(days=1))
+        .group_by(UserDownload.song_id)
+    )
+    db.session.execute(delete(SongDownloadDaily).where(SongDownloadDaily.day == day))
+    db.session.execute(
+        insert(SongDownloadDaily).from_select(["song_id", "day", "downloads", "revenue"], totals)
+    )
+
+
+def watermark_day(last):
+    """День події, на якій зупинився попередній перерахунок (за PK, без сканування)."""
+    value = db.session.scalar(
+        select(UserDownload.download_date)
+        .where(UserDownload.download_id <= last)
+        .order_by(UserDownload.download_id.desc())
+        .limit(1)
+    )
+    return value.date() if value is not None else None
+
+
+def refresh_daily_stats(full=False):
+    """
+    Дорахувати SongDownloadDaily: перераховуються дні, у яких з'явились
+    події з download_id після водяного знака (зазвичай — сьогодні), і
+    STATS_REFRESH_LAG_DAYS днів до дня водяного знака включно — id
+    видається до коміту, тож подія з меншим id може стати видимою вже
+    після перерахунку. Кожен день — повністю, тож повтор безпечний.
+    full — усе з нуля. Повертає перераховані дні.
+    """
+    last = 0 if full else get_watermark(WATERMARK)
+    newest = db.session.scalar(select(func.max(UserDownload.download_id)))
+    if newest is None:
+        return []
+    if full:
+        db.session.execute(delete(SongDownloadDaily))
+    days = {as_date(day) for day in db.session.scalars(
+        select(func.date(UserDownload.download_date))
+        .where(UserDownload.download_id > last, UserDownload.download_id <= newest)
+        .distinct()
+    )}
+    last_day = watermark_day(last) if last else None
+    if last_day is not None:
+        lag = current_app.config.get("STATS_REFRESH_LAG_DAYS", 1)
+        days.update(last_day - timedelta(days=n) for n in range(lag + 1))
+    days = sorted(days)
+    for day in days:
+        refresh_day(day)
+        db.session.commit()
+    set_watermark(WATERMARK, max(newest, last))
+    db.session.commit()
+    response_cache.invalidate("stats")
+    log.info("Daily stats refreshed for %d days up to download %s", len(days), newest)
+    return days
+
+
+def uncount_daily(condition):
+    """
+    Відняти з SongDownloadDaily події UserDownload під `condition`, які
+    вже враховані (download_id не більший за водяний знак); решту
+    порахує наступний перерахунок із сирих подій. Викликати до DELETE.
+    """
+    last = get_watermark(WATERMARK)
+    if not last:
+        return
+    day = func.date(UserDownload.download_date)
+    totals = db.session.execute(
+        select(UserDownload.song_id, day, func.count(), func.coalesce(func.sum(Song.price), 0))
+        .join(Song, Song.song_id == UserDownload.song_id)
+        .where(condition, UserDownload.download_id <= last)
+        .group_by(UserDownload.song_id, day)
+    ).all()
+    if not totals:
+        return
+    daily = SongDownloadDaily.__table__
+    db.session.execute(
+        update(daily)
+        .where(daily.c.song_id == bindparam("b_song_id"), daily.c.day == bindparam("b_day"))
+        .values(downloads=daily.c.downloads - bindparam("b_downloads"),
+                revenue=daily.c.revenue - bindparam("b_revenue")),
+        [{"b_song_id": song_id, "b_day": as_date(d), "b_downloads": n, "b_revenue": revenue}
+         for song_id, d, n, revenue in totals],
+    )
+    db.session.execute(delete(SongDownloadDaily).where(SongDownloadDaily.downloads <= 0))
+
+
+# ----------------- ROUTES -----------------
+def stats_response(metric):
+    group_by = request.args.get("group_by", "song")
+    if group_by not in GROUPS:
+        abort(400, description=f"group_by must be one of: {', '.join(GROUPS)}")
+    interval = request.args.get("interval", "total")
+    if interval not in ("total", "day"):
+        abort(400, description="interval must be 'total' or 'day'")
+    start = query_arg("from", date.fromisoformat)
+    end = query_arg("to", date.fromisoformat)
+    limit = query_arg("limit", int, current_app.config.get("API_PAGE_SIZE", 100))
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    limit = min(limit, current_app.config.get("API_MAX_PAGE_SIZE", 1000))
+
+    group_id, name = GROUPS[group_by]
+    downloads = func.sum(SongDownloadDaily.downloads).label("downloads")
+    revenue = func.sum(SongDownloadDaily.revenue).label("revenue")
+    ranking = ((revenue if metric == "revenue" else downloads).desc(), group_id)
+    columns = [group_id, name]
+    if interval == "day":
+        columns.append(SongDownloadDaily.day)
+    stmt = (
+        select(*columns, downloads, revenue)
+        .select_from(SongDownloadDaily)
+        .join(Song, Song.song_id == SongDownloadDaily.song_id)
+        .group_by(*columns)
+    )
+    if group_by in ("album", "label"):
+        stmt = stmt.outerjoin(Album, Album.album_id == Song.album_id)
+    if group_by == "label":
+        stmt = stmt.outerjoin(Label, Label.label_id == Album.label_id)
+    if group_by == "genre":
+        stmt = stmt.outerjoin(Genre, Genre.genre_id == Song.genre_id)
+    if start is not None:
+        stmt = stmt.where(SongDownloadDaily.day >= start)
+    if end is not None:
+        stmt = stmt.where(SongDownloadDaily.day < end)
+
+    if interval == "day":
+        # limit діє в межах кожного дня: ранг групи всередині дня віконною функцією
+        rank = func.row_number().over(partition_by=SongDownloadDaily.day, order_by=ranking).label("day_rank")
+        ranked = stmt.add_columns(rank).subquery()
+        stmt = select(ranked).where(ranked.c.day_rank <= limit).order_by(ranked.c.day, ranked.c.day_rank)
+    else:
+        stmt = stmt.order_by(*ranking).limit(limit)
+
+    items = []
+    for row in db.session.execute(stmt):
+        item = {f"{group_by}_id": row[0], "name": row[1]}
+        if interval == "day":
+            item["day"] = row[2].isoformat()
+        item["downloads"] = int(row.downloads)
+        if metric == "revenue":
+            item["revenue"] = float(row.revenue)
+        items.append(item)
+    return jsonify(items)
+
+
+@stats_api.route("/stats/revenue", methods=["GET"])
+@response_cache.cached("stats", ttl_key="STATS_CACHE_TTL")
+def get_revenue_stats():
+    """
+    Виручка (сума цін завантажених пісень) за піснею, альбомом, лейблом або жанром
+    ---
+    tags:
+      - Stats
+    parameters:
+      - name: group_by
+        in: query
+        type: string
+        enum: [song, album, label, genre]
+        default: song
+      - name: interval
+        in: query
+        type: string
+        enum: [total, day]
+        default: total
+        description: total — за весь діапазон, day — окремий рядок на кожен день
+      - name: from
+        in: query
+        type: string
+        description: Перший день (YYYY-MM-DD), включно
+      - name: to
+        in: query
+        type: string
+        description: Останній день (YYYY-MM-DD), не включно
+      - name: limit
+        in: query
+        type: integer
+        description: Скільки груп повернути (за interval=day — на кожен день)
+    responses:
+      200:
+        description: Групи за спаданням виручки (за interval=day — у межах кожного дня)
+      400:
+        description: Некоректні параметри
+    """
+    return stats_response("revenue")
+
+
+@stats_api.route("/stats/downloads", methods=["GET"])
+@response_cache.cached("stats", ttl_key="STATS_CACHE_TTL")
+def get_download_stats():
+    """
+    Кількість завантажень за піснею, альбомом, лейблом або жанром
+    ---
+    tags:
+      - Stats
+    parameters:
+      - name: group_by
+        in: query
+        type: string
+        enum: [song, album, label, genre]
+        default: song
+      - name: interval
+        in: query
+        type: string
+        enum: [total, day]
+        default: total
+      - name: from
+        in: query
+        type: string
+        description: Перший день (YYYY-MM-DD), включно
+      - name: to
+        in: query
+        type: string
+        description: Останній день (YYYY-MM-DD), не включно
+      - name: limit
+        in: query
+        type: integer
+        description: Скільки груп повернути (за interval=day — на кожен день)
+    responses:
+      200:
+        description: Групи за спаданням кількості завантажень
+      400:
+        description: Некоректні параметри
+    """
+    return stats_response("downloads")
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import Config, engine_options  # noqa: E402
+from models import db, Genre, Song, User  # noqa: E402
+
+
+def sqlite_uri(path):
+    return f"sqlite:///{path}"
+
+
+def make_config(tmp_path, **overrides):
+    """Config застосунку над тимчасовим SQLite-файлом, без реплік, документації й лімітів."""
+    uri = sqlite_uri(tmp_path / "music.db")
+    attrs = {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "SQLALCHEMY_ENGINE_OPTIONS": engine_options(uri),
+        "SQLALCHEMY_REPLICA_URIS": [],
+        "SQLALCHEMY_BINDS": {},
+        "DB_STARTUP_CHECK": False,
+        "SWAGGER_MODE": "off",
+        "CACHE_ENABLED": False,
+        "RATE_LIMIT_ENABLED": False,
+        "METRICS_ENABLED": False,
+        "DOWNLOADS_WRITE_BEHIND": False,
+        "SEARCH_REFRESH_SECONDS": 0,
+    }
+    attrs.update(overrides)
+    return type("TestConfig", (Config,), attrs)
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    apps = []
+
+    def factory(**overrides):
+        app = create_app(make_config(tmp_path, **overrides))
+        with app.app_context():
+            db.create_all(bind_key=None)
+        apps.append(app)
+        return app
+
+    yield factory
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def seed_catalog(app, songs=2, users=1):
+    """Жанр, `songs` пісень і `users` користувачів; повертає їхні id."""
+    with app.app_context():
+        genre = Genre(name="Rock")
+        db.session.add(genre)
+        db.session.flush()
+        song_objs = [Song(title=f"Song {i}", price=1, genre_id=genre.genre_id) for i in range(songs)]
+        user_objs = [User(username=f"user{i}", email=f"user{i}@example.com") for i in range(users)]
+        db.session.add_all(song_objs + user_objs)
+        db.session.commit()
+        ids = [s.song_id for s in song_objs], [u.user_id for u in user_objs]
+        db.session.remove()
+        return ids
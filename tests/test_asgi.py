@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("a2wsgi")
+pytest.importorskip("httpx")
+
+from starlette.testclient import TestClient  # noqa: E402
+
+import asgi  # noqa: E402
+from conftest import seed_catalog  # noqa: E402
+from models import db  # noqa: E402
+
+
+@pytest.mark.parametrize("path", ["/api/songs?limit=2", "/api/users?limit=1", "/api/downloads?limit=2"])
+def test_async_lists_match_flask(client, app, monkeypatch, path):
+    songs, users = seed_catalog(app, songs=3, users=2)
+    for song_id in songs:
+        client.post("/api/downloads", json={"user_id": users[0], "song_id": song_id})
+    with app.app_context():
+        uri = str(db.engine.url)
+
+    engine = asgi.create_async_engine(uri.replace("sqlite://", "sqlite+aiosqlite://"))
+    monkeypatch.setattr(asgi, "Session", asgi.async_sessionmaker(engine, expire_on_commit=False))
+    with TestClient(asgi.app) as async_client:
+        native = async_client.get(path)
+        second = async_client.get(path.split("?")[0] + f"?limit=50&after={native.headers['X-Next-Cursor']}")
+    expected = client.get(path)
+
+    assert native.json() == expected.get_json()
+    assert native.headers["X-Next-Cursor"] == expected.headers["X-Next-Cursor"]
+    assert second.status_code == 200 and second.json()
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from conftest import seed_catalog
+from models import db, Genre, Song, SongDownloadHourly, User, UserDownload
+
+
+def test_bulk_create_returns_ids_in_row_order(client, app):
+    response = client.post("/api/songs/bulk", json=[
+        {"title": "A", "price": 2},
+        {"title": "B"},
+        {"title": "C", "price": 3},
+    ])
+    body = response.get_json()
+    assert body["ok"] == 3
+    with app.app_context():
+        titles = {s.song_id: (s.title, float(s.price)) for s in db.session.scalars(select(Song))}
+    assert [titles[r["id"]] for r in body["results"]] == [("A", 2.0), ("B", 0.0), ("C", 3.0)]
+
+
+def test_bulk_delete_single_key_entity(client, app):
+    created = client.post("/api/genres/bulk", json=[{"name": "Jazz"}, {"name": "Blues"}, {"name": "Folk"}])
+    ids = [r["id"] for r in created.get_json()["results"]]
+
+    response = client.delete("/api/genres/bulk", json=[{"id": ids[0]}, {"id": ids[2]}, {"id": 999}])
+    body = response.get_json()
+    assert body["ok"] == 2
+    assert body["results"][2] == {"index": 2, "error": "Not found"}
+    with app.app_context():
+        assert db.session.scalars(select(Genre.name)).all() == ["Blues"]
+
+
+def test_bulk_downloads_keep_counters_in_step(client, app):
+    (song_id,), (user_id,) = seed_catalog(app, songs=1)
+    now = datetime.now().replace(microsecond=0).isoformat()
+
+    created = client.post("/api/downloads/bulk", json=[{"user_id": user_id, "song_id": song_id, "download_date": now}] * 5)
+    ids = [r["id"] for r in created.get_json()["results"]]
+    client.delete("/api/downloads/bulk", json=[{"id": id_} for id_ in ids[:2]])
+
+    with app.app_context():
+        assert db.session.get(Song, song_id).downloads_count == 3
+        assert db.session.scalar(select(func.count()).select_from(UserDownload)) == 3
+        assert db.session.scalar(select(func.sum(SongDownloadHourly.downloads))) == 3
+
+
+def test_bulk_delete_follows_on_delete_mode(client, app):
+    (played, idle), (user_id,) = seed_catalog(app, songs=2)
+    client.post("/api/downloads", json={"user_id": user_id, "song_id": played})
+
+    restricted = client.delete("/api/songs/bulk", json=[{"id": played}, {"id": idle}]).get_json()
+    assert restricted["ok"] == 1
+    assert restricted["results"][0]["error"] == "Referenced by UserDownload (1), use on_delete=cascade"
+
+    cascaded = client.delete("/api/songs/bulk?on_delete=cascade", json=[{"id": played}]).get_json()
+    assert cascaded["ok"] == 1
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(Song)) == 0
+        assert db.session.scalar(select(func.count()).select_from(UserDownload)) == 0
+        assert db.session.scalar(select(func.count()).select_from(SongDownloadHourly)) == 0
+
+
+def test_bulk_create_ids_without_executemany_returning(client, app, monkeypatch):
+    # Як на MySQL: RETURNING для executemany немає
+    with app.app_context():
+        monkeypatch.setattr(db.engine.dialect, "insert_executemany_returning_sort_by_parameter_order", False)
+
+    songs = client.post("/api/songs/bulk", json=[{"title": "A"}, {"title": "B", "price": 2}, {"title": "C"}]).get_json()
+    users = client.post("/api/users/bulk", json=[
+        {"username": "ann", "email": "ann@example.com"}, {"username": "bob", "email": "bob@example.com"},
+    ]).get_json()
+
+    with app.app_context():
+        titles = dict(db.session.execute(select(Song.song_id, Song.title)).all())
+        usernames = dict(db.session.execute(select(User.user_id, User.username)).all())
+    assert [titles[r["id"]] for r in songs["results"]] == ["A", "B", "C"]
+    assert [usernames[r["id"]] for r in users["results"]] == ["ann", "bob"]
+
+
+def test_bulk_downloads_invalidate_charts_cache(make_app):
+    app = make_app(CACHE_ENABLED=True)
+    client = app.test_client()
+    (song_id,), (user_id,) = seed_catalog(app, songs=1)
+    assert client.get("/api/charts/top").get_json()[0]["downloads"] == 0
+
+    created = client.post("/api/downloads/bulk", json=[{"user_id": user_id, "song_id": song_id}] * 2)
+    assert client.get("/api/charts/top").get_json()[0]["downloads"] == 2
+    assert client.get("/api/charts/trending").get_json()[0]["downloads"] == 2
+
+    client.delete("/api/downloads/bulk", json=[{"id": created.get_json()["results"][0]["id"]}])
+    assert client.get("/api/charts/top").get_json()[0]["downloads"] == 1
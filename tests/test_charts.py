@@ -0,0 +1,24 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+import charts
+from charts import hourly_upsert
+from conftest import seed_catalog
+from models import db, SongDownloadHourly
+
+
+def test_hourly_upsert_on_postgresql():
+    sql = str(hourly_upsert("postgresql").compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (song_id, bucket) DO UPDATE" in sql
+
+
+def test_portable_rollup_without_native_upsert(client, app, monkeypatch):
+    (song_id,), (user_id,) = seed_catalog(app, songs=1)
+    monkeypatch.setattr(charts, "hourly_upsert", lambda dialect: None)
+
+    for _ in range(3):
+        assert client.post("/api/downloads", json={"user_id": user_id, "song_id": song_id}).status_code == 200
+
+    with app.app_context():
+        assert db.session.execute(select(SongDownloadHourly.song_id, SongDownloadHourly.downloads)).all() == [(song_id, 3)]
+    assert client.get("/api/charts/trending").get_json()[0]["downloads"] == 3
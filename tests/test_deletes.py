@@ -0,0 +1,19 @@
+from conftest import seed_catalog
+from models import db, Genre
+
+
+def test_restrict_hint_depends_on_nullable_references(client, app):
+    (song_id,), (user_id,) = seed_catalog(app, songs=1)
+    client.post("/api/downloads", json={"user_id": user_id, "song_id": song_id})
+
+    # UserDownload.song_id NOT NULL: nullify не допоможе
+    response = client.delete(f"/api/songs/{song_id}")
+    assert response.status_code == 409
+    assert response.get_json()["message"].endswith("use on_delete=cascade")
+
+    # Song.genre_id nullable
+    with app.app_context():
+        genre_id = db.session.scalar(db.select(Genre.genre_id))
+    response = client.delete(f"/api/genres/{genre_id}")
+    assert response.status_code == 409
+    assert response.get_json()["message"].endswith("use on_delete=nullify or cascade")
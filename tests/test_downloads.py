@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.exc import OperationalError
+
+from conftest import seed_catalog, sqlite_uri
+from config import engine_options
+from ingest import download_buffer
+from models import db, Song, UserDownload
+
+N = 1000
+WRITERS = 8
+
+
+def test_parallel_downloads_lose_no_updates(make_app, tmp_path):
+    # SQLite пише по одному: writer-и чекають на лок до 30 с, а не 5 за замовчуванням
+    options = engine_options(sqlite_uri(tmp_path / "music.db"))
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={**options, "connect_args": {"timeout": 30}})
+    (song_id,), (user_id,) = seed_catalog(app, songs=1)
+
+    def post(_):
+        return app.test_client().post("/api/downloads", json={"user_id": user_id, "song_id": song_id}).status_code
+
+    with ThreadPoolExecutor(max_workers=WRITERS) as pool:
+        statuses = list(pool.map(post, range(N)))
+
+    assert statuses.count(200) == N
+    with app.app_context():
+        assert db.session.get(Song, song_id).downloads_count == N
+        assert db.session.scalar(select(func.count()).select_from(UserDownload)) == N
+
+
+def test_download_of_unknown_song_is_404(client, app):
+    _, (user_id,) = seed_catalog(app, songs=1)
+    assert client.post("/api/downloads", json={"user_id": user_id, "song_id": 999}).status_code == 404
+
+
+def test_write_behind_retries_batch_after_disconnect(make_app, monkeypatch):
+    app = make_app(DOWNLOADS_WRITE_BEHIND=True, DOWNLOADS_RETRY_BACKOFF_MS=1)
+    (song_id,), (user_id,) = seed_catalog(app, songs=1)
+    write_rows = download_buffer._write_rows
+    failures = iter([OperationalError("INSERT", {}, Exception("server has gone away"))])
+
+    def flaky(batch):
+        error = next(failures, None)
+        if error is not None:
+            raise error
+        return write_rows(batch)
+
+    monkeypatch.setattr(download_buffer, "_write_rows", flaky)
+    before = dict(download_buffer.stats)
+    download_buffer._write([(user_id, song_id, datetime.now())] * 3)
+
+    assert download_buffer.stats["retries"] - before["retries"] == 1
+    assert download_buffer.stats["dropped"] == before["dropped"]
+    with app.app_context():
+        assert db.session.get(Song, song_id).downloads_count == 3
+        assert db.session.scalar(select(func.count()).select_from(UserDownload)) == 3
+
+
+def test_write_behind_rejects_unknown_song_and_user(make_app):
+    app = make_app(DOWNLOADS_WRITE_BEHIND=True)
+    (song_id,), (user_id,) = seed_catalog(app, songs=1)
+    client = app.test_client()
+    before = download_buffer.stats["accepted"]
+
+    assert client.post("/api/downloads", json={"user_id": user_id, "song_id": 9999}).status_code == 404
+    assert client.post("/api/downloads", json={"user_id": 9999, "song_id": song_id}).status_code == 404
+    assert client.post("/api/downloads", json={"user_id": user_id, "song_id": song_id}).status_code == 202
+    assert download_buffer.stats["accepted"] - before == 1
+    download_buffer.flush()
+
+
+def seed_history(app):
+    songs, users = seed_catalog(app, songs=2, users=2)
+    same = datetime(2026, 10, 2, 9)
+    dates = [datetime(2026, 10, 1, 9), same, same, same, datetime(2026, 10, 3, 9)]
+    with app.app_context():
+        ids = db.session.scalars(insert(UserDownload).returning(UserDownload.download_id), [
+            {"user_id": users[0], "song_id": songs[i % 2], "download_date": d} for i, d in enumerate(dates)
+        ] + [{"user_id": users[1], "song_id": songs[0], "download_date": same}]).all()
+        db.session.commit()
+    return songs, users, ids[:5]
+
+
+def test_user_history_newest_first_across_pages(app, client):
+    songs, users, ids = seed_history(app)
+    url, items = f"/api/users/{users[0]}/downloads?limit=2", []
+    while url:
+        response = client.get(url)
+        items += response.get_json()
+        link = response.headers.get("Link")
+        url = link[link.index("<") + 1:link.index(">")] if link else None
+
+    # Ключ (download_date, download_id) за спаданням: однакові дати — за id, без пропусків на межі
+    assert [item["id"] for item in items] == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+    assert items[0]["date"] == "Sat, 03 Oct 2026 09:00:00 GMT"
+
+
+def test_user_history_include_song_and_errors(app, client):
+    songs, users, ids = seed_history(app)
+
+    first = client.get(f"/api/users/{users[0]}/downloads?include=song&limit=1").get_json()
+    assert first == [{"id": ids[4], "song_id": songs[0], "date": first[0]["date"], "title": "Song 0"}]
+    assert client.get(f"/api/users/{users[0]}/downloads?include=album").status_code == 400
+    assert client.get("/api/users/999/downloads").status_code == 404
+
+
+def test_user_history_uses_composite_index(app):
+    with app.app_context():
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT download_id FROM UserDownload WHERE user_id = 1 "
+            "ORDER BY download_date DESC, download_id DESC LIMIT 10"
+        )).all()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_userdownload_user_date" in detail
+    assert "TEMP B-TREE" not in detail
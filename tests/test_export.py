@@ -0,0 +1,92 @@
+import csv
+import gzip
+import io
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from conftest import seed_catalog
+from models import db, UserDownload
+
+SAME = datetime(2026, 10, 2, 9)
+DATES = [datetime(2026, 10, 3, 9), SAME, datetime(2026, 10, 1, 9), SAME, SAME]
+
+
+@pytest.fixture
+def export_app(make_app):
+    # Пачки по 2 рядки: межі пачок припадають на однакові download_date
+    app = make_app(EXPORT_CHUNK_SIZE=2)
+    songs, (user_id,) = seed_catalog(app, songs=2)
+    with app.app_context():
+        ids = db.session.scalars(insert(UserDownload).returning(UserDownload.download_id), [
+            {"user_id": user_id, "song_id": songs[i % 2], "download_date": d} for i, d in enumerate(DATES)
+        ]).all()
+        db.session.commit()
+    return app, ids
+
+
+def read_csv(data):
+    return list(csv.reader(io.StringIO(gzip.decompress(data).decode())))
+
+
+def test_csv_export_streams_all_rows_in_order(export_app):
+    app, ids = export_app
+    response = app.test_client().get("/api/downloads/export")
+
+    assert response.mimetype == "application/gzip"
+    assert response.headers["Content-Disposition"] == "attachment; filename=downloads.csv.gz"
+    header, *rows = read_csv(response.get_data())
+    assert header == ["download_id", "user_id", "song_id", "download_date"]
+    # Порядок (download_date, download_id), кожен рядок рівно раз
+    expected = sorted(zip(DATES, ids))
+    assert [int(row[0]) for row in rows] == [id_ for _, id_ in expected]
+
+
+def test_csv_export_range_and_include(export_app):
+    app, ids = export_app
+    response = app.test_client().get("/api/downloads/export?from=2026-10-02&to=2026-10-03&include=song,genre")
+
+    assert response.headers["Content-Disposition"] == "attachment; filename=downloads_20261002_20261003.csv.gz"
+    header, *rows = read_csv(response.get_data())
+    assert header[4:] == ["song_title", "price", "album_id", "genre_id", "genre"]
+    assert [int(row[0]) for row in rows] == [ids[1], ids[3], ids[4]]
+    assert {row[8] for row in rows} == {"Rock"}
+
+
+@pytest.mark.parametrize("query", ["format=xml", "include=user", "from=yesterday"])
+def test_bad_export_parameters_are_400(client, query):
+    assert client.get(f"/api/downloads/export?{query}").status_code == 400
+
+
+def test_parquet_export(export_app):
+    pq = pytest.importorskip("pyarrow.parquet")
+    app, ids = export_app
+    data = app.test_client().get("/api/downloads/export?format=parquet").get_data()
+
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    # Кожна пачка — окрема група рядків
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().column("download_id").to_pylist() == [id_ for _, id_ in sorted(zip(DATES, ids))]
+
+
+def test_cli_export_writes_file(export_app, tmp_path):
+    app, ids = export_app
+    output = tmp_path / "downloads.csv.gz"
+    result = app.test_cli_runner().invoke(args=[
+        "downloads", "export", "--include", "song", "--from", "2026-10-02", "--chunk-size", "2", str(output),
+    ])
+
+    assert result.exit_code == 0, result.output
+    header, *rows = read_csv(output.read_bytes())
+    assert header[-3:] == ["song_title", "price", "album_id"]
+    assert sorted(int(row[0]) for row in rows) == sorted([ids[0], ids[1], ids[3], ids[4]])
+
+
+def test_parquet_without_pyarrow_is_400(client, monkeypatch):
+    import export
+
+    monkeypatch.setattr(export, "load_pyarrow", lambda: (None, None))
+    response = client.get("/api/downloads/export?format=parquet")
+    assert response.status_code == 400
+    assert b"pyarrow" in response.get_data()
@@ -0,0 +1,56 @@
+import os
+import runpy
+
+from sqlalchemy import inspect
+
+from app import create_app
+from conftest import make_config
+from models import db
+
+CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def test_config_reads_environment(monkeypatch):
+    monkeypatch.setenv("BIND", "127.0.0.1:9000")
+    monkeypatch.setenv("WEB_WORKERS", "3")
+    monkeypatch.setenv("WEB_THREADS", "8")
+    monkeypatch.setenv("WEB_ACCESS_LOG", "-")
+    conf = runpy.run_path(CONF)
+
+    assert (conf["bind"], conf["workers"], conf["threads"]) == ("127.0.0.1:9000", 3, 8)
+    assert conf["worker_class"] == "gthread"
+    assert conf["preload_app"] is True
+    assert conf["wsgi_app"] == "app:app"
+    assert conf["max_requests"] > 0 and conf["graceful_timeout"] > 0
+
+
+def test_startup_runs_no_ddl_until_init_db(tmp_path):
+    app = create_app(make_config(tmp_path))
+    with app.app_context():
+        assert inspect(db.engine).get_table_names() == []
+
+    runner = app.test_cli_runner()
+    for _ in range(2):
+        # Повторний запуск безпечний: створюються лише відсутні таблиці
+        result = runner.invoke(args=["init-db"])
+        assert result.exit_code == 0, result.output
+        assert "up to date" in result.output
+    with app.app_context():
+        assert {"Song", "User", "UserDownload"} <= set(inspect(db.engine).get_table_names())
+        db.engine.dispose()
+
+
+def test_post_fork_drops_inherited_connections(app, monkeypatch):
+    import app as app_module
+
+    # post_fork бере модульний app, як у gunicorn з preload_app
+    monkeypatch.setattr(app_module, "app", app)
+    conf = runpy.run_path(CONF)
+    with app.app_context():
+        engine = db.engine
+        with engine.connect():
+            pass
+        assert engine.pool.checkedin() == 1
+        conf["post_fork"](None, None)
+        # Воркер відкриває власні з'єднання замість сокетів майстра
+        assert db.engine.pool.checkedin() == 0
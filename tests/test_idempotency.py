@@ -0,0 +1,94 @@
+import hashlib
+import threading
+
+import pytest
+
+from idempotency import IN_PROGRESS, idempotency
+from models import Genre, db
+
+
+@pytest.fixture
+def slow_app(app):
+    """Тестовий POST під idempotent: рахує виклики й чекає на сигнал, щоб дублікати перетнулися."""
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @idempotency.idempotent
+    def slow_create():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"call": len(calls)}, 201
+
+    app.add_url_rule("/test/slow", "slow_create", slow_create, methods=["POST"])
+    return app, calls, started, release
+
+
+def post(client, url, body, key="key-1"):
+    return client.post(url, data=body, content_type="application/json", headers={"Idempotency-Key": key})
+
+
+def test_replay_returns_stored_response(app, client):
+    first = post(client, "/api/genres", b'{"name": "Jazz"}')
+    second = post(client, "/api/genres", b'{"name": "Jazz"}')
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    with app.app_context():
+        assert db.session.query(Genre).filter_by(name="Jazz").count() == 1
+
+
+def test_same_key_with_other_body_is_422(client):
+    assert post(client, "/api/genres", b'{"name": "Jazz"}').status_code == 200
+    assert post(client, "/api/genres", b'{"name": "Blues"}').status_code == 422
+    # Інший ключ — звичайний новий запит
+    assert post(client, "/api/genres", b'{"name": "Blues"}', key="key-2").status_code == 200
+
+
+def test_concurrent_duplicates_in_process_are_coalesced(slow_app):
+    app, calls, started, release = slow_app
+    responses = [None, None]
+
+    def send(i):
+        responses[i] = post(app.test_client(), "/test/slow", b"{}")
+
+    first = threading.Thread(target=send, args=(0,))
+    first.start()
+    assert started.wait(5)
+    second = threading.Thread(target=send, args=(1,))
+    second.start()
+    # Дублікат чекає на подію першого запиту, а не виконує обробник удруге
+    second.join(0.2)
+    assert second.is_alive()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(calls) == 1
+    assert [r.status_code for r in responses] == [201, 201]
+    assert responses[0].get_json() == responses[1].get_json() == {"call": 1}
+    assert responses[1].headers["Idempotent-Replayed"] == "true"
+
+
+def test_key_held_by_another_worker_is_409(slow_app):
+    app, calls, _, release = slow_app
+    release.set()
+    body = b'{"x": 1}'
+    # Інший воркер уже зайняв ключ маркером через add бекенда
+    idempotency.backend.add("idem:slow_create:key-1", (IN_PROGRESS, hashlib.sha1(body).hexdigest()), 30)
+    client = app.test_client()
+
+    response = post(client, "/test/slow", body)
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert post(client, "/test/slow", b'{"x": 2}').status_code == 422
+    assert calls == []
+
+    # Воркер завершився без збереження відповіді — ключ звільнено, запит виконується
+    idempotency.backend.delete("idem:slow_create:key-1")
+    response = post(client, "/test/slow", body)
+    assert response.status_code == 201
+    assert calls == [1]
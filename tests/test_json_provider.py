@@ -0,0 +1,58 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+import json_provider
+from conftest import seed_catalog
+from json_provider import FastJSONProvider
+
+PAYLOAD = {"z": 1, "price": Decimal("9.99"), "at": datetime(2026, 10, 3, 9, 30), "day": date(2026, 10, 3)}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def provider(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(json_provider, "orjson", None)
+    return lambda **config: FastJSONProvider(type("App", (), {"config": config, "debug": False})())
+
+
+def test_dumps_types_match_default_provider(provider):
+    data = json.loads(provider().dumps(PAYLOAD))
+    assert data == {
+        "z": 1,
+        "price": 9.99,
+        "at": "Sat, 03 Oct 2026 09:30:00 GMT",
+        "day": "Sat, 03 Oct 2026 00:00:00 GMT",
+    }
+    # Порядок ключів — як у dict, без сортування
+    assert list(data) == ["z", "price", "at", "day"]
+
+
+def test_iso_dates(provider):
+    data = json.loads(provider(JSON_DATETIME_ISO=True).dumps(PAYLOAD))
+    assert (data["at"], data["day"]) == ("2026-10-03T09:30:00", "2026-10-03")
+    aware = json.loads(provider(JSON_DATETIME_ISO=True).dumps({"at": datetime(2026, 10, 3, tzinfo=timezone.utc)}))
+    assert aware["at"] == "2026-10-03T00:00:00+00:00"
+
+
+def test_both_paths_give_same_response(app, monkeypatch):
+    pytest.importorskip("orjson")
+    rows = [{"id": i, "price": Decimal("1.50"), "date": datetime(2026, 10, 1, i)} for i in range(3)]
+    with app.test_request_context():
+        fast = app.json.response(rows).get_data()
+        monkeypatch.setattr(json_provider, "orjson", None)
+        slow = app.json.response(rows).get_data()
+    assert json.loads(fast) == json.loads(slow)
+    assert fast.endswith(b"\n")
+
+
+def test_api_response_uses_provider(app, client):
+    seed_catalog(app, songs=1)
+    response = client.get("/api/songs?fields=price")
+    assert response.mimetype == "application/json"
+    # Decimal з кортежу колонок серіалізується як число без float() в обробнику
+    assert response.get_json() == [{"price": 1.0}]
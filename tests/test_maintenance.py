@@ -0,0 +1,65 @@
+import json
+
+from sqlalchemy import inspect, select, text
+
+from app import create_app
+from conftest import make_config
+from models import db, Song, User, UserDownload
+
+OLD_SCHEMA = [
+    """CREATE TABLE "UserDownload" (
+        user_id INTEGER NOT NULL REFERENCES "User" (user_id),
+        song_id INTEGER NOT NULL REFERENCES "Song" (song_id),
+        download_date DATETIME,
+        PRIMARY KEY (user_id, song_id)
+    )""",
+    'CREATE INDEX ix_userdownload_user_date ON "UserDownload" (user_id, download_date, song_id)',
+]
+
+
+def old_schema_app(tmp_path):
+    app = create_app(make_config(tmp_path))
+    with app.app_context():
+        tables = [t for t in db.metadata.sorted_tables if t is not UserDownload.__table__]
+        db.metadata.create_all(db.engine, tables=tables)
+        with db.engine.begin() as conn:
+            for ddl in OLD_SCHEMA:
+                conn.execute(text(ddl))
+        db.session.add_all([Song(song_id=1, title="A", price=1, downloads_count=5), Song(song_id=2, title="B", price=1)])
+        db.session.add_all([User(user_id=i, username=f"u{i}", email=f"u{i}@example.com") for i in (1, 2)])
+        db.session.commit()
+        db.session.execute(text(
+            "INSERT INTO UserDownload (user_id, song_id, download_date) VALUES "
+            "(1, 1, '2026-01-02 10:00:00'), (2, 1, NULL), (1, 2, '2026-01-01 09:00:00')"
+        ))
+        db.session.commit()
+        db.session.remove()
+    return app
+
+
+def test_migrate_then_reconcile_old_download_table(tmp_path):
+    app = old_schema_app(tmp_path)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["downloads", "migrate"])
+    assert result.exit_code == 0, result.output
+    assert "Migrated 3 download rows" in result.output
+    assert "Migrated 0" in runner.invoke(args=["downloads", "migrate"]).output
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert "UserDownload_old" not in inspector.get_table_names()
+        assert {i["name"] for i in inspector.get_indexes("UserDownload")} == {i.name for i in UserDownload.__table__.indexes}
+        rows = db.session.execute(
+            select(UserDownload.download_id, UserDownload.user_id, UserDownload.song_id).order_by(UserDownload.download_id)
+        ).all()
+        # Хронологічно: порожня дата — найстаріша
+        assert rows == [(1, 2, 1), (2, 1, 2), (3, 1, 1)]
+        db.session.remove()
+
+    report = json.loads(runner.invoke(args=["downloads", "reconcile", "--fix"]).output)
+    assert (report["songs_checked"], report["drifted"], report["total_drift"], report["fixed"]) == (2, 2, 2, 2)
+    with app.app_context():
+        assert dict(db.session.execute(select(Song.song_id, Song.downloads_count)).all()) == {1: 2, 2: 1}
+    report = json.loads(runner.invoke(args=["downloads", "reconcile"]).output)
+    assert report["drifted"] == 0
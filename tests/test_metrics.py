@@ -0,0 +1,87 @@
+import re
+
+import pytest
+
+from conftest import seed_catalog
+from metrics import metrics
+
+
+def metric(text, name, route, suffix="_count"):
+    match = re.search(rf'^{name}{suffix}{{method="GET",route="{re.escape(route)}"}} (\S+)$', text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+@pytest.fixture
+def metrics_app(make_app):
+    # metrics — синглтон процесу: чистимо лічильники попередніх тестів
+    metrics.__init__()
+    return make_app(METRICS_ENABLED=True, API_STREAM_BATCH_SIZE=2)
+
+
+def test_plain_response_counts_queries(metrics_app):
+    app = metrics_app
+    seed_catalog(app, songs=3)
+    client = app.test_client()
+
+    response = client.get("/api/songs?limit=2")
+    assert response.status_code == 200
+    assert re.search(r'db;dur=[\d.]+;desc="\d+ queries"', response.headers["Server-Timing"])
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/api/songs",status="200"} 1' in text
+    assert metric(text, "http_request_duration_seconds", "/api/songs") == 1
+    assert metric(text, "http_request_sql_queries", "/api/songs", "_sum") >= 1
+
+
+def test_streamed_response_recorded_after_body(metrics_app):
+    app = metrics_app
+    seed_catalog(app, songs=5)
+    client = app.test_client()
+
+    response = client.get("/api/songs?stream=ndjson", buffered=False)
+    assert response.is_streamed
+    # Поки тіло не прочитане, запит ще не записаний. Читаємо render() напряму:
+    # незакритий генератор тримає контекст запиту, і новий запит клієнта ділив би з ним g.
+    text = metrics.render()
+    assert metric(text, "http_request_duration_seconds", "/api/songs") == 0
+
+    assert len(response.get_data(as_text=True).splitlines()) == 5
+    response.close()
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/api/songs",status="200"} 1' in text
+    assert metric(text, "http_request_duration_seconds", "/api/songs") == 1
+    # SELECT виконується всередині генератора — і тепер потрапляє в метрики
+    assert metric(text, "http_request_sql_queries", "/api/songs", "_sum") >= 1
+    assert metric(text, "http_request_sql_seconds_total", "/api/songs", "") > 0
+
+
+def test_disabled_metrics_have_no_endpoint(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_slow_queries_are_logged_and_counted(make_app, caplog):
+    metrics.__init__()
+    app = make_app(METRICS_ENABLED=True, METRICS_SLOW_QUERY_MS=0)
+    seed_catalog(app, songs=1)
+    client = app.test_client()
+
+    with caplog.at_level("WARNING", logger="metrics"):
+        client.get("/api/songs")
+    assert any("Slow query" in r.message and "FROM" in r.message for r in caplog.records)
+    count = re.search(r"^sql_slow_queries_total (\d+)$", client.get("/metrics").get_data(as_text=True), re.M)
+    assert int(count.group(1)) >= 1
+
+
+def test_routes_are_labelled_by_rule(metrics_app):
+    songs, _ = seed_catalog(metrics_app, songs=2)
+    client = metrics_app.test_client()
+    # Сторінки помилок Flask віддає як WSGI-ітератор: запис — після close(), як у сервера
+    for url in [f"/api/songs/{song_id}" for song_id in songs] + ["/api/songs/999", "/no-such-page"]:
+        client.get(url).close()
+
+    text = client.get("/metrics").get_data(as_text=True)
+    # Шаблон маршруту, а не URL: кількість серій не росте з кількістю id
+    assert 'http_requests_total{method="GET",route="/api/songs/<int:song_id>",status="200"} 2' in text
+    assert 'http_requests_total{method="GET",route="/api/songs/<int:song_id>",status="404"} 1' in text
+    assert 'route="<unmatched>",status="404"} 1' in text
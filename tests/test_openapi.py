@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import create_app
+from conftest import make_config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_export_then_serve_static_spec(make_app, tmp_path):
+    pytest.importorskip("flasgger")
+    spec_file = tmp_path / "openapi.json"
+    result = make_app().test_cli_runner().invoke(args=["openapi", "export", str(spec_file)])
+    assert result.exit_code == 0, result.output
+
+    spec = json.loads(spec_file.read_text(encoding="utf-8"))
+    assert {"/api/songs", "/api/users/{user_id}/downloads", "/api/downloads/export"} <= set(spec["paths"])
+    assert "get" in spec["paths"]["/api/songs"] and "post" in spec["paths"]["/api/downloads"]
+
+    client = make_app(SWAGGER_MODE="static", OPENAPI_SPEC_FILE=str(spec_file)).test_client()
+    response = client.get("/apispec_1.json")
+    assert response.status_code == 200
+    assert response.get_json() == spec
+    assert response.headers["Cache-Control"] == "public, max-age=3600"
+    assert b"swagger-ui" in client.get("/apidocs/").get_data()
+    assert client.get("/flasgger_static/swagger-ui-bundle.js").status_code == 200
+
+
+def test_export_is_reproducible(make_app, tmp_path):
+    pytest.importorskip("flasgger")
+    runner = make_app().test_cli_runner()
+    outputs = []
+    for name in ("a.json", "b.json"):
+        assert runner.invoke(args=["openapi", "export", str(tmp_path / name)]).exit_code == 0
+        outputs.append((tmp_path / name).read_bytes())
+    # Ключі відсортовані: файл у збірці змінюється лише разом із docstring-ами
+    assert outputs[0] == outputs[1]
+
+
+def test_static_mode_without_spec_is_404(make_app, tmp_path):
+    client = make_app(SWAGGER_MODE="static", OPENAPI_SPEC_FILE=str(tmp_path / "missing.json")).test_client()
+    response = client.get("/apispec_1.json")
+    assert response.status_code == 404
+    assert b"openapi export" in response.get_data()
+
+
+def test_docs_off_and_invalid_mode(client, tmp_path):
+    assert client.get("/apidocs/").status_code == 404
+    with pytest.raises(ValueError):
+        create_app(make_config(tmp_path, SWAGGER_MODE="yaml"))
+
+
+def test_lazy_startup_skips_flasgger_and_db():
+    code = (
+        "import sys; from app import app; "
+        "print(app.config['SWAGGER_MODE'], app.config['DB_STARTUP_CHECK'], 'flasgger' in sys.modules)"
+    )
+    env = {**os.environ, "LAZY_STARTUP": "1"}
+    for name in ("SWAGGER_MODE", "DB_STARTUP_CHECK"):
+        env.pop(name, None)
+    # БД недоступна: старт без звернення до неї все одно має пройти
+    env["DATABASE_URL"] = "sqlite:////nonexistent/dir/music.db"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == ["static", "False", "False"]
@@ -0,0 +1,89 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from models import db, Genre
+from pagination import encode_cursor
+
+
+def seed_genres(app, n):
+    with app.app_context():
+        genres = [Genre(name=f"Genre {i}") for i in range(n)]
+        db.session.add_all(genres)
+        db.session.commit()
+        return [g.genre_id for g in genres]
+
+
+def walk(client, url):
+    """Пройти всі сторінки за X-Next-Cursor; повертає сторінки id."""
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.get_json()])
+        url = None
+        if "X-Next-Cursor" in response.headers:
+            link = response.headers["Link"]
+            url = link[link.index("<") + 1:link.index(">")]
+            assert parse_qs(urlsplit(url).query)["after"] == [response.headers["X-Next-Cursor"]]
+    return pages
+
+
+@pytest.mark.parametrize("n, pages", [(5, [2, 2, 1]), (4, [2, 2]), (1, [1]), (0, [0])])
+def test_pages_cover_collection_once(app, client, n, pages):
+    ids = seed_genres(app, n)
+    result = walk(client, "/api/genres?limit=2")
+
+    # Якщо рядків рівно на ціле число сторінок, остання не видає курсора в порожнечу
+    assert [len(page) for page in result] == pages
+    assert [id_ for page in result for id_ in page] == ids
+
+
+def test_cursor_keeps_working_after_inserts_and_deletes(app, client):
+    ids = seed_genres(app, 4)
+    first = client.get("/api/genres?limit=2")
+    cursor = first.headers["X-Next-Cursor"]
+    with app.app_context():
+        db.session.delete(db.session.get(Genre, ids[2]))
+        db.session.add(Genre(name="Late"))
+        db.session.commit()
+
+    rest = client.get(f"/api/genres?limit=10&after={cursor}").get_json()
+    # Курсор — значення ключа, а не зсув: видалений рядок не зсуває сторінку
+    assert [g["id"] for g in rest] == [ids[3], ids[3] + 1]
+
+
+@pytest.mark.parametrize("query", [
+    "after=!!!", "after=" + encode_cursor([1, 2]), "after=" + encode_cursor([]), "limit=0", "limit=abc", "stream=csv",
+])
+def test_bad_parameters_are_400(client, query):
+    assert client.get(f"/api/genres?{query}").status_code == 400
+
+
+def test_limit_is_clamped_to_max_page_size(make_app):
+    app = make_app(API_MAX_PAGE_SIZE=3)
+    seed_genres(app, 5)
+    response = app.test_client().get("/api/genres?limit=100")
+    assert len(response.get_json()) == 3
+    assert response.headers["X-Next-Cursor"]
+
+
+@pytest.mark.parametrize("mode", ["ndjson", "json"])
+def test_stream_returns_whole_collection(make_app, mode):
+    app = make_app(API_STREAM_BATCH_SIZE=2)
+    ids = seed_genres(app, 5)
+    client = app.test_client()
+
+    response = client.get(f"/api/genres?stream={mode}")
+    assert response.is_streamed
+    body = response.get_data(as_text=True)
+    items = [json.loads(line) for line in body.splitlines()] if mode == "ndjson" else json.loads(body)
+    assert [g["id"] for g in items] == ids
+
+    # limit і after діють і на потік
+    cursor = encode_cursor([ids[1]])
+    response = client.get(f"/api/genres?stream={mode}&limit=2&after={cursor}")
+    body = response.get_data(as_text=True)
+    items = [json.loads(line) for line in body.splitlines()] if mode == "ndjson" else json.loads(body)
+    assert [g["id"] for g in items] == ids[2:4]
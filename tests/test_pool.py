@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+from conftest import sqlite_uri
+from pool import InstrumentedQueuePool, pool_stats
+
+
+def test_only_exhausted_pool_counts_as_timeout(tmp_path):
+    engine = create_engine(sqlite_uri(tmp_path / "pool.db"), poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    held.close()
+    with engine.connect():
+        pass
+
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 3
+    assert stats["checkout_timeouts"] == 1
+    assert stats["wait_max_ms"] >= 50
+
+
+def test_connect_error_is_not_a_timeout(tmp_path):
+    engine = create_engine(sqlite_uri(tmp_path / "missing" / "pool.db"), poolclass=InstrumentedQueuePool)
+    with pytest.raises(OperationalError):
+        engine.connect()
+    assert pool_stats(engine)["checkout_timeouts"] == 0
@@ -0,0 +1,115 @@
+import pytest
+
+import ratelimit
+from ratelimit import MemoryRateStore, parse_rate, parse_rules
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("20/second", (0.05, 0.95)),
+    ("10/minute:3", (6.0, 12.0)),
+    (" 1/Hour ", (3600.0, 0.0)),
+    ("none", None),
+    ("", None),
+])
+def test_parse_rate(spec, expected):
+    assert parse_rate(spec) == (pytest.approx(expected) if expected else None)
+
+
+@pytest.mark.parametrize("spec", ["20", "20/week", "x/second", "0/second", "5/second:0"])
+def test_parse_rate_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_rate(spec)
+
+
+def test_parse_rules():
+    assert parse_rules("export_api=10/minute:3, api.get_songs=none,") == {
+        "export_api": pytest.approx((6.0, 12.0)),
+        "api.get_songs": None,
+    }
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_store_allows_burst_then_refills(clock):
+    store = MemoryRateStore()
+    limit = parse_rate("2/second:3")
+
+    assert [store.hit("k", *limit) for _ in range(3)] == [0, 0, 0]
+    assert store.hit("k", *limit) == pytest.approx(0.5)
+    # Відмова не витрачає токен: через 0.5 с запит знову проходить
+    clock.now += 0.5
+    assert store.hit("k", *limit) == 0
+    assert store.hit("other", *limit) == 0
+
+
+def test_store_prunes_idle_keys(clock):
+    store = MemoryRateStore({"RATE_LIMIT_MAX_KEYS": 3})
+    limit = parse_rate("1/second")
+    for key in "abc":
+        store.hit(key, *limit)
+    clock.now += 5
+    store.hit("d", *limit)
+    store.hit("e", *limit)
+    # Ключі з минулим tat — повні кошики, їх можна забути без зміни поведінки
+    assert set(store._tat) == {"d", "e"}
+
+
+@pytest.fixture
+def limited(make_app, clock):
+    return make_app(
+        RATE_LIMIT_ENABLED=True,
+        RATE_LIMIT_DEFAULT="2/minute",
+        RATE_LIMITS="api.get_authors=1/minute,export_api=none",
+        RATE_LIMIT_EXEMPT="api.get_labels",
+        RATE_LIMIT_USER_HEADER="X-User",
+    )
+
+
+def statuses(client, url, n, **kwargs):
+    return [client.get(url, **kwargs).status_code for _ in range(n)]
+
+
+def test_limit_per_client_and_endpoint(limited, clock):
+    client = limited.test_client()
+
+    assert statuses(client, "/api/genres", 3) == [200, 200, 429]
+    response = client.get("/api/genres")
+    assert response.headers["Retry-After"] == "30"
+    # Інший маршрут і інший користувач мають власні кошики
+    assert statuses(client, "/api/users", 2) == [200, 200]
+    assert statuses(client, "/api/genres", 2, headers={"X-User": "alice"}) == [200, 200]
+    clock.now += 30
+    assert statuses(client, "/api/genres", 2) == [200, 429]
+
+
+def test_rules_and_exemptions(limited):
+    client = limited.test_client()
+
+    assert statuses(client, "/api/authors", 2) == [200, 429]
+    assert statuses(client, "/api/labels", 5) == [200] * 5
+    assert 429 not in statuses(client, "/api/downloads/export", 3)
+    # Невідомий URL не витрачає ліміт
+    assert statuses(client, "/api/nope", 3) == [404] * 3
+
+
+def test_forwarded_client_behind_proxy(make_app, clock):
+    app = make_app(RATE_LIMIT_ENABLED=True, RATE_LIMIT_DEFAULT="1/minute", RATE_LIMIT_PROXY_HOPS=1)
+    client = app.test_client()
+
+    def get(forwarded):
+        return client.get("/api/genres", headers={"X-Forwarded-For": forwarded}).status_code
+
+    assert [get("1.1.1.1"), get("9.9.9.9, 1.1.1.1"), get("2.2.2.2")] == [200, 429, 200]
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine, insert
+
+from conftest import sqlite_uri
+from config import engine_options
+from models import db, Genre
+from replicas import replica_set
+
+
+def replica_binds(tmp_path, names):
+    binds = {}
+    for i, name in enumerate(names):
+        uri = sqlite_uri(tmp_path / f"{name}.db")
+        # Репліка з тією ж схемою і жанром, за яким видно, звідки прочитано
+        engine = create_engine(uri)
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Genre.__table__), {"name": name})
+        engine.dispose()
+        binds[f"replica{i}"] = {"url": uri, **engine_options(uri)}
+    return binds
+
+
+@pytest.fixture
+def replicated_app(make_app, tmp_path):
+    binds = replica_binds(tmp_path, ["replica0", "replica1"])
+    app = make_app(SQLALCHEMY_BINDS=binds, SQLALCHEMY_REPLICA_URIS=[b["url"] for b in binds.values()])
+    with app.app_context():
+        db.session.add(Genre(name="primary"))
+        db.session.commit()
+    return app
+
+
+def read_genres(client):
+    return [g["name"] for g in client.get("/api/genres").get_json()]
+
+
+def test_reads_alternate_between_replicas(replicated_app):
+    client = replicated_app.test_client()
+    first, second, third = (read_genres(client) for _ in range(3))
+    assert {first[0], second[0]} == {"replica0", "replica1"}
+    assert third == first
+
+
+def test_writes_go_to_primary(replicated_app):
+    client = replicated_app.test_client()
+    assert client.post("/api/genres", json={"name": "Jazz"}).status_code in (200, 201)
+    with replicated_app.app_context():
+        assert db.session.scalars(db.select(Genre.name).order_by(Genre.genre_id)).all() == ["primary", "Jazz"]
+    assert all("Jazz" not in read_genres(client) for _ in range(2))
+
+
+def test_ejected_replica_is_skipped_then_primary_used(replicated_app):
+    client = replicated_app.test_client()
+    replica0, replica1 = replica_set.engines
+    replica_set.eject(replica0)
+    assert [read_genres(client) for _ in range(2)] == [["replica1"], ["replica1"]]
+
+    replica_set.eject(replica1)
+    assert read_genres(client) == ["primary"]
+    assert replica_set.metrics()["fallbacks"] >= 1
+
+
+def test_replica_is_ejected_after_connection_error(make_app, tmp_path):
+    binds = replica_binds(tmp_path, ["replica0"])
+    missing = sqlite_uri(tmp_path / "missing" / "replica1.db")
+    binds["replica1"] = {"url": missing, **engine_options(missing)}
+    app = make_app(SQLALCHEMY_BINDS=binds, SQLALCHEMY_REPLICA_URIS=[b["url"] for b in binds.values()],
+                   PROPAGATE_EXCEPTIONS=False)
+    client = app.test_client()
+
+    statuses = [client.get("/api/genres").status_code for _ in range(2)]
+    assert sorted(statuses) == [200, 500]
+    assert replica_set.metrics()["replicas"][1]["healthy"] is False
+    assert [read_genres(client) for _ in range(3)] == [["replica0"]] * 3
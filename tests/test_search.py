@@ -0,0 +1,47 @@
+import sys
+import threading
+
+from search import search_index
+
+
+def test_search_while_handlers_mutate_index(client, app):
+    for i in range(20):
+        client.post("/api/authors", json={"name": f"Seed author {i}"})
+    assert client.get("/api/search?q=seed").status_code == 200
+
+    stop = threading.Event()
+    errors = []
+
+    def mutate():
+        i = 0
+        while not stop.is_set():
+            search_index.added("author", 10_000 + i, f"seeded temp{i}")
+            search_index.removed("author", 10_000 + i, f"seeded temp{i}")
+            i += 1
+
+    def search():
+        try:
+            for _ in range(300):
+                search_index.search("see", 20)
+        except Exception as e:
+            errors.append(e)
+
+    # Часте перемикання потоків, щоб гонка проявлялась без лока
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        mutator = threading.Thread(target=mutate)
+        mutator.start()
+        searchers = [threading.Thread(target=search) for _ in range(4)]
+        for t in searchers:
+            t.start()
+        for t in searchers:
+            t.join()
+        stop.set()
+        mutator.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    hits = client.get("/api/search?q=seed&type=author").get_json()
+    assert len(hits) == 20
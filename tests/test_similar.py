@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import or_, select
+
+from conftest import seed_catalog
+from models import db, SongSimilar
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from similar import SimilarityModel  # noqa: E402
+
+
+def similar_pairs(app):
+    with app.app_context():
+        return set(db.session.execute(select(SongSimilar.song_id, SongSimilar.similar_song_id)).all())
+
+
+def test_refresh_skips_cascade_deleted_songs(client, app):
+    songs, users = seed_catalog(app, songs=3, users=3)
+    # Подія з найбільшим download_id — не для видаленої пісні: SQLite перевикористовує rowid
+    for song_id in (songs[2], songs[0], songs[1]):
+        for user_id in users:
+            client.post("/api/downloads", json={"user_id": user_id, "song_id": song_id})
+    model = SimilarityModel(app)
+    assert model.refresh() == 3
+    assert (songs[0], songs[2]) in similar_pairs(app)
+
+    assert client.delete(f"/api/songs/{songs[2]}?on_delete=cascade").status_code == 200
+    client.post("/api/downloads", json={"user_id": users[0], "song_id": songs[0]})
+    assert model.refresh() == 2
+
+    pairs = similar_pairs(app)
+    assert pairs == {(songs[0], songs[1]), (songs[1], songs[0])}
+    with app.app_context():
+        stale = or_(SongSimilar.song_id == songs[2], SongSimilar.similar_song_id == songs[2])
+        assert db.session.scalar(select(SongSimilar.song_id).where(stale)) is None
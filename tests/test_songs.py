@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import event, insert
+
+from models import db, Album, Author, Genre, Label, Song, SongAuthor
+
+
+def seed_songs(app, n):
+    with app.app_context():
+        label = Label(name="Label")
+        genre = Genre(name="Genre")
+        db.session.add_all([label, genre])
+        db.session.flush()
+        album = Album(title="Album", label_id=label.label_id)
+        authors = [Author(name=f"Author {i}") for i in range(3)]
+        db.session.add_all([album, *authors])
+        db.session.flush()
+        songs = [Song(title=f"Song {i}", price=1, genre_id=genre.genre_id, album_id=album.album_id) for i in range(n)]
+        db.session.add_all(songs)
+        db.session.flush()
+        db.session.execute(insert(SongAuthor), [
+            {"song_id": s.song_id, "author_id": a.author_id} for s in songs for a in authors[: 1 + s.song_id % 3]
+        ])
+        db.session.commit()
+        db.session.remove()
+
+
+def count_queries(app, client, url):
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+
+@pytest.mark.parametrize("n", [2, 50])
+def test_expanded_songs_use_fixed_query_count(make_app, n):
+    app = make_app()
+    seed_songs(app, n)
+    songs, queries = count_queries(app, app.test_client(), "/api/songs?limit=100&expand=album,genre,authors,label")
+
+    assert len(songs) == n
+    assert all(s["album"] and s["genre"] and s["label"] and s["authors"] for s in songs)
+    # Сторінка з JOIN-ами для many-to-one і один SELECT ... IN для авторів
+    assert queries == 2
+
+
+def seed_priced(app, prices, titles=None):
+    with app.app_context():
+        genres = [Genre(name="A"), Genre(name="B")]
+        db.session.add_all(genres)
+        db.session.flush()
+        songs = [
+            Song(title=(titles[i] if titles else f"Song {i}"), price=price, genre_id=genres[i % 2].genre_id)
+            for i, price in enumerate(prices)
+        ]
+        db.session.add_all(songs)
+        db.session.commit()
+        return [s.song_id for s in songs], [g.genre_id for g in genres]
+
+
+def all_pages(client, url):
+    items = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        items += response.get_json()
+        link = response.headers.get("Link")
+        url = link[link.index("<") + 1:link.index(">")] if link else None
+    return items
+
+
+@pytest.mark.parametrize("sort", ["price", "-price"])
+def test_sort_pages_through_ties(app, client, sort):
+    prices = [3, 1, 2, 1, 3, 1, 2]
+    ids, _ = seed_priced(app, prices)
+
+    items = all_pages(client, f"/api/songs?sort={sort}&limit=2&fields=id,price")
+    # Ключ keyset — (price, id): рівні ціни не губляться й не дублюються на межі сторінок
+    expected = sorted(zip(prices, ids), reverse=sort.startswith("-"))
+    assert [(item["price"], item["id"]) for item in items] == expected
+
+
+def test_filters_combine(app, client):
+    ids, (genre_a, _) = seed_priced(app, [1, 2, 3, 4, 5, 6], ["Rock 1", "Pop", "Rock 2", "Rock 3", "Rock_4", "Rocky"])
+
+    items = client.get(f"/api/songs?genre_id={genre_a}&min_price=2&max_price=5&fields=id").get_json()
+    assert items == [{"id": ids[2]}, {"id": ids[4]}]
+    # title_prefix екранує шаблонні символи LIKE
+    items = client.get("/api/songs?title_prefix=Rock_&fields=title").get_json()
+    assert items == [{"title": "Rock_4"}]
+
+
+def test_fields_projection(app, client):
+    ids, _ = seed_priced(app, [1.5])
+    assert client.get("/api/songs?fields=title,price").get_json() == [{"title": "Song 0", "price": 1.5}]
+    # Поля ключа keyset не потрапляють у відповідь, але курсор усе одно будується
+    response = client.get("/api/songs?fields=title&sort=price&limit=1")
+    assert response.get_json() == [{"title": "Song 0"}]
+
+
+@pytest.mark.parametrize("query", ["fields=id,secret", "sort=genre", "min_price=cheap", "genre_id=x"])
+def test_bad_song_query_is_400(client, query):
+    assert client.get(f"/api/songs?{query}").status_code == 400
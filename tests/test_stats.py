@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from conftest import seed_catalog
+from models import db, SongDownloadDaily, UserDownload
+from stats import refresh_daily_stats
+
+
+def test_day_interval_limits_each_day(client, app):
+    songs, (user_id,) = seed_catalog(app, songs=3)
+    first = datetime(2026, 10, 1, 12)
+    events = []
+    for offset in range(3):
+        # День offset: пісня i завантажена i + 1 разів
+        for i, song_id in enumerate(songs):
+            events += [{"user_id": user_id, "song_id": song_id, "download_date": first + timedelta(days=offset)}] * (i + 1)
+    with app.app_context():
+        db.session.execute(insert(UserDownload.__table__), events)
+        db.session.commit()
+        refresh_daily_stats()
+
+    rows = client.get("/api/stats/downloads?group_by=song&interval=day&limit=2").get_json()
+
+    days = [(first + timedelta(days=offset)).date().isoformat() for offset in range(3)]
+    assert [(r["day"], r["song_id"], r["downloads"]) for r in rows] == [
+        (day, song_id, n) for day in days for song_id, n in ((songs[2], 3), (songs[1], 2))
+    ]
+
+
+def test_total_interval_ranks_by_metric(client, app):
+    songs, (user_id,) = seed_catalog(app, songs=2)
+    for song_id in (songs[1], songs[1], songs[0]):
+        client.post("/api/downloads", json={"user_id": user_id, "song_id": song_id})
+    with app.app_context():
+        refresh_daily_stats()
+
+    rows = client.get(f"/api/stats/revenue?from={date.today().isoformat()}&limit=1").get_json()
+    assert rows == [{"song_id": songs[1], "name": "Song 1", "downloads": 2, "revenue": 2.0}]
+
+
+def daily(app):
+    with app.app_context():
+        rows = db.session.execute(
+            select(SongDownloadDaily.song_id, SongDownloadDaily.day, SongDownloadDaily.downloads)
+            .order_by(SongDownloadDaily.day, SongDownloadDaily.song_id)
+        ).all()
+        return [(song_id, day.isoformat(), n) for song_id, day, n in rows]
+
+
+def test_refresh_picks_up_late_committed_downloads(app):
+    songs, (user_id,) = seed_catalog(app, songs=1)
+    day = datetime(2026, 10, 1, 12)
+    with app.app_context():
+        db.session.execute(insert(UserDownload.__table__), [
+            {"download_id": 10, "user_id": user_id, "song_id": songs[0], "download_date": day},
+            {"download_id": 12, "user_id": user_id, "song_id": songs[0], "download_date": day + timedelta(days=1)},
+        ])
+        db.session.commit()
+        refresh_daily_stats()
+        # id 11 видано раніше, але транзакція закомічена вже після перерахунку
+        db.session.execute(insert(UserDownload.__table__), [
+            {"download_id": 11, "user_id": user_id, "song_id": songs[0], "download_date": day},
+        ])
+        db.session.commit()
+        assert refresh_daily_stats() == [date(2026, 10, 1), date(2026, 10, 2)]
+
+    assert daily(app) == [(songs[0], "2026-10-01", 2), (songs[0], "2026-10-02", 1)]
+
+
+def test_deleting_downloads_updates_daily_totals(client, app):
+    songs, users = seed_catalog(app, songs=2, users=2)
+    day = datetime(2026, 10, 1, 12)
+    events = [(users[0], songs[0]), (users[0], songs[1]), (users[1], songs[0]), (users[1], songs[0])]
+    with app.app_context():
+        ids = db.session.scalars(insert(UserDownload).returning(UserDownload.download_id), [
+            {"user_id": u, "song_id": s, "download_date": day} for u, s in events
+        ]).all()
+        db.session.commit()
+        refresh_daily_stats()
+
+    client.delete("/api/downloads/bulk", json=[{"id": ids[2]}])
+    assert daily(app) == [(songs[0], "2026-10-01", 2), (songs[1], "2026-10-01", 1)]
+
+    assert client.delete(f"/api/users/{users[0]}?on_delete=cascade").status_code == 200
+    assert daily(app) == [(songs[0], "2026-10-01", 1)]
+    rows = client.get("/api/stats/revenue?from=2026-10-01").get_json()
+    assert rows == [{"song_id": songs[0], "name": "Song 0", "downloads": 1, "revenue": 1.0}]